@@ -0,0 +1,60 @@
+"""
+Benchmarks of the module calculations on synthetic cases.
+"""
+
+import pytest
+
+# fmt: off
+from seat.modules.acoustics_module import calculate_acoustic_stressors
+from seat.modules.power_module import calculate_power
+from seat.modules.shear_stress_module import calculate_shear_stress_stressors
+from seat.modules.velocity_module import calculate_velocity_stressors
+
+# fmt: on
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def bench_calculate_shear_stress_stressors(run_benchmark, flow_case, streaming):
+    run_benchmark(
+        calculate_shear_stress_stressors,
+        fpath_nodev=flow_case["nodev"],
+        fpath_dev=flow_case["dev"],
+        probabilities_file=flow_case["probabilities"],
+        receptor_filename=flow_case["grain size"],
+        latlon=False,
+        streaming=streaming,
+    )
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def bench_calculate_velocity_stressors(run_benchmark, flow_case, streaming):
+    run_benchmark(
+        calculate_velocity_stressors,
+        fpath_nodev=flow_case["nodev"],
+        fpath_dev=flow_case["dev"],
+        probabilities_file=flow_case["probabilities"],
+        receptor_filename=flow_case["critical velocity"],
+        latlon=False,
+        streaming=streaming,
+    )
+
+
+def bench_calculate_acoustic_stressors(run_benchmark, paracousti_case):
+    run_benchmark(
+        calculate_acoustic_stressors,
+        paracousti_case["dev"],
+        paracousti_case["probabilities"],
+        paracousti_case["threshold"],
+        fpath_nodev=paracousti_case["baseline"],
+        species_folder=paracousti_case["species"],
+    )
+
+
+def bench_calculate_power(run_benchmark, power_case, tmp_path):
+    run_benchmark(
+        calculate_power,
+        power_case["power"],
+        power_case["probabilities"],
+        save_path=str(tmp_path),
+        crs=4326,
+    )
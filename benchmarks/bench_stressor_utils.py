@@ -0,0 +1,102 @@
+"""
+Benchmarks of the grid and statistics functions in stressor_utils.py.
+"""
+
+import numpy as np
+import pytest
+
+import synthetic_cases as sc
+
+# fmt: off
+from seat.modules import stressor_utils as su
+
+# fmt: on
+
+
+@pytest.fixture(scope="session")
+def unstructured_nodes(ncells):
+    x, y = sc.unstructured_coordinates(ncells)
+    u, v = sc.flow_velocity(x, y, 1.0, 3, device=True)
+    return x, y, np.hypot(u, v)
+
+
+@pytest.fixture(scope="session")
+def structured_grid(ncells):
+    x, y = sc.structured_coordinates(ncells)
+    u, v = sc.flow_velocity(x, y, 1.0, 3, device=True)
+    return x, y, np.hypot(u, v)
+
+
+@pytest.fixture(scope="session")
+def rasters(tmp_path_factory, structured_grid):
+    """Stressor and receptor GeoTIFFs on the structured grid (rows = y)."""
+    x, y, speed = structured_grid
+    dx = x[1, 0] - x[0, 0]
+    folder = tmp_path_factory.mktemp("rasters")
+    filenames = {}
+    for name, array in (
+        ("stressor", speed.T[::-1]),
+        ("classified", np.digitize(speed.T[::-1], [0.5, 1.0, 1.5]) - 1.0),
+        ("receptor", np.where(speed.T[::-1] > 1.0, 250.0, 500.0)),
+    ):
+        filename = str(folder / f"{name}.tif")
+        su.numpy_array_to_raster(
+            su.create_raster(filename, array.shape[1], array.shape[0], 1),
+            array,
+            [x.min() - dx / 2, y.max() - dx / 2],
+            [dx, dx],
+            sc.UTM_CRS,
+            filename,
+        )
+        filenames[name] = filename
+    return filenames
+
+
+def bench_estimate_grid_spacing(run_benchmark, unstructured_nodes):
+    x, y, _ = unstructured_nodes
+    run_benchmark(su.estimate_grid_spacing, x, y, nsamples=1000)
+
+
+def bench_create_structured_array_from_unstructured(run_benchmark, unstructured_nodes):
+    x, y, speed = unstructured_nodes
+    run_benchmark(su.create_structured_array_from_unstructured, x, y, speed, 10.0)
+
+
+def bench_resample_structured_grid(run_benchmark, structured_grid):
+    x, y, speed = structured_grid
+    # half a cell offset so every output point is interpolated
+    run_benchmark(su.resample_structured_grid, x, y, speed, x + 5.0, y + 5.0)
+
+
+@pytest.mark.parametrize("latlon", [False, True])
+def bench_calculate_cell_area(run_benchmark, ncells, latlon):
+    if latlon:
+        rx, ry = sc.paracousti_coordinates(ncells)
+    else:
+        # cell corners of an irregular (stretched) grid
+        rx, ry = np.meshgrid(
+            *[np.cumsum(np.linspace(5, 15, n)) for n in sc.grid_shape(ncells)]
+        )
+    run_benchmark(su.calculate_cell_area, rx, ry, latlon=latlon)
+
+
+@pytest.mark.parametrize("receptor", [False, True])
+def bench_bin_layer(run_benchmark, rasters, receptor):
+    run_benchmark(
+        su.bin_layer,
+        rasters["stressor"],
+        receptor_filename=rasters["receptor"] if receptor else None,
+        latlon=False,
+    )
+
+
+@pytest.mark.parametrize("receptor", [False, True])
+def bench_classify_layer_area(run_benchmark, rasters, receptor):
+    run_benchmark(
+        su.classify_layer_area,
+        rasters["classified"],
+        receptor_filename=rasters["receptor"] if receptor else None,
+        at_values=[-1, 0, 1, 2],
+        value_names=["low", "medium", "high", "very high"],
+        latlon=False,
+    )
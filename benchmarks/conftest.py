@@ -0,0 +1,137 @@
+"""
+Fixtures of the SEAT benchmarks.
+
+Synthetic cases (see synthetic_cases.py) are generated once per session for
+each size, set with the options below, e.g.
+
+    python -m pytest benchmarks --bench-cells 10000,1000000 --bench-runs 1,10
+"""
+
+import os
+import sys
+
+import pytest
+
+# Import seat and synthetic_cases
+script_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+sys.path.insert(0, script_dir)
+
+# fmt: off
+import synthetic_cases as sc
+
+# fmt: on
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("seat benchmarks")
+    group.addoption(
+        "--bench-cells",
+        default="10000",
+        help="comma separated grid sizes in cells (default 10000)",
+    )
+    group.addoption(
+        "--bench-runs",
+        default="2",
+        help="comma separated numbers of model runs (default 2)",
+    )
+    group.addoption(
+        "--bench-timesteps",
+        type=int,
+        default=4,
+        help="time steps per run (default 4)",
+    )
+    group.addoption(
+        "--bench-rounds",
+        type=int,
+        default=3,
+        help="rounds of each benchmark (default 3)",
+    )
+
+
+def _int_list(value):
+    return [int(float(item)) for item in value.split(",") if item.strip()]
+
+
+def pytest_generate_tests(metafunc):
+    if "ncells" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "ncells",
+            _int_list(metafunc.config.getoption("bench_cells")),
+            scope="session",
+        )
+    if "nruns" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "nruns", _int_list(metafunc.config.getoption("bench_runs")), scope="session"
+        )
+
+
+@pytest.fixture(scope="session")
+def ntime(pytestconfig):
+    return pytestconfig.getoption("bench_timesteps")
+
+
+@pytest.fixture
+def run_benchmark(benchmark, pytestconfig):
+    """Runs a function a fixed number of rounds (the inputs can be large)."""
+    rounds = pytestconfig.getoption("bench_rounds")
+
+    def run(func, *args, **kwargs):
+        return benchmark.pedantic(func, args, kwargs, rounds=rounds, iterations=1)
+
+    return run
+
+
+@pytest.fixture(scope="session", params=["structured", "unstructured"])
+def flow_case(request, tmp_path_factory, ncells, nruns, ntime):
+    """Structured (Delft3D) or unstructured (DFlow-FM) runs of each size."""
+    grid = request.param
+    folder = tmp_path_factory.mktemp(f"{grid}_{ncells}_{nruns}")
+    if grid == "structured":
+        write_case = sc.write_structured_case
+    else:
+        write_case = sc.write_unstructured_case
+    write_case(str(folder / "dev"), str(folder / "nodev"), ncells, nruns, ntime)
+    return {
+        "dev": str(folder / "dev"),
+        "nodev": str(folder / "nodev"),
+        "probabilities": sc.write_probabilities(
+            str(folder / "probabilities.csv"), nruns
+        ),
+        "grain size": sc.write_receptor_value(
+            str(folder / "grain_size.csv"), "grain size (microns)", 250
+        ),
+        "critical velocity": sc.write_receptor_value(
+            str(folder / "critical_velocity.csv"), "critical_velocity (m/s)", 0.05
+        ),
+    }
+
+
+@pytest.fixture(scope="session")
+def paracousti_case(tmp_path_factory, ncells, nruns):
+    folder = tmp_path_factory.mktemp(f"paracousti_{ncells}_{nruns}")
+    names = sc.write_paracousti_case(
+        str(folder / "dev"), str(folder / "baseline"), ncells, nruns
+    )
+    species = sc.write_species_files(str(folder / "species"), nruns, ncells)
+    return {
+        "dev": str(folder / "dev"),
+        "baseline": str(folder / "baseline"),
+        "species": str(folder / "species"),
+        "probabilities": sc.write_paracousti_probabilities(
+            str(folder / "probabilities.csv"), names, species
+        ),
+        "threshold": sc.write_acoustic_threshold(str(folder / "threshold.csv")),
+    }
+
+
+@pytest.fixture(scope="session")
+def power_case(tmp_path_factory, nruns):
+    folder = tmp_path_factory.mktemp(f"power_{nruns}")
+    sc.write_power_case(str(folder / "power"), nruns)
+    return {
+        "power": str(folder / "power"),
+        "probabilities": sc.write_probabilities(
+            str(folder / "probabilities.csv"), nruns
+        ),
+    }
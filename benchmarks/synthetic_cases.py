@@ -0,0 +1,947 @@
+"""
+synthetic_cases.py: Deterministic synthetic SEAT input cases.
+
+Writes model runs in the layouts the modules read, at any size, so the
+benchmarks (and scale tests) do not depend on real model output:
+
+- Delft3D-style structured runs: one concatenated file per folder with
+  TAUMAX [run, time, M, N] on XZ/YZ and U1/V1 [run, time, layer, M, N] on
+  XCOR/YCOR, with the zero coordinate boundary Delft3D writes.
+- DFlow-FM-style unstructured runs: one <name>_<run>_map.nc file per run with
+  taus and ucxa/ucya [time, nFlowElem] on FlowElem_xcc/FlowElem_ycc. SCHISM
+  cases are read through the same variable names, so they are represented by
+  these files.
+- Paracousti runs: one file per run with totSPL [y, x, depth] on lon/lat.
+
+and the probabilities, receptor, species and power (.OUT/.pol) files that go
+with them. Fields are smooth tidal flows with a device wake (or sound sources
+at the devices), scaled per run and time step with a seeded random generator,
+so the same arguments always give the same files.
+
+write_case (and the command line) writes a complete case with the .ini input
+files to run it end to end with python -m seat:
+
+    python benchmarks/synthetic_cases.py <folder> --nodes 1000000 --runs 10 \
+        --timesteps 24 [--grid unstructured]
+    python -m seat <folder>/hydrodynamics.ini <folder>/acoustics_power.ini
+
+The hydrodynamic grids are in UTM and the paracousti and power files in
+lon/lat, so they are run from two input files with their own coordinate
+reference system.
+
+Dependencies:
+- numpy, pandas, netCDF4
+"""
+
+import argparse
+import configparser
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from numpy.typing import NDArray
+import pandas as pd
+from netCDF4 import Dataset  # pylint: disable=no-name-in-module
+
+# lower left corner of the structured and unstructured grids (UTM 10N metres)
+ORIGIN = (400000.0, 4950000.0)
+UTM_CRS = 32610
+# lower left corner of the paracousti grids (degrees)
+LONLAT_ORIGIN = (-124.35, 44.55)
+# tidal period in time steps
+TIDAL_PERIOD = 12.42
+
+
+def grid_shape(ncells: int) -> Tuple[int, int]:
+    """
+    Rows and columns of a near square grid with about ncells cells.
+
+    Parameters
+    ----------
+    ncells : int
+        number of cells.
+
+    Returns
+    -------
+    Tuple
+        rows, cols.
+    """
+    rows = max(int(np.sqrt(ncells)), 2)
+    return rows, max(int(np.ceil(ncells / rows)), 2)
+
+
+def structured_coordinates(
+    ncells: int, dx: float = 10.0
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Coordinates of a Delft3D-style structured grid, x along the first axis.
+
+    Parameters
+    ----------
+    ncells : int
+        number of cells.
+    dx : float, optional
+        cell size in metres. The default is 10.
+
+    Returns
+    -------
+    x : array
+        x-coordinates [M, N].
+    y : array
+        y-coordinates [M, N].
+    """
+    m, n = grid_shape(ncells)
+    return np.meshgrid(
+        ORIGIN[0] + dx * np.arange(m), ORIGIN[1] + dx * np.arange(n), indexing="ij"
+    )
+
+
+def unstructured_coordinates(
+    nnodes: int, dx: float = 10.0, seed: int = 0
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Cell centres of an unstructured mesh: a jittered grid in random order.
+
+    Parameters
+    ----------
+    nnodes : int
+        number of cells.
+    dx : float, optional
+        mean cell size in metres. The default is 10.
+    seed : int, optional
+        random seed. The default is 0.
+
+    Returns
+    -------
+    x : array
+        x-coordinates [nnodes].
+    y : array
+        y-coordinates [nnodes].
+    """
+    rng = np.random.default_rng(seed)
+    x, y = structured_coordinates(nnodes, dx)
+    x = x.ravel()[:nnodes] + rng.uniform(-0.3 * dx, 0.3 * dx, nnodes)
+    y = y.ravel()[:nnodes] + rng.uniform(-0.3 * dx, 0.3 * dx, nnodes)
+    order = rng.permutation(nnodes)
+    return x[order], y[order]
+
+
+def device_wake(x: NDArray[np.float64], y: NDArray[np.float64]) -> NDArray[np.float64]:
+    """
+    Velocity reduction factor of a device array at the centre of the domain.
+
+    Parameters
+    ----------
+    x : array
+        x-coordinates.
+    y : array
+        y-coordinates.
+
+    Returns
+    -------
+    array
+        factor between 0.6 (at the devices) and 1 (far field).
+    """
+    xc, yc = np.mean(x), np.mean(y)
+    sigma = 0.1 * max(np.ptp(x), np.ptp(y), 1.0)
+    return 1 - 0.4 * np.exp(-((x - xc) ** 2 + (y - yc) ** 2) / (2 * sigma**2))
+
+
+def flow_velocity(
+    x: NDArray[np.float64],
+    y: NDArray[np.float64],
+    run_scale: float,
+    time_step: int,
+    device: bool = False,
+) -> Tuple[NDArray[np.float32], NDArray[np.float32]]:
+    """
+    Tidal velocity of one run and time step.
+
+    Parameters
+    ----------
+    x : array
+        x-coordinates.
+    y : array
+        y-coordinates.
+    run_scale : float
+        velocity scale of the run (boundary condition).
+    time_step : int
+        time step.
+    device : bool, optional
+        True to include the device wake. The default is False.
+
+    Returns
+    -------
+    u : array
+        x-direction velocity [m/s].
+    v : array
+        y-direction velocity [m/s].
+    """
+    lx = max(np.ptp(x), 1.0)
+    ly = max(np.ptp(y), 1.0)
+    speed = 1 + 0.5 * np.sin(2 * np.pi * (x - x.min()) / lx) * np.cos(
+        2 * np.pi * (y - y.min()) / ly
+    )
+    speed = (
+        run_scale * speed * (0.2 + np.abs(np.sin(2 * np.pi * time_step / TIDAL_PERIOD)))
+    )
+    if device:
+        speed = speed * device_wake(x, y)
+    direction = 0.25 * np.pi + 0.1 * np.sin(2 * np.pi * (y - y.min()) / ly)
+    return (
+        (speed * np.cos(direction)).astype(np.float32),
+        (speed * np.sin(direction)).astype(np.float32),
+    )
+
+
+def bed_shear_stress(
+    u: NDArray[np.float32], v: NDArray[np.float32]
+) -> NDArray[np.float32]:
+    """Quadratic drag bed shear stress [Pa] of a velocity."""
+    return (1024 * 0.0025 * (u.astype(float) ** 2 + v**2)).astype(np.float32)
+
+
+def run_scales(nruns: int, seed: int = 0) -> NDArray[np.float64]:
+    """Velocity scale of each run (boundary condition)."""
+    return np.random.default_rng(seed).uniform(0.5, 1.5, nruns)
+
+
+def write_structured_case(
+    dev_folder: str,
+    nodev_folder: str,
+    ncells: int,
+    nruns: int = 2,
+    ntime: int = 4,
+    nlayers: int = 2,
+    dx: float = 10.0,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Writes Delft3D-style structured runs, one concatenated file per folder.
+
+    Parameters
+    ----------
+    dev_folder : str
+        folder for the with device file.
+    nodev_folder : str
+        folder for the no device file.
+    ncells : int
+        number of grid cells (including the zero boundary).
+    nruns : int, optional
+        number of runs. The default is 2.
+    ntime : int, optional
+        number of time steps per run. The default is 4.
+    nlayers : int, optional
+        number of velocity layers. The default is 2.
+    dx : float, optional
+        cell size in metres. The default is 10.
+    seed : int, optional
+        random seed. The default is 0.
+
+    Returns
+    -------
+    list
+        with device and no device file paths.
+    """
+    x, y = structured_coordinates(ncells, dx)
+    # Delft3D writes zero coordinates on the grid boundary
+    x_out, y_out = x.copy(), y.copy()
+    for coordinate in (x_out, y_out):
+        coordinate[[0, -1], :] = 0
+        coordinate[:, [0, -1]] = 0
+    scales = run_scales(nruns, seed)
+    filenames = []
+    for folder, device in ((dev_folder, True), (nodev_folder, False)):
+        os.makedirs(folder, exist_ok=True)
+        filename = os.path.join(
+            folder, f"trim_devices_{'present' if device else 'not_present'}.nc"
+        )
+        with Dataset(filename, "w") as nc:
+            nc.createDimension("run", nruns)
+            nc.createDimension("time", ntime)
+            nc.createDimension("KMAXOUT_RESTR", nlayers)
+            nc.createDimension("M", x.shape[0])
+            nc.createDimension("N", x.shape[1])
+            for name in ["XZ", "YZ", "XCOR", "YCOR"]:
+                var = nc.createVariable(name, "f8", ("M", "N"))
+                var[:] = x_out if name.startswith("X") else y_out
+            tau = nc.createVariable("TAUMAX", "f4", ("run", "time", "M", "N"))
+            tau.coordinates = "XZ YZ"
+            u_var = nc.createVariable(
+                "U1", "f4", ("run", "time", "KMAXOUT_RESTR", "M", "N")
+            )
+            v_var = nc.createVariable(
+                "V1", "f4", ("run", "time", "KMAXOUT_RESTR", "M", "N")
+            )
+            u_var.coordinates = "XCOR YCOR"
+            v_var.coordinates = "XCOR YCOR"
+            for run, scale in enumerate(scales):
+                for time_step in range(ntime):
+                    u, v = flow_velocity(x, y, scale, time_step, device)
+                    tau[run, time_step] = bed_shear_stress(u, v)
+                    for layer in range(nlayers):
+                        # slower towards the bed
+                        factor = (layer + 1) / nlayers
+                        u_var[run, time_step, layer] = factor * u
+                        v_var[run, time_step, layer] = factor * v
+        filenames.append(filename)
+    return filenames
+
+
+def write_unstructured_case(
+    dev_folder: str,
+    nodev_folder: str,
+    nnodes: int,
+    nruns: int = 2,
+    ntime: int = 4,
+    dx: float = 10.0,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Writes DFlow-FM-style unstructured runs, one <name>_<run>_map.nc file per
+    run and folder.
+
+    Parameters
+    ----------
+    dev_folder : str
+        folder for the with device files.
+    nodev_folder : str
+        folder for the no device files.
+    nnodes : int
+        number of flow elements.
+    nruns : int, optional
+        number of runs. The default is 2.
+    ntime : int, optional
+        number of time steps per run. The default is 4.
+    dx : float, optional
+        mean cell size in metres. The default is 10.
+    seed : int, optional
+        random seed. The default is 0.
+
+    Returns
+    -------
+    list
+        written file paths.
+    """
+    x, y = unstructured_coordinates(nnodes, dx, seed)
+    scales = run_scales(nruns, seed)
+    filenames = []
+    for folder, device in ((dev_folder, True), (nodev_folder, False)):
+        os.makedirs(folder, exist_ok=True)
+        prefix = "synthetic_dev" if device else "synthetic_nodev"
+        for run, scale in enumerate(scales):
+            filename = os.path.join(folder, f"{prefix}_{run + 1}_map.nc")
+            with Dataset(filename, "w") as nc:
+                nc.createDimension("time", ntime)
+                nc.createDimension("nFlowElem", nnodes)
+                nc.createVariable("FlowElem_xcc", "f8", ("nFlowElem",))[:] = x
+                nc.createVariable("FlowElem_ycc", "f8", ("nFlowElem",))[:] = y
+                variables = {
+                    name: nc.createVariable(name, "f4", ("time", "nFlowElem"))
+                    for name in ["taus", "ucxa", "ucya"]
+                }
+                for var in variables.values():
+                    var.coordinates = "FlowElem_xcc FlowElem_ycc"
+                for time_step in range(ntime):
+                    u, v = flow_velocity(x, y, scale, time_step, device)
+                    variables["taus"][time_step] = bed_shear_stress(u, v)
+                    variables["ucxa"][time_step] = u
+                    variables["ucya"][time_step] = v
+            filenames.append(filename)
+    return filenames
+
+
+def paracousti_coordinates(
+    ncells: int, dlon: float = 0.0005
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Longitude and latitude of a paracousti grid [y, x].
+
+    Parameters
+    ----------
+    ncells : int
+        number of horizontal cells.
+    dlon : float, optional
+        cell size in degrees. The default is 0.0005.
+
+    Returns
+    -------
+    lon : array
+        longitude [y, x].
+    lat : array
+        latitude [y, x].
+    """
+    ny, nx = grid_shape(ncells)
+    return np.meshgrid(
+        LONLAT_ORIGIN[0] + dlon * np.arange(nx), LONLAT_ORIGIN[1] + dlon * np.arange(ny)
+    )
+
+
+def sound_pressure_level(
+    lon: NDArray[np.float64],
+    lat: NDArray[np.float64],
+    ndepth: int,
+    run_scale: float,
+    device: bool = False,
+    seed: int = 0,
+) -> NDArray[np.float32]:
+    """
+    Sound pressure level [dB re 1uPa] of one run, ambient noise plus spherical
+    spreading from sources at the centre of the domain.
+
+    Parameters
+    ----------
+    lon : array
+        longitude [y, x].
+    lat : array
+        latitude [y, x].
+    ndepth : int
+        number of depth bins.
+    run_scale : float
+        scale of the run (source level and ambient noise).
+    device : bool, optional
+        True to include the device sources. The default is False.
+    seed : int, optional
+        random seed of the ambient noise. The default is 0.
+
+    Returns
+    -------
+    array
+        sound pressure level [y, x, depth].
+    """
+    rng = np.random.default_rng(seed)
+    ambient = 100 + 10 * run_scale + rng.normal(0, 1, lon.shape + (ndepth,))
+    if not device:
+        return ambient.astype(np.float32)
+    # distance in metres from the centre of the domain
+    distance = 111e3 * np.hypot(
+        (lon - lon.mean()) * np.cos(np.radians(lat.mean())), lat - lat.mean()
+    )
+    depths = 5 + 10 * np.arange(ndepth)
+    source = (
+        170
+        + 10 * run_scale
+        - 20 * np.log10(np.hypot(distance[..., np.newaxis], depths) + 1)
+    )
+    return (10 * np.log10(10 ** (ambient / 10) + 10 ** (source / 10))).astype(
+        np.float32
+    )
+
+
+def write_paracousti_case(
+    dev_folder: str,
+    nodev_folder: str,
+    ncells: int,
+    nruns: int = 2,
+    ndepth: int = 4,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Writes paracousti runs, one file per run and folder with the same name in
+    both folders.
+
+    Parameters
+    ----------
+    dev_folder : str
+        folder for the with device files.
+    nodev_folder : str
+        folder for the baseline files.
+    ncells : int
+        number of horizontal cells.
+    nruns : int, optional
+        number of runs. The default is 2.
+    ndepth : int, optional
+        number of depth bins. The default is 4.
+    seed : int, optional
+        random seed. The default is 0.
+
+    Returns
+    -------
+    list
+        file names (without folder) of the runs.
+    """
+    lon, lat = paracousti_coordinates(ncells)
+    scales = run_scales(nruns, seed)
+    names = [f"paracousti_{run + 1:03d}.nc" for run in range(nruns)]
+    for folder, device in ((dev_folder, True), (nodev_folder, False)):
+        os.makedirs(folder, exist_ok=True)
+        for run, (name, scale) in enumerate(zip(names, scales)):
+            with Dataset(os.path.join(folder, name), "w") as nc:
+                nc.createDimension("y", lon.shape[0])
+                nc.createDimension("x", lon.shape[1])
+                nc.createDimension("depth", ndepth)
+                lon_var = nc.createVariable("lon", "f8", ("y", "x"))
+                lon_var.units = "degrees_east"
+                lon_var[:] = lon
+                lat_var = nc.createVariable("lat", "f8", ("y", "x"))
+                lat_var.units = "degrees_north"
+                lat_var[:] = lat
+                spl = nc.createVariable("totSPL", "f4", ("y", "x", "depth"))
+                spl.coordinates = "lon lat"
+                spl.units = "dB re 1uPa"
+                spl[:] = sound_pressure_level(
+                    lon, lat, ndepth, scale, device, seed=seed + run
+                )
+    return names
+
+
+def write_probabilities(filename: str, nruns: int, seed: int = 0) -> str:
+    """
+    Writes a hydrodynamic probabilities file for runs numbered 1 to nruns.
+
+    Parameters
+    ----------
+    filename : str
+        csv file path.
+    nruns : int
+        number of runs.
+    seed : int, optional
+        random seed. The default is 0.
+
+    Returns
+    -------
+    str
+        filename.
+    """
+    rng = np.random.default_rng(seed)
+    percent = rng.uniform(0.5, 1.5, nruns)
+    pd.DataFrame(
+        {
+            "Hs [m]": np.round(rng.uniform(1, 7, nruns), 2),
+            "Tp [s]": np.round(rng.uniform(6, 16, nruns), 2),
+            "Dp [deg]": np.round(rng.uniform(200, 260, nruns), 1),
+            "% of dir bin": np.round(100 * percent / percent.sum(), 3),
+            "% of yr": np.round(100 * percent / percent.sum(), 3),
+            "run number": np.arange(1, nruns + 1),
+            "Exclude": "",
+        }
+    ).to_csv(filename, index=False)
+    return filename
+
+
+def write_paracousti_probabilities(
+    filename: str,
+    paracousti_files: List[str],
+    species_files: Optional[List[str]] = None,
+) -> str:
+    """
+    Writes a paracousti probabilities file.
+
+    Parameters
+    ----------
+    filename : str
+        csv file path.
+    paracousti_files : list
+        paracousti file names.
+    species_files : list, optional
+        species file name of each paracousti file, used for both the percent
+        and density files. The default is None.
+
+    Returns
+    -------
+    str
+        filename.
+    """
+    probabilities = pd.DataFrame({"Paracousti File": paracousti_files})
+    if species_files is not None:
+        probabilities["Species Percent Occurance File"] = species_files
+        probabilities["Species Density File"] = species_files
+    probabilities["% of yr"] = np.round(100 / len(paracousti_files), 3)
+    probabilities.to_csv(filename, index=False)
+    return filename
+
+
+def write_receptor_value(filename: str, name: str, value: float) -> str:
+    """
+    Writes a single value receptor file, e.g. 'grain size (microns)' or
+    'critical_velocity (m/s)'.
+
+    Parameters
+    ----------
+    filename : str
+        csv file path.
+    name : str
+        receptor name.
+    value : float
+        receptor value.
+
+    Returns
+    -------
+    str
+        filename.
+    """
+    with open(filename, "w", encoding="utf-8") as csv_file:
+        csv_file.write(f"{name},{value}\n")
+    return filename
+
+
+def write_acoustic_threshold(
+    filename: str, threshold: float = 160.0, averaged_area: float = 0.0
+) -> str:
+    """
+    Writes a paracousti species threshold file for totSPL.
+
+    Parameters
+    ----------
+    filename : str
+        csv file path.
+    threshold : float, optional
+        threshold [dB re 1uPa]. The default is 160.
+    averaged_area : float, optional
+        species file averaged area [km2], 0 for no scaling. The default is 0.
+
+    Returns
+    -------
+    str
+        filename.
+    """
+    with open(filename, "w", encoding="utf-8") as csv_file:
+        csv_file.write("species,Synthetic Whale\n")
+        csv_file.write("Paracousti Variable,totSPL\n")
+        csv_file.write(f"Threshold (dB re 1uPa),{threshold}\n")
+        csv_file.write("Depth Averaging,Depth Maximum\n")
+        csv_file.write(f"species file averaged area (km2),{averaged_area}\n")
+    return filename
+
+
+def write_species_files(
+    folder: str, nruns: int, ncells: int, seed: int = 0
+) -> List[str]:
+    """
+    Writes species percent and density csv files on a coarse grid covering the
+    paracousti grid, one per run.
+
+    Parameters
+    ----------
+    folder : str
+        species folder.
+    nruns : int
+        number of runs.
+    ncells : int
+        number of paracousti cells (sets the extent).
+    seed : int, optional
+        random seed. The default is 0.
+
+    Returns
+    -------
+    list
+        species file names (without folder).
+    """
+    os.makedirs(folder, exist_ok=True)
+    lon, lat = paracousti_coordinates(ncells)
+    lon, lat = lon[::10, ::10].ravel(), lat[::10, ::10].ravel()
+    rng = np.random.default_rng(seed)
+    names = []
+    for run in range(nruns):
+        name = f"species_{run + 1:03d}.csv"
+        pd.DataFrame(
+            {
+                "latitude": lat,
+                "longitude": lon,
+                "percent": rng.uniform(0, 10, lon.size),
+                "density": rng.uniform(0, 1, lon.size),
+            }
+        ).to_csv(os.path.join(folder, name), index=False)
+        names.append(name)
+    return names
+
+
+def write_power_case(
+    folder: str, nruns: int, ndevices: int = 16, seed: int = 0
+) -> List[str]:
+    """
+    Writes power files: one POWER_ABS_<run>.OUT file per run and a .pol file
+    with the two crossing obstacles of each device.
+
+    Parameters
+    ----------
+    folder : str
+        power files folder.
+    nruns : int
+        number of runs.
+    ndevices : int, optional
+        number of devices, laid out on a grid. The default is 16.
+    seed : int, optional
+        random seed. The default is 0.
+
+    Returns
+    -------
+    list
+        .OUT file names (without folder), in run order.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rows, cols = grid_shape(ndevices)
+    half = 0.000225
+    with open(os.path.join(folder, "synthetic.pol"), "w", encoding="utf-8") as pol:
+        obstacle = 1
+        for device in range(ndevices):
+            # unequal spacing in x and y so only the crossing obstacles pair
+            xc = 235.7664 + 0.0032 * (device % cols)
+            yc = 44.56 + 0.0021 * (device // cols)
+            for x, y in (
+                ([xc - half, xc + half], [yc, yc]),
+                ([xc, xc], [yc - half, yc + half]),
+            ):
+                pol.write(f"Obstacle {obstacle}\n2 2\n")
+                for xi, yi in zip(x, y):
+                    pol.write(f"{xi:.5f} {yi:.5f}\n")
+                obstacle += 1
+    rng = np.random.default_rng(seed)
+    scales = run_scales(nruns, seed)
+    names = []
+    for run, scale in enumerate(scales):
+        name = f"POWER_ABS_{run + 1:03d}.OUT"
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as out:
+            # the last iteration is the converged one
+            for iteration in range(1, 4):
+                out.write(f"Iteration: {iteration:7d}\n")
+                power = scale**3 * rng.uniform(1e5, 3.5e5, 2 * ndevices)
+                for ic, value in enumerate(power):
+                    out.write(
+                        f"Power absorbed by obstacle {ic + 1:3d} = {value:15.8E} W\n"
+                    )
+        names.append(name)
+    return names
+
+
+def write_input_file(filename: str, inputs: Dict[str, str], output_path: str) -> str:
+    """
+    Writes a SEAT input file (as saved by the plugin) with the given inputs.
+
+    Parameters
+    ----------
+    filename : str
+        .ini file path.
+    inputs : Dict
+        key = option of the [Input] section, val = value.
+    output_path : str
+        output filepath of the [Output] section.
+
+    Returns
+    -------
+    str
+        filename.
+    """
+    config = configparser.ConfigParser()
+    config["Input"] = inputs
+    config["Output"] = {"output filepath": output_path}
+    with open(filename, "w", encoding="utf-8") as ini_file:
+        config.write(ini_file)
+    return filename
+
+
+def write_case(
+    folder: str,
+    nodes: int,
+    nruns: int = 2,
+    ntime: int = 4,
+    grid: str = "structured",
+    nlayers: int = 2,
+    ndepth: int = 4,
+    ndevices: int = 16,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Writes a complete synthetic case and its input files:
+
+        hydrodynamics/devices-present, hydrodynamics/devices-not-present
+        hydrodynamics/probabilities.csv, grain_size.csv, critical_velocity.csv
+        paracousti/devices-present, paracousti/baseline, paracousti/species
+        paracousti/probabilities.csv, paracousti/threshold.csv
+        power/ (.OUT and .pol files)
+        hydrodynamics.ini, acoustics_power.ini (output to <folder>/output)
+
+    Parameters
+    ----------
+    folder : str
+        case folder.
+    nodes : int
+        number of grid cells of the hydrodynamic and paracousti grids.
+    nruns : int, optional
+        number of model runs. The default is 2.
+    ntime : int, optional
+        number of time steps per hydrodynamic run. The default is 4.
+    grid : str, optional
+        "structured" (Delft3D) or "unstructured" (DFlow-FM). The default is
+        "structured".
+    nlayers : int, optional
+        number of structured velocity layers. The default is 2.
+    ndepth : int, optional
+        number of paracousti depth bins. The default is 4.
+    ndevices : int, optional
+        number of power devices. The default is 16.
+    seed : int, optional
+        random seed. The default is 0.
+
+    Raises
+    ------
+    ValueError
+        if grid is not "structured" or "unstructured".
+
+    Returns
+    -------
+    list
+        the two .ini file paths.
+    """
+    hydro = os.path.join(folder, "hydrodynamics")
+    dev, nodev = (
+        os.path.join(hydro, "devices-present"),
+        os.path.join(hydro, "devices-not-present"),
+    )
+    if grid == "structured":
+        write_structured_case(dev, nodev, nodes, nruns, ntime, nlayers, seed=seed)
+    elif grid == "unstructured":
+        write_unstructured_case(dev, nodev, nodes, nruns, ntime, seed=seed)
+    else:
+        raise ValueError(f"Unknown grid {grid}, must be structured or unstructured")
+    probabilities = write_probabilities(
+        os.path.join(hydro, "probabilities.csv"), nruns, seed
+    )
+
+    paracousti = os.path.join(folder, "paracousti")
+    names = write_paracousti_case(
+        os.path.join(paracousti, "devices-present"),
+        os.path.join(paracousti, "baseline"),
+        nodes,
+        nruns,
+        ndepth,
+        seed,
+    )
+    species = write_species_files(
+        os.path.join(paracousti, "species"), nruns, nodes, seed
+    )
+    write_power_case(os.path.join(folder, "power"), nruns, ndevices, seed)
+
+    output_path = os.path.join(folder, "output")
+    hydro_inputs = {
+        "shear stress device present filepath": dev,
+        "shear stress device not present filepath": nodev,
+        "shear stress averaging": "Maximum",
+        "shear stress probabilities file": probabilities,
+        "shear stress grain size file": write_receptor_value(
+            os.path.join(hydro, "grain_size.csv"), "grain size (microns)", 250
+        ),
+        "velocity device present filepath": dev,
+        "velocity device not present filepath": nodev,
+        "velocity averaging": "Maximum",
+        "velocity probabilities file": probabilities,
+        "velocity threshold file": write_receptor_value(
+            os.path.join(hydro, "critical_velocity.csv"),
+            "critical_velocity (m/s)",
+            0.05,
+        ),
+        "coordinate reference system": str(UTM_CRS),
+    }
+    acoustics_power_inputs = {
+        "paracousti device present filepath": os.path.join(
+            paracousti, "devices-present"
+        ),
+        "paracousti device not present filepath": os.path.join(paracousti, "baseline"),
+        "paracousti averaging": "Depth Maximum",
+        "paracousti probabilities file": write_paracousti_probabilities(
+            os.path.join(paracousti, "probabilities.csv"), names, species
+        ),
+        "paracousti threshold file": write_acoustic_threshold(
+            os.path.join(paracousti, "threshold.csv")
+        ),
+        "paracousti species filepath": os.path.join(paracousti, "species"),
+        "power files filepath": os.path.join(folder, "power"),
+        "power probabilities file": probabilities,
+        "coordinate reference system": "4326",
+    }
+    return [
+        write_input_file(
+            os.path.join(folder, "hydrodynamics.ini"), hydro_inputs, output_path
+        ),
+        write_input_file(
+            os.path.join(folder, "acoustics_power.ini"),
+            acoustics_power_inputs,
+            output_path,
+        ),
+    ]
+
+
+def folder_size_mb(folder: str) -> float:
+    """Total size of the files in a folder, in megabytes."""
+    return (
+        sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(folder)
+            for name in names
+        )
+        / 1024**2
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point, writes a synthetic case.
+
+    Parameters
+    ----------
+    argv : list, optional
+        command line arguments. The default is None (sys.argv).
+
+    Returns
+    -------
+    int
+        exit status.
+    """
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic SEAT case for scale testing.",
+    )
+    parser.add_argument("folder", help="case folder")
+    parser.add_argument(
+        "--nodes",
+        type=lambda value: int(float(value)),
+        default=10000,
+        help="grid cells of the hydrodynamic and paracousti grids (default 10000)",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=2, help="number of model runs (default 2)"
+    )
+    parser.add_argument(
+        "--timesteps",
+        type=int,
+        default=4,
+        help="time steps per hydrodynamic run (default 4)",
+    )
+    parser.add_argument(
+        "--grid",
+        default="structured",
+        choices=["structured", "unstructured"],
+        help="Delft3D structured or DFlow-FM unstructured runs (default structured)",
+    )
+    parser.add_argument(
+        "--layers", type=int, default=2, help="structured velocity layers (default 2)"
+    )
+    parser.add_argument(
+        "--depths", type=int, default=4, help="paracousti depth bins (default 4)"
+    )
+    parser.add_argument(
+        "--devices", type=int, default=16, help="power devices (default 16)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    args = parser.parse_args(argv)
+    for name in ["nodes", "runs", "timesteps", "layers", "depths", "devices"]:
+        if getattr(args, name) < 1:
+            parser.error(f"--{name} must be at least 1")
+
+    ini_files = write_case(
+        args.folder,
+        args.nodes,
+        nruns=args.runs,
+        ntime=args.timesteps,
+        grid=args.grid,
+        nlayers=args.layers,
+        ndepth=args.depths,
+        ndevices=args.devices,
+        seed=args.seed,
+    )
+    print(f"Wrote {folder_size_mb(args.folder):.1f} MB to {args.folder}")
+    print(f"Run with: python -m seat {' '.join(ini_files)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+Runs SEAT from the command line without QGIS, see seat/modules/batch.py.
+
+    python -m seat scenario.ini
+"""
+
+import sys
+from seat.modules.batch import main
+
+sys.exit(main())
@@ -25,14 +25,24 @@ from netCDF4 import Dataset
 import pandas as pd
 from osgeo import gdal, osr
 import numpy as np
+from .run_timer import RunTimer
 from .stressor_utils import (
     redefine_structured_grid,
     create_raster,
     numpy_array_to_raster,
+    convert_to_cog,
+    layer_overview_resampling,
+    write_result_bundle,
+    report_progress,
+    scale_progress,
+    raster_from_array,
+    GridGeometry,
     calculate_cell_area,
     resample_structured_grid,
-    bin_layer,
+    bin_raster,
     secondary_constraint_geotiff_to_numpy,
+    map_runs,
+    read_raster_window,
 )
 
 
@@ -68,19 +78,11 @@ def create_species_array(species_filename, x, y, variable="percent", latlon=Fals
     if not ((species_filename is None) or (species_filename == "")):
         if species_filename.endswith(".tif"):
             data = gdal.Open(species_filename)
-            img = data.GetRasterBand(1)
-            receptor_array = img.ReadAsArray()
-            receptor_array[receptor_array < 0] = 0
-            (upper_left_x, x_size, x_rotation, upper_left_y, y_rotation, y_size) = (
-                data.GetGeoTransform()
+            x_grid, y_grid, receptor_array = read_raster_window(
+                data, x, y, latlon=latlon == True
             )
-            cols = data.RasterXSize
-            rows = data.RasterYSize
-            r_rows = np.arange(rows) * y_size + upper_left_y + (y_size / 2)
-            r_cols = np.arange(cols) * x_size + upper_left_x + (x_size / 2)
-            if latlon == True:
-                r_cols = np.where(r_cols < 0, r_cols + 360, r_cols)
-            x_grid, y_grid = np.meshgrid(r_cols, r_rows)
+            data = None
+            receptor_array[receptor_array < 0] = 0
             variable_array = griddata(
                 (x_grid.flatten(), y_grid.flatten()),
                 receptor_array.flatten(),
@@ -107,6 +109,65 @@ def create_species_array(species_filename, x, y, variable="percent", latlon=Fals
     return variable_array
 
 
+def read_depth_reduced(ds, variable, Averaging=None):
+    """
+    Reads a paracousti variable and reduces it over depth, reading only the
+    needed depth bin from disk for "Bottom Bin" and "Top Bin".
+
+    Parameters
+    ----------
+    ds : netCDF4 Dataset
+        open paracousti file.
+    variable : str
+        name of the paracousti variable.
+    Averaging : str, optional
+        depth reduction ("Depth Maximum", "Depth Average", "Bottom Bin" or
+        "Top Bin"). The default is None (Depth Maximum).
+
+    Returns
+    -------
+    acoust_var : array
+        depth reduced variable [x, y].
+
+    """
+    var = ds.variables[variable]
+    cords = var.coordinates.split()
+    # variable is either [x, y, depth] or [depth, x, y]
+    depth_axis = 2 if ds.variables[cords[0]].shape[0] == var.shape[0] else 0
+    if Averaging in ["Bottom Bin", "Top Bin"]:
+        depth_index = var.shape[depth_axis] - 1 if Averaging == "Bottom Bin" else 0
+        index = [slice(None)] * var.ndim
+        index[depth_axis] = depth_index
+        return var[tuple(index)].data
+    acoust_var = var[:].data
+    if Averaging == "Depth Average":
+        return np.nanmean(acoust_var, axis=depth_axis)
+    return np.nanmax(acoust_var, axis=depth_axis)  # Depth Maximum (default)
+
+
+def read_depth_reduced_file(filename, variable, Averaging=None):
+    """
+    Opens a paracousti file and reads the depth reduced variable.
+
+    Parameters
+    ----------
+    filename : str
+        File path to the paracousti netcdf file.
+    variable : str
+        name of the paracousti variable.
+    Averaging : str, optional
+        depth reduction, see read_depth_reduced. The default is None.
+
+    Returns
+    -------
+    acoust_var : array
+        depth reduced variable [x, y].
+
+    """
+    with Dataset(filename) as ds:
+        return read_depth_reduced(ds, variable, Averaging)
+
+
 def calculate_acoustic_stressors(
     fpath_dev,
     probabilities_file,
@@ -115,6 +176,9 @@ def calculate_acoustic_stressors(
     species_folder=None,  # secondary constraint
     latlon=True,
     Averaging=None,
+    max_workers=1,
+    use_processes=False,
+    progress_callback=None,
 ):
     """
     Calculates the stressor layers as arrays from model and parameter input.
@@ -133,6 +197,18 @@ def calculate_acoustic_stressors(
         Directory path to the species files in the probabilities_file. The default is None.
     latlon : Bool, optional
         True is coordinates are lat/lon. The default is True.
+    Averaging : str, optional
+        depth reduction ("Depth Maximum", "Depth Average", "Bottom Bin" or
+        "Top Bin"). The default is None (Depth Maximum).
+    max_workers : int, optional
+        number of paracousti files read concurrently. The default is 1.
+    use_processes : bool, optional
+        True to read files in a process pool, False for a thread pool.
+        The default is False.
+    progress_callback : callable, optional
+        called with the stage name and the fraction completed before each
+        paracousti file is read and regridded, can raise RunCancelled to stop
+        the calculation. The default is None.
 
     Returns
     -------
@@ -186,32 +262,30 @@ def calculate_acoustic_stressors(
     # Averaging = receptor['Depth Averaging'].values.item()
     variable = receptor["Paracousti Variable"].values.item()
 
-    for ic, paracousti_file in enumerate(paracousti_files):
-        with Dataset(paracousti_file) as ds:
-            # ds = Dataset(paracousti_file)
-            acoust_var = ds.variables[variable][:].data
-            cords = ds.variables[variable].coordinates.split()
-            X = ds.variables[cords[0]][:].data
-            Y = ds.variables[cords[1]][:].data
-            if X.shape[0] != acoust_var.shape[0]:
-                acoust_var = np.transpose(acoust_var, (1, 2, 0))
-            if ic == 0:
-                xunits = ds.variables[cords[0]].units
-                if "degrees" in xunits:
-                    latlon = True
-                    XCOR = np.where(X < 0, X + 360, X)
-                else:
-                    XCOR = X
-                YCOR = Y
-                ACOUST_VAR = np.zeros(
-                    (
-                        len(paracousti_files),
-                        np.shape(acoust_var)[0],
-                        np.shape(acoust_var)[1],
-                        np.shape(acoust_var)[2],
-                    )
-                )
-            ACOUST_VAR[ic, :] = acoust_var
+    # reduce each file over depth as it is read so the [file, x, y, depth]
+    # stack is never held in memory
+    with Dataset(paracousti_files[0]) as ds:
+        cords = ds.variables[variable].coordinates.split()
+        X = ds.variables[cords[0]][:].data
+        Y = ds.variables[cords[1]][:].data
+        xunits = ds.variables[cords[0]].units
+    if "degrees" in xunits:
+        latlon = True
+        XCOR = np.where(X < 0, X + 360, X)
+    else:
+        XCOR = X
+    YCOR = Y
+    ACOUST_VAR = np.array(
+        list(
+            map_runs(
+                read_depth_reduced_file,
+                [(i, variable, Averaging) for i in paracousti_files],
+                max_workers=max_workers,
+                use_processes=use_processes,
+                progress_callback=scale_progress(progress_callback, 0.0, 0.4),
+            )
+        )
+    )
 
     if not (
         (fpath_nodev is None) or (fpath_nodev == "")
@@ -223,43 +297,26 @@ def calculate_acoustic_stressors(
             for i in os.listdir(fpath_nodev)
             if i.endswith(".nc")
         ]
-        for ic, baseline_file in enumerate(baseline_files):
-            with Dataset(baseline_file) as ds:
-                # ds = Dataset(baseline_file)
-                baseline = ds.variables[variable][:].data
-                cords = ds.variables[variable].coordinates.split()
-                if ds.variables[cords[0]][:].data.shape[0] != baseline.shape[0]:
-                    baseline = np.transpose(baseline, (1, 2, 0))
-                if ic == 0:
-                    Baseline = np.zeros(
-                        (
-                            len(baseline_files),
-                            np.shape(baseline)[0],
-                            np.shape(baseline)[1],
-                            np.shape(baseline)[2],
-                        )
-                    )
-                Baseline[ic, :] = baseline
+        Baseline = np.array(
+            list(
+                map_runs(
+                    read_depth_reduced_file,
+                    [(i, variable, Averaging) for i in baseline_files],
+                    max_workers=max_workers,
+                    use_processes=use_processes,
+                    progress_callback=scale_progress(progress_callback, 0.4, 0.6),
+                )
+            )
+        )
     else:
         Baseline = np.zeros(ACOUST_VAR.shape)
 
-    if Averaging == "Depth Maximum":
-        ACOUST_VAR = np.nanmax(ACOUST_VAR, axis=3)
-        Baseline = np.nanmax(Baseline, axis=3)
-    elif Averaging == "Depth Average":
-        ACOUST_VAR = np.nanmean(ACOUST_VAR, axis=3)
-        Baseline = np.nanmean(Baseline, axis=3)
-    elif Averaging == "Bottom Bin":
-        ACOUST_VAR = ACOUST_VAR[:, :, -1]
-        Baseline = Baseline[:, :, -1]
-    elif Averaging == "Top Bin":
-        ACOUST_VAR = ACOUST_VAR[:, :, 0]
-        Baseline = Baseline[:, :, 0]
-    else:
-        ACOUST_VAR = np.nanmax(ACOUST_VAR, axis=3)
-        Baseline = np.nanmax(Baseline, axis=3)
-
     for ic, file in enumerate(paracousti_files):
+        report_progress(
+            progress_callback,
+            f"regridding {os.path.basename(file)}",
+            0.6 + 0.4 * ic / len(paracousti_files),
+        )
         # paracousti files might not have regular grid spacing.
         rx, ry, acoust_var = redefine_structured_grid(XCOR, YCOR, ACOUST_VAR[ic, :])
         baseline = resample_structured_grid(XCOR, YCOR, Baseline[ic, :], rx, ry)
@@ -283,12 +340,12 @@ def calculate_acoustic_stressors(
                 raise FileNotFoundError(
                     f"The directory {species_folder} does not exist."
                 )
-            species_percent_filename = boundary_conditions.loc[
-                os.path.basename(paracousti_file)
-            ]["Species Percent Occurance File"]
-            species_density_filename = boundary_conditions.loc[
-                os.path.basename(paracousti_file)
-            ]["Species Density File"]
+            species_percent_filename = boundary_conditions.loc[os.path.basename(file)][
+                "Species Percent Occurance File"
+            ]
+            species_density_filename = boundary_conditions.loc[os.path.basename(file)][
+                "Species Density File"
+            ]
             parray = create_species_array(
                 os.path.join(species_folder, species_percent_filename),
                 rx,
@@ -344,6 +401,14 @@ def run_acoustics_stressor(
     species_folder=None,
     Averaging=None,
     secondary_constraint_filename=None,
+    max_workers=1,
+    use_processes=False,
+    raster_profile="default",
+    approx_stats=False,
+    cog=False,
+    overview_resampling=None,
+    output_format="gtiff",
+    progress_callback=None,
 ):
     """
 
@@ -364,7 +429,37 @@ def run_acoustics_stressor(
         File path to the recetptor file (*.csv or *.tif).
     species_folder : str, optional
         Directory path to the species files in the probabilities_file. The default is None.
-
+    Averaging : str, optional
+        depth reduction ("Depth Maximum", "Depth Average", "Bottom Bin" or
+        "Top Bin"). The default is None (Depth Maximum).
+    secondary_constraint_filename: str, optional
+        File path to the secondary constraint file (*.tif). The default is None.
+    max_workers : int, optional
+        number of paracousti files read concurrently. The default is 1.
+    use_processes : bool, optional
+        True to read files in a process pool, False for a thread pool.
+        The default is False.
+    raster_profile : str or list, optional
+        GeoTIFF output profile ('default', 'tiled', 'deflate' or 'zstd') or
+        list of GTiff creation options. The default is 'default'.
+    approx_stats : bool, optional
+        True to compute approximate raster statistics. The default is False.
+    cog : bool, optional
+        True to write Cloud-Optimized GeoTIFFs with internal overviews. The
+        default is False.
+    overview_resampling : dict, optional
+        key = output raster name, val = overview resampling method. The
+        default is None (nearest for classified layers, average otherwise).
+    output_format : str, optional
+        'gtiff' for one geotiff per output, 'multiband' for one multi-band
+        geotiff (paracousti.tif) or 'netcdf' for one compressed
+        CF-NetCDF (paracousti.nc). The default is 'gtiff'.
+    progress_callback : callable, optional
+        called with the stage name and the fraction of the run completed at
+        the start of each step ('file loading', each 'run file i of n' and
+        'regridding' each paracousti file, 'raster writing' each raster,
+        'statistics' each table and 'done'), can raise RunCancelled to stop
+        the run. The default is None.
 
     Returns
     -------
@@ -382,182 +477,273 @@ def run_acoustics_stressor(
     os.makedirs(
         output_path, exist_ok=True
     )  # create output directory if it doesn't exist
+    timer = RunTimer("acoustics", progress_callback)
+    try:
+        report_progress(timer, "file loading", 0.0)
+
+        dict_of_arrays, rx, ry, dx, dy = calculate_acoustic_stressors(
+            fpath_dev=dev_present_file,
+            probabilities_file=probabilities_file,
+            receptor_filename=receptor_filename,
+            fpath_nodev=dev_notpresent_file,
+            species_folder=species_folder,
+            latlon=crs == 4326,
+            Averaging=Averaging,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            progress_callback=scale_progress(timer, 0.0, 0.5),
+        )
 
-    dict_of_arrays, rx, ry, dx, dy = calculate_acoustic_stressors(
-        fpath_dev=dev_present_file,
-        probabilities_file=probabilities_file,
-        receptor_filename=receptor_filename,
-        fpath_nodev=dev_notpresent_file,
-        species_folder=species_folder,
-        latlon=crs == 4326,
-        Averaging=Averaging,
-    )
-
-    if not ((species_folder is None) or (species_folder == "")):
-        use_numpy_arrays = [
-            "paracousti_without_devices",
-            "paracousti_with_devices",
-            "paracousti_stressor",
-            "species_threshold_exceeded",
-            "species_percent",
-            "species_density",
-        ]
-    else:
-        use_numpy_arrays = [
-            "paracousti_without_devices" "paracousti_with_devices",
-            "paracousti_stressor",
-            "species_threshold_exceeded",
-        ]
+        if not ((species_folder is None) or (species_folder == "")):
+            use_numpy_arrays = [
+                "paracousti_without_devices",
+                "paracousti_with_devices",
+                "paracousti_stressor",
+                "species_threshold_exceeded",
+                "species_percent",
+                "species_density",
+            ]
+        else:
+            use_numpy_arrays = [
+                "paracousti_without_devices",
+                "paracousti_with_devices",
+                "paracousti_stressor",
+                "species_threshold_exceeded",
+            ]
 
-    if not (
-        (secondary_constraint_filename is None) or (secondary_constraint_filename == "")
-    ):
-        if not os.path.exists(secondary_constraint_filename):
-            raise FileNotFoundError(
-                f"The file {secondary_constraint_filename} does not exist."
+        if not (
+            (secondary_constraint_filename is None)
+            or (secondary_constraint_filename == "")
+        ):
+            if not os.path.exists(secondary_constraint_filename):
+                raise FileNotFoundError(
+                    f"The file {secondary_constraint_filename} does not exist."
+                )
+            rrx, rry, constraint = secondary_constraint_geotiff_to_numpy(
+                secondary_constraint_filename, rx, ry
             )
-        rrx, rry, constraint = secondary_constraint_geotiff_to_numpy(
-            secondary_constraint_filename
-        )
-        dict_of_arrays["paracousti_risk_layer"] = resample_structured_grid(
-            rrx, rry, constraint, rx, ry, interpmethod="nearest"
-        )
-        use_numpy_arrays.append("paracousti_risk_layer")
-
-    numpy_array_names = [i + ".tif" for i in use_numpy_arrays]
-
-    output_rasters = []
-    for array_name, use_numpy_array in zip(numpy_array_names, use_numpy_arrays):
-        numpy_array = np.flip(dict_of_arrays[use_numpy_array], axis=0)
-        cell_resolution = [dx, dy]
-        # output_rasters = []
-        # for array_name, use_numpy_array in zip(numpy_array_names, use_numpy_arrays):
-        # numpy_array = np.flip(numpy_array, axis=0)
-        # cell_resolution = [dx, dy]
-        if crs == 4326:
-            rxx = np.where(rx > 180, rx - 360, rx)
-            bounds = [rxx.min() - dx / 2, ry.max() - dy / 2]
-        else:
-            bounds = [rx.min() - dx / 2, ry.max() - dy / 2]
-        rows, cols = numpy_array.shape
-        # create an ouput raster given the stressor file path
-        output_rasters.append(os.path.join(output_path, array_name))
-        output_raster = create_raster(
-            os.path.join(output_path, array_name), cols, rows, nbands=1
-        )
+            report_progress(timer, "regridding paracousti_risk_layer", 0.5)
+            dict_of_arrays["paracousti_risk_layer"] = resample_structured_grid(
+                rrx, rry, constraint, rx, ry, interpmethod="nearest"
+            )
+            use_numpy_arrays.append("paracousti_risk_layer")
 
-        # post processing of numpy array to output raster
-        numpy_array_to_raster(
-            output_raster,
-            numpy_array,
-            bounds,
-            cell_resolution,
-            crs,
-            os.path.join(output_path, array_name),
-        )
-        output_raster = None
+        numpy_array_names = [i + ".tif" for i in use_numpy_arrays]
 
-    # Area calculations
-    # ParAcousti Area
+        output_rasters = []
+        rasters = {}  # arrays as stored in the rasters, for the area calculations
+        bundle_arrays = {}
+        for ic, (array_name, use_numpy_array) in enumerate(
+            zip(numpy_array_names, use_numpy_arrays)
+        ):
+            numpy_array = np.flip(dict_of_arrays[use_numpy_array], axis=0)
+            cell_resolution = [dx, dy]
+            # output_rasters = []
+            # for array_name, use_numpy_array in zip(numpy_array_names, use_numpy_arrays):
+            # numpy_array = np.flip(numpy_array, axis=0)
+            # cell_resolution = [dx, dy]
+            if crs == 4326:
+                rxx = np.where(rx > 180, rx - 360, rx)
+                bounds = [rxx.min() - dx / 2, ry.max() - dy / 2]
+            else:
+                bounds = [rx.min() - dx / 2, ry.max() - dy / 2]
+            rows, cols = numpy_array.shape
+            rasters[use_numpy_array] = raster_from_array(
+                numpy_array, bounds, cell_resolution
+            )
+            if output_format != "gtiff":
+                # written together after the loop
+                bundle_arrays[use_numpy_array] = numpy_array
+                continue
+            report_progress(
+                timer,
+                f"raster writing {use_numpy_array}",
+                0.6 + 0.2 * ic / len(numpy_array_names),
+            )
+            # create an ouput raster given the stressor file path
+            output_rasters.append(os.path.join(output_path, array_name))
+            output_raster = create_raster(
+                os.path.join(output_path, array_name),
+                cols,
+                rows,
+                nbands=1,
+                profile=raster_profile,
+            )
 
-    bin_layer(
-        os.path.join(output_path, "paracousti_without_devices.tif"), latlon=crs == 4326
-    ).to_csv(os.path.join(output_path, "paracousti_without_devices.csv"), index=False)
+            # post processing of numpy array to output raster
+            numpy_array_to_raster(
+                output_raster,
+                numpy_array,
+                bounds,
+                cell_resolution,
+                crs,
+                os.path.join(output_path, array_name),
+                approx_stats=approx_stats,
+            )
+            output_raster = None
+            if cog:
+                convert_to_cog(
+                    os.path.join(output_path, array_name),
+                    resampling=layer_overview_resampling(
+                        use_numpy_array, overview_resampling
+                    ),
+                    compress="ZSTD" if raster_profile == "zstd" else "DEFLATE",
+                )
 
-    bin_layer(
-        os.path.join(output_path, "paracousti_with_devices.tif"), latlon=crs == 4326
-    ).to_csv(os.path.join(output_path, "paracousti_with_devices.csv"), index=False)
+        bundle_layers = {}
+        if output_format != "gtiff":
+            report_progress(timer, f"raster writing {output_format}", 0.6)
+            bundle_layers = write_result_bundle(
+                os.path.join(output_path, "paracousti"),
+                bundle_arrays,
+                bounds,
+                cell_resolution,
+                crs,
+                output_format=output_format,
+                profile=raster_profile,
+                approx_stats=approx_stats,
+                cog=cog,
+                overview_resampling=overview_resampling,
+            )
 
-    # Stressor Area
-    bin_layer(
-        os.path.join(output_path, "paracousti_stressor.tif"), latlon=crs == 4326
-    ).to_csv(os.path.join(output_path, "paracousti_stressor.csv"), index=False)
+        # Area calculations
+        # ParAcousti Area
 
-    # threshold exeeded Area
-    bin_layer(
-        os.path.join(output_path, "species_threshold_exceeded.tif"), latlon=crs == 4326
-    ).to_csv(os.path.join(output_path, "species_threshold_exceeded.csv"), index=False)
+        # cell centres and areas are shared by all rasters on the output grid
+        geometry = GridGeometry(*next(iter(rasters.values()))[:2], latlon=crs == 4326)
 
-    if not (
-        (secondary_constraint_filename is None) or (secondary_constraint_filename == "")
-    ):
-        bin_layer(
-            os.path.join(output_path, "paracousti_stressor.tif"),
-            receptor_filename=os.path.join(output_path, "paracousti_risk_layer.tif"),
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="risk layer",
+        report_progress(timer, "statistics paracousti_without_devices", 0.8)
+        bin_raster(
+            rasters["paracousti_without_devices"], latlon=crs == 4326, geometry=geometry
         ).to_csv(
-            os.path.join(
-                output_path, "paracousti_stressor_at_paracousti_risk_layer.csv"
-            ),
-            index=False,
+            os.path.join(output_path, "paracousti_without_devices.csv"), index=False
         )
 
-    if not ((species_folder is None) or (species_folder == "")):
-        bin_layer(
-            os.path.join(output_path, "species_percent.tif"), latlon=crs == 4326
-        ).to_csv(os.path.join(output_path, "species_percent.csv"), index=False)
-
-        bin_layer(
-            os.path.join(output_path, "species_density.tif"), latlon=crs == 4326
-        ).to_csv(os.path.join(output_path, "species_density.csv"), index=False)
+        report_progress(timer, "statistics paracousti_with_devices", 0.82)
+        bin_raster(
+            rasters["paracousti_with_devices"], latlon=crs == 4326, geometry=geometry
+        ).to_csv(os.path.join(output_path, "paracousti_with_devices.csv"), index=False)
+
+        # Stressor Area
+        report_progress(timer, "statistics paracousti_stressor", 0.84)
+        bin_raster(
+            rasters["paracousti_stressor"], latlon=crs == 4326, geometry=geometry
+        ).to_csv(os.path.join(output_path, "paracousti_stressor.csv"), index=False)
+
+        # threshold exeeded Area
+        report_progress(timer, "statistics species_threshold_exceeded", 0.86)
+        bin_raster(
+            rasters["species_threshold_exceeded"], latlon=crs == 4326, geometry=geometry
+        ).to_csv(
+            os.path.join(output_path, "species_threshold_exceeded.csv"), index=False
+        )
 
         if not (
             (secondary_constraint_filename is None)
             or (secondary_constraint_filename == "")
         ):
-            bin_layer(
-                os.path.join(output_path, "species_threshold_exceeded.tif"),
-                receptor_filename=os.path.join(
-                    output_path, "paracousti_risk_layer.tif"
-                ),
-                receptor_names=None,
-                limit_receptor_range=[0, np.inf],
-                latlon=crs == 4326,
-                receptor_type="risk layer",
-            ).to_csv(
-                os.path.join(
-                    output_path,
-                    "species_threshold_exceeded_at_paracousti_risk_layer.csv",
-                ),
-                index=False,
+            report_progress(
+                timer,
+                "statistics paracousti_stressor_at_paracousti_risk_layer",
+                0.88,
             )
-
-            bin_layer(
-                os.path.join(output_path, "species_percent.tif"),
-                receptor_filename=os.path.join(
-                    output_path, "paracousti_risk_layer.tif"
-                ),
+            bin_raster(
+                rasters["paracousti_stressor"],
+                receptor_raster=rasters["paracousti_risk_layer"],
                 receptor_names=None,
                 limit_receptor_range=[0, np.inf],
                 latlon=crs == 4326,
+                geometry=geometry,
                 receptor_type="risk layer",
             ).to_csv(
                 os.path.join(
-                    output_path, "species_percent_at_paracousti_risk_layer.csv"
+                    output_path, "paracousti_stressor_at_paracousti_risk_layer.csv"
                 ),
                 index=False,
             )
 
-            bin_layer(
-                os.path.join(output_path, "species_density.tif"),
-                receptor_filename=os.path.join(
-                    output_path, "paracousti_risk_layer.tif"
-                ),
-                receptor_names=None,
-                limit_receptor_range=[0, np.inf],
-                latlon=crs == 4326,
-                receptor_type="risk layer",
-            ).to_csv(
-                os.path.join(
-                    output_path, "species_density_at_paracousti_risk_layer.csv"
-                ),
-                index=False,
-            )
+        if not ((species_folder is None) or (species_folder == "")):
+            report_progress(timer, "statistics species_percent", 0.9)
+            bin_raster(
+                rasters["species_percent"], latlon=crs == 4326, geometry=geometry
+            ).to_csv(os.path.join(output_path, "species_percent.csv"), index=False)
+
+            report_progress(timer, "statistics species_density", 0.92)
+            bin_raster(
+                rasters["species_density"], latlon=crs == 4326, geometry=geometry
+            ).to_csv(os.path.join(output_path, "species_density.csv"), index=False)
+
+            if not (
+                (secondary_constraint_filename is None)
+                or (secondary_constraint_filename == "")
+            ):
+                report_progress(
+                    timer,
+                    "statistics species_threshold_exceeded_at_paracousti_risk_layer",
+                    0.94,
+                )
+                bin_raster(
+                    rasters["species_threshold_exceeded"],
+                    receptor_raster=rasters["paracousti_risk_layer"],
+                    receptor_names=None,
+                    limit_receptor_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path,
+                        "species_threshold_exceeded_at_paracousti_risk_layer.csv",
+                    ),
+                    index=False,
+                )
+
+                report_progress(
+                    timer,
+                    "statistics species_percent_at_paracousti_risk_layer",
+                    0.96,
+                )
+                bin_raster(
+                    rasters["species_percent"],
+                    receptor_raster=rasters["paracousti_risk_layer"],
+                    receptor_names=None,
+                    limit_receptor_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path, "species_percent_at_paracousti_risk_layer.csv"
+                    ),
+                    index=False,
+                )
+
+                report_progress(
+                    timer,
+                    "statistics species_density_at_paracousti_risk_layer",
+                    0.98,
+                )
+                bin_raster(
+                    rasters["species_density"],
+                    receptor_raster=rasters["paracousti_risk_layer"],
+                    receptor_names=None,
+                    limit_receptor_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path, "species_density_at_paracousti_risk_layer.csv"
+                    ),
+                    index=False,
+                )
 
-    OUTPUT = {}
+        timer.write(output_path)
+    finally:
+        # stop tracing and profiling if the run failed or was cancelled
+        timer.stop()
+    report_progress(progress_callback, "done", 1.0)
+    OUTPUT = dict(bundle_layers)
     for val in output_rasters:
         OUTPUT[os.path.basename(os.path.normpath(val)).split(".")[0]] = val
     return OUTPUT
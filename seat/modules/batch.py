@@ -0,0 +1,532 @@
+"""
+batch.py: Runs the stressor modules without QGIS.
+
+Reads the .ini input files written by the plugin (Save Input in the dialog) and
+runs the power, shear stress, velocity and acoustics modules into the same
+output folder structure as the plugin:
+
+    <output filepath>/Power Module
+    <output filepath>/Shear Stress Module
+    <output filepath>/Velocity Module
+    <output filepath>/Acoustics Module
+
+The modules are independent, so they can also run concurrently in a process
+pool (--parallel), each writing to its own folder.
+
+Usage:
+    python -m seat scenario_1.ini [scenario_2.ini ...] [--max-workers N] [--parallel]
+
+Dependencies:
+- numpy, pandas, netCDF4, osgeo (no QGIS or Qt)
+"""
+
+import argparse
+import configparser
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from seat.modules.power_module import calculate_power
+from seat.modules.shear_stress_module import run_shear_stress_stressor
+from seat.modules.velocity_module import run_velocity_stressor
+from seat.modules.acoustics_module import run_acoustics_stressor
+from seat.modules.stressor_utils import RunCancelled, report_progress
+
+# key = module name, val = its folder in the output filepath
+OUTPUT_FOLDERS = {
+    "power": "Power Module",
+    "shear stress": "Shear Stress Module",
+    "velocity": "Velocity Module",
+    "acoustics": "Acoustics Module",
+}
+
+# Options of the [Input] section, as written by StressorReceptorCalc.save_in
+INPUT_OPTIONS = [
+    "shear stress device present filepath",
+    "shear stress device not present filepath",
+    "shear stress averaging",
+    "shear stress probabilities file",
+    "shear stress grain size file",
+    "shear stress risk layer file",
+    "velocity device present filepath",
+    "velocity device not present filepath",
+    "velocity averaging",
+    "velocity probabilities file",
+    "velocity threshold file",
+    "velocity risk layer file",
+    "paracousti device present filepath",
+    "paracousti device not present filepath",
+    "paracousti averaging",
+    "paracousti probabilities file",
+    "paracousti threshold file",
+    "paracousti risk layer file",
+    "paracousti species filepath",
+    "power files filepath",
+    "power probabilities file",
+    "coordinate reference system",
+    "output style files",
+]
+# Options that are paths, checked before any module runs
+PATH_OPTIONS = [
+    option
+    for option in INPUT_OPTIONS
+    if option.endswith(("filepath", "file")) and option != "output style files"
+]
+
+
+def read_config(filename: str) -> Dict[str, str]:
+    """
+    Reads a SEAT input file.
+
+    Parameters
+    ----------
+    filename : str
+        File path to the *.ini file.
+
+    Raises
+    ------
+    FileNotFoundError
+        if the input file or any input path in it does not exist.
+    ValueError
+        if the output filepath or coordinate reference system is missing.
+
+    Returns
+    -------
+    Dict
+        key = option name (as in INPUT_OPTIONS and "output filepath"),
+        val = value, empty if not given.
+
+    """
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"The file {filename} does not exist.")
+    parser = configparser.ConfigParser()
+    parser.read(filename)
+    config = {
+        option: parser.get("Input", option, fallback="").strip()
+        for option in INPUT_OPTIONS
+    }
+    config["output filepath"] = parser.get(
+        "Output", "output filepath", fallback=""
+    ).strip()
+
+    for option in PATH_OPTIONS:
+        if (config[option] != "") and (not os.path.exists(config[option])):
+            raise FileNotFoundError(f"The path {config[option]} does not exist.")
+    if config["output filepath"] == "":
+        raise ValueError(f"No output filepath given in {filename}.")
+    if config["coordinate reference system"] == "":
+        raise ValueError(f"No coordinate reference system given in {filename}.")
+    return config
+
+
+def run_power(
+    config: Dict[str, str],
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+) -> Optional[str]:
+    """
+    Runs the power module if power files are given.
+
+    Parameters
+    ----------
+    config : Dict
+        input options, see read_config.
+    progress_callback : callable, optional
+        see report_progress. The default is None.
+
+    Returns
+    -------
+    str or None
+        output directory, None if the module did not run.
+
+    """
+    if config["power files filepath"] == "":
+        return None
+    probabilities_file = config["power probabilities file"]
+    if probabilities_file == "":
+        # default to shear stress probabilities if none given
+        probabilities_file = config["shear stress probabilities file"]
+    save_path = os.path.join(config["output filepath"], OUTPUT_FOLDERS["power"])
+    report_progress(progress_callback, "file loading", 0.0)
+    calculate_power(
+        config["power files filepath"],
+        probabilities_file,
+        save_path=save_path,
+        crs=int(config["coordinate reference system"]),
+        progress_callback=progress_callback,
+    )
+    report_progress(progress_callback, "done", 1.0)
+    return save_path
+
+
+def run_shear_stress(config: Dict[str, str], **options: Any) -> Dict[str, str]:
+    """
+    Runs the shear stress module if device present files are given.
+
+    Parameters
+    ----------
+    config : Dict
+        input options, see read_config.
+    **options
+        passed to run_shear_stress_stressor (e.g. max_workers).
+
+    Returns
+    -------
+    Dict
+        key = names of output rasters, val = full path to raster, empty if
+        the module did not run.
+
+    """
+    if config["shear stress device present filepath"] == "":
+        return {}
+    return run_shear_stress_stressor(
+        dev_present_file=config["shear stress device present filepath"],
+        dev_notpresent_file=config["shear stress device not present filepath"],
+        probabilities_file=config["shear stress probabilities file"],
+        crs=int(config["coordinate reference system"]),
+        output_path=os.path.join(
+            config["output filepath"], OUTPUT_FOLDERS["shear stress"]
+        ),
+        receptor_filename=config["shear stress grain size file"],
+        secondary_constraint_filename=config["shear stress risk layer file"],
+        value_selection=config["shear stress averaging"] or None,
+        **options,
+    )
+
+
+def run_velocity(config: Dict[str, str], **options: Any) -> Dict[str, str]:
+    """
+    Runs the velocity module if device present files are given.
+
+    Parameters
+    ----------
+    config : Dict
+        input options, see read_config.
+    **options
+        passed to run_velocity_stressor (e.g. max_workers).
+
+    Returns
+    -------
+    Dict
+        key = names of output rasters, val = full path to raster, empty if
+        the module did not run.
+
+    """
+    if config["velocity device present filepath"] == "":
+        return {}
+    return run_velocity_stressor(
+        dev_present_file=config["velocity device present filepath"],
+        dev_notpresent_file=config["velocity device not present filepath"],
+        probabilities_file=config["velocity probabilities file"],
+        crs=int(config["coordinate reference system"]),
+        output_path=os.path.join(config["output filepath"], OUTPUT_FOLDERS["velocity"]),
+        receptor_filename=config["velocity threshold file"],
+        secondary_constraint_filename=config["velocity risk layer file"],
+        value_selection=config["velocity averaging"] or None,
+        **options,
+    )
+
+
+def run_acoustics(config: Dict[str, str], **options: Any) -> Dict[str, str]:
+    """
+    Runs the acoustics module if device present files are given.
+
+    Parameters
+    ----------
+    config : Dict
+        input options, see read_config.
+    **options
+        passed to run_acoustics_stressor (e.g. max_workers).
+
+    Returns
+    -------
+    Dict
+        key = names of output rasters, val = full path to raster, empty if
+        the module did not run.
+
+    """
+    if config["paracousti device present filepath"] == "":
+        return {}
+    # paracousti grids are structured, the grid spacing is not estimated
+    options.pop("spacing_method", None)
+    return run_acoustics_stressor(
+        dev_present_file=config["paracousti device present filepath"],
+        dev_notpresent_file=config["paracousti device not present filepath"],
+        probabilities_file=config["paracousti probabilities file"],
+        crs=int(config["coordinate reference system"]),
+        output_path=os.path.join(
+            config["output filepath"], OUTPUT_FOLDERS["acoustics"]
+        ),
+        receptor_filename=config["paracousti threshold file"],
+        species_folder=config["paracousti species filepath"],
+        Averaging=config["paracousti averaging"] or None,
+        secondary_constraint_filename=config["paracousti risk layer file"],
+        **options,
+    )
+
+
+# key = module name, val = (function running it, option giving its input files)
+MODULES = {
+    "power": (run_power, "power files filepath"),
+    "shear stress": (run_shear_stress, "shear stress device present filepath"),
+    "velocity": (run_velocity, "velocity device present filepath"),
+    "acoustics": (run_acoustics, "paracousti device present filepath"),
+}
+
+
+def selected_modules(config: Dict[str, str]) -> List[str]:
+    """
+    Names of the modules with inputs in a SEAT input file.
+
+    Parameters
+    ----------
+    config : Dict
+        input options, see read_config.
+
+    Returns
+    -------
+    list
+        module names, keys of MODULES.
+
+    """
+    return [name for name, (_, option) in MODULES.items() if config[option] != ""]
+
+
+def run_module(
+    name: str,
+    config: Dict[str, str],
+    progress_queue: Optional[Any] = None,
+    cancel_event: Optional[Any] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    **options: Any,
+) -> Any:
+    """
+    Runs one module, forwarding its progress through a queue so it can be
+    followed from another process.
+
+    Parameters
+    ----------
+    name : str
+        module name, key of MODULES.
+    config : Dict
+        input options, see read_config.
+    progress_queue : queue, optional
+        receives (stage, fraction) at the start of each stage. The default is
+        None.
+    cancel_event : event, optional
+        the run stops with RunCancelled at the next stage once it is set. The
+        default is None.
+    progress_callback : callable, optional
+        also called with (stage, fraction) at the start of each stage, can
+        raise RunCancelled. The default is None.
+    **options
+        passed to the run_*_stressor functions.
+
+    Raises
+    ------
+    RunCancelled
+        if cancel_event is set.
+
+    Returns
+    -------
+    result of the module, see iter_config.
+
+    """
+
+    def module_progress(stage: str, fraction: float) -> None:
+        if (cancel_event is not None) and cancel_event.is_set():
+            raise RunCancelled(f"The {name} module was cancelled before {stage}.")
+        if progress_callback is not None:
+            progress_callback(stage, fraction)
+        if progress_queue is not None:
+            progress_queue.put((stage, fraction))
+
+    func = MODULES[name][0]
+    if name == "power":
+        return func(config, progress_callback=module_progress)
+    return func(config, progress_callback=module_progress, **options)
+
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """
+    Multiprocessing context for running modules in worker processes.
+
+    Workers are spawned rather than forked, forking a process running the Qt
+    event loop is not safe. Inside QGIS sys.executable is the QGIS application,
+    so the workers are started with the python interpreter it ships with.
+
+    Returns
+    -------
+    multiprocessing context
+        spawn context.
+
+    """
+    context = multiprocessing.get_context("spawn")
+    if not os.path.basename(sys.executable).lower().startswith("python"):
+        for folder in (sys.exec_prefix, os.path.join(sys.exec_prefix, "bin")):
+            for name in ("pythonw.exe", "python.exe", "python3", "python"):
+                if os.path.isfile(os.path.join(folder, name)):
+                    context.set_executable(os.path.join(folder, name))
+                    return context
+    return context
+
+
+def iter_config(
+    config: Dict[str, str],
+    parallel: bool = False,
+    max_modules: Optional[int] = None,
+    **options: Any,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Runs the modules with inputs in a SEAT input file, one after another or
+    concurrently in a process pool.
+
+    Parameters
+    ----------
+    config : Dict
+        input options, see read_config.
+    parallel : bool, optional
+        True to run the modules concurrently, each in its own process. The
+        default is False.
+    max_modules : int, optional
+        number of modules run at once when parallel. The default is None (all
+        selected modules).
+    **options
+        passed to the run_*_stressor functions (e.g. max_workers,
+        raster_profile, output_format).
+
+    Yields
+    ------
+    Tuple
+        module name and its result (output directory for power, output
+        rasters otherwise), in module order or as each module finishes when
+        parallel.
+
+    """
+    os.makedirs(
+        config["output filepath"], exist_ok=True
+    )  # create output directory if it doesn't exist
+    selected = selected_modules(config)
+    if (not parallel) or (len(selected) < 2):
+        for name in selected:
+            func = MODULES[name][0]
+            yield name, func(config) if name == "power" else func(config, **options)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=max_modules or len(selected), mp_context=worker_context()
+    ) as executor:
+        futures = {
+            (
+                executor.submit(run_power, config)
+                if name == "power"
+                else executor.submit(MODULES[name][0], config, **options)
+            ): name
+            for name in selected
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def run_config(
+    config: Dict[str, str], parallel: bool = False, **options: Any
+) -> Dict[str, Any]:
+    """
+    Runs all modules with inputs in a SEAT input file.
+
+    Parameters
+    ----------
+    config : Dict
+        input options, see read_config.
+    parallel : bool, optional
+        True to run the modules concurrently. The default is False.
+    **options
+        passed to the run_*_stressor functions (e.g. max_workers,
+        raster_profile, output_format).
+
+    Returns
+    -------
+    Dict
+        key = module name, val = output directory (power) or output rasters,
+        None or empty for modules without inputs.
+
+    """
+    results = {"power": None, "shear stress": {}, "velocity": {}, "acoustics": {}}
+    results.update(iter_config(config, parallel=parallel, **options))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point, runs each input file in turn.
+
+    Parameters
+    ----------
+    argv : list, optional
+        command line arguments. The default is None (sys.argv).
+
+    Returns
+    -------
+    int
+        exit status.
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m seat",
+        description="Run the SEAT stressor modules from .ini input files.",
+    )
+    parser.add_argument("ini_files", nargs="+", help="SEAT input files (*.ini)")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="number of model runs read concurrently (default 1)",
+    )
+    parser.add_argument(
+        "--raster-profile",
+        default="default",
+        choices=["default", "tiled", "deflate", "zstd"],
+        help="GeoTIFF output profile (default: default)",
+    )
+    parser.add_argument(
+        "--output-format",
+        default="gtiff",
+        choices=["gtiff", "multiband", "netcdf"],
+        help="one geotiff per output, or one bundle per module (default: gtiff)",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="run the modules of each input file concurrently",
+    )
+    parser.add_argument(
+        "--spacing-method",
+        default="random",
+        choices=["random", "stratified", "all"],
+        help="grid spacing estimate of unstructured runs: seeded random sample "
+        "of nodes (reproduces earlier results), stratified sample or all nodes "
+        "(default: random)",
+    )
+    parser.add_argument(
+        "--cog",
+        action="store_true",
+        help="write Cloud-Optimized GeoTIFFs with overviews",
+    )
+    args = parser.parse_args(argv)
+
+    # read every input file first so a typo does not stop a batch part way
+    configs = [read_config(filename) for filename in args.ini_files]
+    for filename, config in zip(args.ini_files, configs):
+        print(f"Running {filename} -> {config['output filepath']}")
+        run_config(
+            config,
+            parallel=args.parallel,
+            max_workers=args.max_workers,
+            raster_profile=args.raster_profile,
+            output_format=args.output_format,
+            cog=args.cog,
+            spacing_method=args.spacing_method,
+            # outside QGIS the runs can be read in worker processes
+            use_processes=True,
+        )
+    return 0
@@ -25,7 +25,7 @@ CHANGE HISTORY:
 import io
 import re
 import os
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 import numpy as np
 from numpy.typing import NDArray
 import pandas as pd
@@ -37,6 +37,9 @@ from matplotlib.cm import ScalarMappable
 from matplotlib.ticker import FormatStrFormatter
 from matplotlib.figure import Figure
 
+from seat.modules.run_timer import RunTimer
+from seat.modules.stressor_utils import report_progress
+
 
 # Obstacle Polygon and Device Positions
 def read_obstacle_polygon_file(
@@ -433,6 +436,7 @@ def calculate_power(
     probabilities_file: str,
     save_path: Optional[str] = None,
     crs: Optional[int] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
 ) -> Tuple[DataFrame, DataFrame]:
     """
     Reads the power files and calculates the total annual power based on
@@ -452,6 +456,10 @@ def calculate_power(
         probabilities file name with extension.
     save_path: file path
         save directory
+    progress_callback : callable, optional
+        called with the stage name and the fraction completed before each
+        power file is read and each table is written, can raise RunCancelled
+        to stop the calculation. The default is None.
 
     Returns
     -------
@@ -474,214 +482,237 @@ def calculate_power(
 
     assert save_path is not None, "Specify an output directory"
     os.makedirs(save_path, exist_ok=True)
+    timer = RunTimer("power", progress_callback)
+    try:
+        total_power = []
+        ic = 0
+        for datafile in datafiles:
+            report_progress(
+                timer,
+                f"run file {ic + 1} of {len(datafiles)}",
+                0.5 * ic / len(datafiles),
+            )
+            p, tp = read_power_file(os.path.join(power_files, datafile))
+            # print(p)
+            if ic == 0:
+                power_array = np.empty((len(p), 0), float)
+            power_array = np.append(power_array, p[:, np.newaxis], axis=1)
+            total_power = np.append(total_power, tp)
+            ic += 1
 
-    total_power = []
-    ic = 0
-    for datafile in datafiles:
-        p, tp = read_power_file(os.path.join(power_files, datafile))
-        # print(p)
-        if ic == 0:
-            power_array = np.empty((len(p), 0), float)
-        power_array = np.append(power_array, p[:, np.newaxis], axis=1)
-        total_power = np.append(total_power, tp)
-        ic += 1
-
-    power_scaled = bc_data["% of yr"].to_numpy() * power_array
-    total_power_scaled = bc_data["% of yr"] * total_power
-
-    # Summary of power given percent of year for each array
-    # need to reorder total_power and Power to run roder in
-    bc_data["Power_Run_Name"] = datafiles
-    # bc_data['% of yr'] * total_power
-    bc_data["Power [W]"] = total_power_scaled
-    bc_data.to_csv(os.path.join(save_path, "BC_probability_wPower.csv"), index=False)
-
-    fig, ax = plt.subplots(figsize=(9, 6))
-    ax.bar(
-        np.arange(np.shape(total_power_scaled)[0]) + 1,
-        np.log10(total_power_scaled),
-        width=1,
-        edgecolor="black",
-    )
-    ax.set_xlabel("Run Scenario")
-    ax.set_ylabel("Power [$log_{10}(Watts)$]")
-    ax.set_title("Total Power Annual")
-    fig.tight_layout()
-    fig.savefig(os.path.join(save_path, "Total_Scaled_Power_Bars_per_Run.png"))
-
-    subplot_grid_size = np.sqrt(np.shape(power_scaled)[1])
-    fig, axes_grid = plt.subplots(
-        np.round(subplot_grid_size).astype(int),
-        np.ceil(subplot_grid_size).astype(int),
-        sharex=True,
-        sharey=True,
-        figsize=(12, 10),
-    )
-    nr, nc = axes_grid.shape
-    axes_grid = axes_grid.flatten()
-    mxy = roundup(np.log10(power_scaled.max().max()))
-    ndx = np.ceil(power_scaled.shape[0] / 6)
-    for ic in range(power_scaled.shape[1]):
-        # fig,ax = plt.subplots()
-        axes_grid[ic].bar(
-            np.arange(np.shape(power_scaled)[0]) + 1,
-            np.log10(power_scaled[:, ic]),
+        power_scaled = bc_data["% of yr"].to_numpy() * power_array
+        total_power_scaled = bc_data["% of yr"] * total_power
+
+        # Summary of power given percent of year for each array
+        # need to reorder total_power and Power to run roder in
+        bc_data["Power_Run_Name"] = datafiles
+        # bc_data['% of yr'] * total_power
+        bc_data["Power [W]"] = total_power_scaled
+        report_progress(timer, "statistics BC_probability_wPower", 0.5)
+        bc_data.to_csv(
+            os.path.join(save_path, "BC_probability_wPower.csv"), index=False
+        )
+
+        report_progress(timer, "figures", 0.55)
+        fig, ax = plt.subplots(figsize=(9, 6))
+        ax.bar(
+            np.arange(np.shape(total_power_scaled)[0]) + 1,
+            np.log10(total_power_scaled),
             width=1,
             edgecolor="black",
         )
-        # axes_grid[ic].text(power_scaled.shape[0]/2, mxy-1,
-        # f'{datafiles[ic]}', fontsize=8, ha='center', va='top')
-        axes_grid[ic].set_title(f"{datafiles[ic]}", fontsize=8)
-        axes_grid[ic].set_ylim([0, mxy])
-        axes_grid[ic].set_xticks(np.arange(0, power_scaled.shape[0] + ndx, ndx))
-        axes_grid[ic].set_xlim([0, power_scaled.shape[0] + 1])
-    axes_grid = axes_grid.reshape(nr, nc)
-    for ax in axes_grid[:, 0]:
+        ax.set_xlabel("Run Scenario")
         ax.set_ylabel("Power [$log_{10}(Watts)$]")
-    for ax in axes_grid[-1, :]:
-        ax.set_xlabel("Obstacle")
-    fig.tight_layout()
-    fig.savefig(os.path.join(save_path, "Scaled_Power_Bars_per_run_obstacle.png"))
-
-    fig, ax = plt.subplots(figsize=(9, 6))
-    ax.bar(
-        np.arange(np.shape(power_scaled)[0]) + 1,
-        np.log10(np.sum(power_scaled, axis=1)),
-        width=1,
-        edgecolor="black",
-    )
-    ax.set_xlabel("Obstacle")
-    ax.set_ylabel("Power [$log_{10}(Watts)$]")
-    ax.set_title("Total Obstacle Power for all Runs")
-    fig.tight_layout()
-    fig.savefig(os.path.join(save_path, "Total_Scaled_Power_Bars_per_obstacle.png"))
-
-    power_device_configuration_file = [
-        s
-        for s in os.listdir(power_files)
-        if (s.endswith(".pol") | s.endswith(".Pol") | s.endswith(".POL"))
-    ]
-    if len(power_device_configuration_file) > 0:
-
-        assert len(power_device_configuration_file) == 1, "More than 1 *.pol file found"
-
-        # Group arrays to devices and calculate power
-        # proportionally for each scenario (datafile),
-        # such that the sum of each scenario for each
-        # device is the yearly totoal power for that device
-        obstacles = read_obstacle_polygon_file(
-            os.path.join(power_files, power_device_configuration_file[0])
-        )
-        fig = plot_test_obstacle_locations(obstacles)
-        fig.savefig(os.path.join(save_path, "Obstacle_Locations.png"))
-
-        centroids = find_mean_point_of_obstacle_polygon(obstacles)
-        centroids_df = pd.DataFrame(data=centroids, columns=["obstacle", "X", "Y"])
-        centroids_df["obstacle"] = centroids_df["obstacle"].astype(int)
-        centroids_df = centroids_df.set_index(["obstacle"])
-        device_index = pair_devices(centroids)
-        device_index_df = pd.DataFrame(
-            {
-                "Device_Number": range(device_index.shape[0]),
-                "Index 1": device_index[:, 0],
-                "Index 2": device_index[:, 1],
-                "X": centroids_df.loc[device_index[:, 0], "X"],
-                "Y": centroids_df.loc[device_index[:, 0], "Y"],
-            }
-        )
-        device_index_df["Device_Number"] = device_index_df["Device_Number"] + 1
-        device_index_df = device_index_df.set_index("Device_Number")
-        device_index_df.to_csv(os.path.join(save_path, "Obstacle_Matching.csv"))
-
-        fig, ax = plt.subplots(figsize=(10, 10))
-        for device in device_index_df.index.values:
-            ax.plot(
-                device_index_df.loc[device, "X"],
-                device_index_df.loc[device, "Y"],
-                ".",
-                alpha=0,
-            )
-            ax.text(
-                device_index_df.loc[device, "X"],
-                device_index_df.loc[device, "Y"],
-                device,
-                fontsize=8,
-            )
-        fig.savefig(os.path.join(save_path, "Device Number Location.png"))
-
-        device_power = np.empty((0, np.shape(power_array)[1]), dtype=float)
-        for ic0, ic1 in device_index:
-            device_power = np.vstack(
-                (device_power, power_array[ic0, :] + power_array[ic1, :])
-            )
-
-        # device_power = power_array[0::2, :] + power_array[1::2, :]
-
-        devices = pd.DataFrame({})
-        device_power_year = device_power * bc_data["% of yr"].to_numpy()
-        for ic, name in enumerate(datafiles):
-            devices[name] = device_power_year[:, ic]
-        devices["Device"] = np.arange(1, len(devices) + 1)
-        devices = devices.set_index("Device")
-        devices.to_csv(os.path.join(save_path, "Power_per_device_per_scenario.csv"))
+        ax.set_title("Total Power Annual")
+        fig.tight_layout()
+        fig.savefig(os.path.join(save_path, "Total_Scaled_Power_Bars_per_Run.png"))
 
-        subplot_grid_size = np.sqrt(devices.shape[1])
+        subplot_grid_size = np.sqrt(np.shape(power_scaled)[1])
         fig, axes_grid = plt.subplots(
             np.round(subplot_grid_size).astype(int),
             np.ceil(subplot_grid_size).astype(int),
             sharex=True,
             sharey=True,
             figsize=(12, 10),
+            squeeze=False,
         )
         nr, nc = axes_grid.shape
         axes_grid = axes_grid.flatten()
-        mxy = roundup(np.log10(devices.max().max()))
-        ndx = np.ceil(devices.shape[0] / 6)
-        for ic, col in enumerate(devices.columns):
+        mxy = roundup(np.log10(power_scaled.max().max()))
+        ndx = np.ceil(power_scaled.shape[0] / 6)
+        for ic in range(power_scaled.shape[1]):
             # fig,ax = plt.subplots()
             axes_grid[ic].bar(
-                np.arange(np.shape(devices[col])[0]) + 1,
-                np.log10(devices[col].to_numpy()),
-                width=1.0,
+                np.arange(np.shape(power_scaled)[0]) + 1,
+                np.log10(power_scaled[:, ic]),
+                width=1,
                 edgecolor="black",
             )
-            # axes_grid[ic].text(devices.shape[0]/2, mxy-1, f'{col}',
-            # fontsize=8, ha='center', va='top')
-            axes_grid[ic].set_title(f"{col}", fontsize=8)
+            # axes_grid[ic].text(power_scaled.shape[0]/2, mxy-1,
+            # f'{datafiles[ic]}', fontsize=8, ha='center', va='top')
+            axes_grid[ic].set_title(f"{datafiles[ic]}", fontsize=8)
             axes_grid[ic].set_ylim([0, mxy])
-            axes_grid[ic].set_xticks(np.arange(0, devices.shape[0] + ndx, ndx))
-            axes_grid[ic].set_xlim([0, devices.shape[0] + 1])
+            axes_grid[ic].set_xticks(np.arange(0, power_scaled.shape[0] + ndx, ndx))
+            axes_grid[ic].set_xlim([0, power_scaled.shape[0] + 1])
         axes_grid = axes_grid.reshape(nr, nc)
         for ax in axes_grid[:, 0]:
             ax.set_ylabel("Power [$log_{10}(Watts)$]")
         for ax in axes_grid[-1, :]:
-            ax.set_xlabel("Device")
-        axes_grid = axes_grid.flatten()
+            ax.set_xlabel("Obstacle")
         fig.tight_layout()
-        fig.savefig(os.path.join(save_path, "Scaled_Power_per_device_per_scenario.png"))
-
-        # power per scenario per device
-
-        # Sum power for the entire years (all datafiles) for each device
-        devices_total = pd.DataFrame({})
-        devices_total["Power [W]"] = device_power_year.sum(axis=1)
-        devices_total["Device"] = np.arange(1, len(devices_total) + 1)
-        devices_total = devices_total.set_index("Device")
-        devices_total.to_csv(os.path.join(save_path, "Power_per_device_annual.csv"))
+        fig.savefig(os.path.join(save_path, "Scaled_Power_Bars_per_run_obstacle.png"))
 
         fig, ax = plt.subplots(figsize=(9, 6))
         ax.bar(
-            devices_total.index,
-            np.log10(devices_total["Power [W]"]),
+            np.arange(np.shape(power_scaled)[0]) + 1,
+            np.log10(np.sum(power_scaled, axis=1)),
             width=1,
             edgecolor="black",
         )
+        ax.set_xlabel("Obstacle")
         ax.set_ylabel("Power [$log_{10}(Watts)$]")
-        ax.set_xlabel("Device")
-        fig.savefig(os.path.join(save_path, "Total_Scaled_Power_per_Device_.png"))
-
-        device_power = extract_device_location(obstacles, device_index)
-        device_power["Power [W]"] = devices_total["Power [W]"].values
-        fig = create_power_heatmap(device_power, crs=crs)
-        fig.savefig(os.path.join(save_path, "Device_Power.png"), dpi=150)
-        # plt.close(fig)
+        ax.set_title("Total Obstacle Power for all Runs")
+        fig.tight_layout()
+        fig.savefig(os.path.join(save_path, "Total_Scaled_Power_Bars_per_obstacle.png"))
+
+        power_device_configuration_file = [
+            s
+            for s in os.listdir(power_files)
+            if (s.endswith(".pol") | s.endswith(".Pol") | s.endswith(".POL"))
+        ]
+        if len(power_device_configuration_file) > 0:
+
+            assert (
+                len(power_device_configuration_file) == 1
+            ), "More than 1 *.pol file found"
+
+            # Group arrays to devices and calculate power
+            # proportionally for each scenario (datafile),
+            # such that the sum of each scenario for each
+            # device is the yearly totoal power for that device
+            obstacles = read_obstacle_polygon_file(
+                os.path.join(power_files, power_device_configuration_file[0])
+            )
+            fig = plot_test_obstacle_locations(obstacles)
+            fig.savefig(os.path.join(save_path, "Obstacle_Locations.png"))
+
+            centroids = find_mean_point_of_obstacle_polygon(obstacles)
+            centroids_df = pd.DataFrame(data=centroids, columns=["obstacle", "X", "Y"])
+            centroids_df["obstacle"] = centroids_df["obstacle"].astype(int)
+            centroids_df = centroids_df.set_index(["obstacle"])
+            device_index = pair_devices(centroids)
+            device_index_df = pd.DataFrame(
+                {
+                    "Device_Number": range(device_index.shape[0]),
+                    "Index 1": device_index[:, 0],
+                    "Index 2": device_index[:, 1],
+                    "X": centroids_df.loc[device_index[:, 0], "X"],
+                    "Y": centroids_df.loc[device_index[:, 0], "Y"],
+                }
+            )
+            device_index_df["Device_Number"] = device_index_df["Device_Number"] + 1
+            device_index_df = device_index_df.set_index("Device_Number")
+            report_progress(timer, "statistics Obstacle_Matching", 0.6)
+            device_index_df.to_csv(os.path.join(save_path, "Obstacle_Matching.csv"))
+
+            fig, ax = plt.subplots(figsize=(10, 10))
+            for device in device_index_df.index.values:
+                ax.plot(
+                    device_index_df.loc[device, "X"],
+                    device_index_df.loc[device, "Y"],
+                    ".",
+                    alpha=0,
+                )
+                ax.text(
+                    device_index_df.loc[device, "X"],
+                    device_index_df.loc[device, "Y"],
+                    device,
+                    fontsize=8,
+                )
+            fig.savefig(os.path.join(save_path, "Device Number Location.png"))
+
+            device_power = np.empty((0, np.shape(power_array)[1]), dtype=float)
+            for ic0, ic1 in device_index:
+                device_power = np.vstack(
+                    (device_power, power_array[ic0, :] + power_array[ic1, :])
+                )
+
+            # device_power = power_array[0::2, :] + power_array[1::2, :]
+
+            devices = pd.DataFrame({})
+            device_power_year = device_power * bc_data["% of yr"].to_numpy()
+            for ic, name in enumerate(datafiles):
+                devices[name] = device_power_year[:, ic]
+            devices["Device"] = np.arange(1, len(devices) + 1)
+            devices = devices.set_index("Device")
+            report_progress(timer, "statistics Power_per_device_per_scenario", 0.7)
+            devices.to_csv(os.path.join(save_path, "Power_per_device_per_scenario.csv"))
+
+            subplot_grid_size = np.sqrt(devices.shape[1])
+            fig, axes_grid = plt.subplots(
+                np.round(subplot_grid_size).astype(int),
+                np.ceil(subplot_grid_size).astype(int),
+                sharex=True,
+                sharey=True,
+                figsize=(12, 10),
+                squeeze=False,
+            )
+            nr, nc = axes_grid.shape
+            axes_grid = axes_grid.flatten()
+            mxy = roundup(np.log10(devices.max().max()))
+            ndx = np.ceil(devices.shape[0] / 6)
+            for ic, col in enumerate(devices.columns):
+                # fig,ax = plt.subplots()
+                axes_grid[ic].bar(
+                    np.arange(np.shape(devices[col])[0]) + 1,
+                    np.log10(devices[col].to_numpy()),
+                    width=1.0,
+                    edgecolor="black",
+                )
+                # axes_grid[ic].text(devices.shape[0]/2, mxy-1, f'{col}',
+                # fontsize=8, ha='center', va='top')
+                axes_grid[ic].set_title(f"{col}", fontsize=8)
+                axes_grid[ic].set_ylim([0, mxy])
+                axes_grid[ic].set_xticks(np.arange(0, devices.shape[0] + ndx, ndx))
+                axes_grid[ic].set_xlim([0, devices.shape[0] + 1])
+            axes_grid = axes_grid.reshape(nr, nc)
+            for ax in axes_grid[:, 0]:
+                ax.set_ylabel("Power [$log_{10}(Watts)$]")
+            for ax in axes_grid[-1, :]:
+                ax.set_xlabel("Device")
+            axes_grid = axes_grid.flatten()
+            fig.tight_layout()
+            fig.savefig(
+                os.path.join(save_path, "Scaled_Power_per_device_per_scenario.png")
+            )
+
+            # power per scenario per device
+
+            # Sum power for the entire years (all datafiles) for each device
+            devices_total = pd.DataFrame({})
+            devices_total["Power [W]"] = device_power_year.sum(axis=1)
+            devices_total["Device"] = np.arange(1, len(devices_total) + 1)
+            devices_total = devices_total.set_index("Device")
+            report_progress(timer, "statistics Power_per_device_annual", 0.9)
+            devices_total.to_csv(os.path.join(save_path, "Power_per_device_annual.csv"))
+
+            fig, ax = plt.subplots(figsize=(9, 6))
+            ax.bar(
+                devices_total.index,
+                np.log10(devices_total["Power [W]"]),
+                width=1,
+                edgecolor="black",
+            )
+            ax.set_ylabel("Power [$log_{10}(Watts)$]")
+            ax.set_xlabel("Device")
+            fig.savefig(os.path.join(save_path, "Total_Scaled_Power_per_Device_.png"))
+
+            device_power = extract_device_location(obstacles, device_index)
+            device_power["Power [W]"] = devices_total["Power [W]"].values
+            fig = create_power_heatmap(device_power, crs=crs)
+            fig.savefig(os.path.join(save_path, "Device_Power.png"), dpi=150)
+            # plt.close(fig)
+        timer.write(save_path)
+    finally:
+        # stop tracing and profiling if the run failed or was cancelled
+        timer.stop()
@@ -0,0 +1,178 @@
+"""
+regrid_cache.py: Persistent on-disk cache for regridding weights.
+
+Interpolation weights and nearest-neighbour indices depend only on the source
+coordinates and the target grid, so they can be reused between runs on the same
+model mesh. Entries are stored as .npz files named by a hash of the inputs that
+define them. The least recently used entries are removed once the cache
+directory exceeds its size limit.
+
+The cache is disabled unless a directory is given, either directly or with the
+SEAT_REGRID_CACHE_DIR environment variable. The size limit in megabytes can be
+set with SEAT_REGRID_CACHE_MAX_MB (default 1024).
+
+Dependencies:
+- numpy
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional
+import numpy as np
+from numpy.typing import NDArray
+
+CACHE_DIR_ENV = "SEAT_REGRID_CACHE_DIR"
+CACHE_MAX_MB_ENV = "SEAT_REGRID_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 1024.0
+
+
+class RegridCache:
+    """
+    Directory of cached regridding arrays with least recently used eviction.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        directory to store cache files in. The default is None (caching
+        disabled).
+    max_size_mb : float, optional
+        maximum total size of the cache files in megabytes. The default is 1024.
+    """
+
+    def __init__(
+        self, cache_dir: Optional[str] = None, max_size_mb: float = DEFAULT_MAX_MB
+    ):
+        self.cache_dir = cache_dir if cache_dir else None
+        self.max_size_bytes = int(max_size_mb * 1024**2)
+
+    @property
+    def enabled(self) -> bool:
+        """True if a cache directory is set."""
+        return self.cache_dir is not None
+
+    @staticmethod
+    def make_key(name: str, *arrays: NDArray, **params) -> str:
+        """
+        Creates a cache key from arrays and parameters.
+
+        Parameters
+        ----------
+        name : str
+            kind of cached data, e.g. 'nearest'.
+        *arrays : array
+            arrays defining the cached data (source and target coordinates).
+        **params :
+            scalar parameters defining the cached data.
+
+        Returns
+        -------
+        str
+            cache key.
+        """
+        digest = hashlib.sha1(name.encode())
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.tobytes())
+        for key in sorted(params):
+            digest.update(f"{key}={params[key]!r};".encode())
+        return f"{name}_{digest.hexdigest()}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def load(self, key: str) -> Optional[Dict[str, NDArray]]:
+        """
+        Loads cached arrays.
+
+        Parameters
+        ----------
+        key : str
+            cache key from make_key.
+
+        Returns
+        -------
+        Dict or None
+            key = array name, val = array. None if the entry is not cached.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        return arrays
+
+    def save(self, key: str, arrays: Dict[str, NDArray]) -> None:
+        """
+        Saves arrays to the cache and evicts old entries if over the size limit.
+
+        Parameters
+        ----------
+        key : str
+            cache key from make_key.
+        arrays : Dict
+            key = array name, val = array.
+        """
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as file:
+                np.savez(file, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache is within the
+        size limit.
+        """
+        if not self.enabled or not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        """Removes all cache entries."""
+        if not self.enabled or not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".npz"):
+                os.remove(entry.path)
+
+
+def get_regrid_cache() -> RegridCache:
+    """
+    Creates the cache configured by the SEAT_REGRID_CACHE_DIR and
+    SEAT_REGRID_CACHE_MAX_MB environment variables.
+
+    Returns
+    -------
+    RegridCache
+        cache, disabled if SEAT_REGRID_CACHE_DIR is not set.
+    """
+    return RegridCache(
+        os.environ.get(CACHE_DIR_ENV),
+        float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)),
+    )
@@ -0,0 +1,247 @@
+"""
+run_timer.py: Per-stage timing and memory report of a module run.
+
+A RunTimer is passed as the progress callback of a run (see report_progress in
+stressor_utils.py), so every stage reported by the run ('run file i of n',
+'raster writing <name>', 'statistics <name>', ...) is timed. At the end of the
+run the report is written to timings.json in the module's output folder:
+
+    {"module": "shear_stress", "total_seconds": 12.3, "peak_rss_mb": 812.0,
+     "stages": [{"stage": "run file 1 of 10", "seconds": 0.8,
+                 "peak_rss_mb": 640.2, "peak_traced_mb": null}, ...]}
+
+peak_rss_mb is the peak resident memory of the process so far (None where the
+resource module is not available, e.g. Windows). Workers reading runs in a
+process pool are not included.
+
+Two environment variables add more detail at some cost in run time:
+- SEAT_TRACEMALLOC: set to 1 to record the peak memory allocated by python and
+  numpy during each stage (peak_traced_mb).
+- SEAT_PROFILE: set to 1 to also write a cProfile file <module>.prof next to
+  timings.json, e.g. to view with snakeviz or pstats. Only one run is profiled
+  at a time, runs started while another profiler is active are not profiled.
+
+Tracing and profiling stop when the run ends, including when it fails or is
+cancelled (the module runs call RunTimer.stop in a finally block).
+
+Dependencies:
+- none (standard library)
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_ENV = "SEAT_PROFILE"
+TRACEMALLOC_ENV = "SEAT_TRACEMALLOC"
+TIMINGS_FILENAME = "timings.json"
+
+# held by the RunTimer profiling, so concurrent runs do not share a profiler
+_PROFILE_LOCK = threading.Lock()
+
+
+def env_flag(name: str) -> bool:
+    """True if the environment variable is set to anything but '', '0' or 'false'."""
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident memory of the current process.
+
+    Returns
+    -------
+    float or None
+        megabytes, None if the resource module is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def start_profiler() -> Optional[cProfile.Profile]:
+    """
+    Starts a cProfile profiler.
+
+    Returns
+    -------
+    cProfile.Profile or None
+        the running profiler, None if another profiler is already active.
+    """
+    if sys.getprofile() is not None:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiling tool is active (python 3.12+)
+        return None
+    return profiler
+
+
+class RunTimer:
+    """
+    Times the stages of a module run, used as (or wrapping) its progress
+    callback.
+
+    Parameters
+    ----------
+    module : str
+        module name, used for the report and the cProfile file name.
+    progress_callback : callable, optional
+        called with each stage and fraction before it is timed, can raise
+        RunCancelled. The default is None.
+    trace_memory : bool, optional
+        True to record the peak traced memory of each stage. The default is
+        None (SEAT_TRACEMALLOC environment variable).
+    profile : bool, optional
+        True to profile the run with cProfile, unless another run or profiler
+        is already profiling. The default is None (SEAT_PROFILE environment
+        variable).
+    """
+
+    def __init__(
+        self,
+        module: str,
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        trace_memory: Optional[bool] = None,
+        profile: Optional[bool] = None,
+    ):
+        self.module = module
+        self.progress_callback = progress_callback
+        self.stages: List[Dict[str, Any]] = []
+        self.stage: Optional[str] = None
+        self.start_time = time.perf_counter()
+        self.stage_start = self.start_time
+
+        if trace_memory is None:
+            trace_memory = env_flag(TRACEMALLOC_ENV)
+        # leave tracing alone if someone else started it
+        self.trace_memory = trace_memory and not tracemalloc.is_tracing()
+        if self.trace_memory:
+            tracemalloc.start()
+
+        if profile is None:
+            profile = env_flag(PROFILE_ENV)
+        self.profiler = None
+        self.profiling = False
+        if profile and _PROFILE_LOCK.acquire(blocking=False):
+            self.profiler = start_profiler()
+            self.profiling = self.profiler is not None
+            if not self.profiling:
+                _PROFILE_LOCK.release()
+
+    def __call__(self, stage: str, fraction: float) -> None:
+        """Progress callback, ends the current stage and starts the next."""
+        if self.progress_callback is not None:
+            self.progress_callback(stage, fraction)
+        self.end_stage()
+        self.stage = stage
+        self.stage_start = time.perf_counter()
+
+    def end_stage(self) -> None:
+        """Records the time and memory of the current stage."""
+        if self.stage is None:
+            return
+        peak_traced_mb = None
+        if self.trace_memory:
+            peak_traced_mb = tracemalloc.get_traced_memory()[1] / 1024**2
+            tracemalloc.reset_peak()
+        self.stages.append(
+            {
+                "stage": self.stage,
+                "seconds": time.perf_counter() - self.stage_start,
+                "peak_rss_mb": peak_rss_mb(),
+                "peak_traced_mb": peak_traced_mb,
+            }
+        )
+        self.stage = None
+
+    def stop(self) -> None:
+        """
+        Ends the last stage and stops memory tracing and profiling, can be
+        called more than once.
+        """
+        self.end_stage()
+        if self.trace_memory:
+            tracemalloc.stop()
+            self.trace_memory = False
+        if self.profiling:
+            self.profiler.disable()
+            self.profiling = False
+            _PROFILE_LOCK.release()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Timing report of the stages recorded so far.
+
+        Returns
+        -------
+        Dict
+            module, total_seconds, peak_rss_mb and the list of stages.
+        """
+        return {
+            "module": self.module,
+            "total_seconds": time.perf_counter() - self.start_time,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": list(self.stages),
+        }
+
+    def write(self, output_path: str) -> str:
+        """
+        Stops the timer and writes timings.json (and <module>.prof when
+        profiling) to the output folder.
+
+        Parameters
+        ----------
+        output_path : str
+            module output folder.
+
+        Returns
+        -------
+        str
+            path of timings.json.
+        """
+        self.stop()
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.join(output_path, f"{self.module}.prof"))
+        filename = os.path.join(output_path, TIMINGS_FILENAME)
+        with open(filename, "w", encoding="utf-8") as timings_file:
+            json.dump(self.report(), timings_file, indent=2)
+        return filename
+
+
+def format_timings(report: Dict[str, Any]) -> str:
+    """
+    Summarises a timing report, e.g. for the QGIS message log.
+
+    Parameters
+    ----------
+    report : Dict
+        contents of timings.json, see RunTimer.report.
+
+    Returns
+    -------
+    str
+        one line per stage with its time and memory.
+    """
+    lines = [f"{report['module']}: {report['total_seconds']:.2f} s"]
+    for stage in report["stages"]:
+        line = f"  {stage['stage']}: {stage['seconds']:.2f} s"
+        if stage["peak_rss_mb"] is not None:
+            line += f", peak RSS {stage['peak_rss_mb']:.0f} MB"
+        if stage["peak_traced_mb"] is not None:
+            line += f", peak traced {stage['peak_traced_mb']:.0f} MB"
+        lines.append(line)
+    return "\n".join(lines)
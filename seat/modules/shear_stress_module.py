@@ -26,22 +26,32 @@
 """
 
 import os
-from typing import Optional, Tuple, Dict
+from typing import Callable, Optional, Tuple, Dict, List, Union
 import numpy as np
 from numpy.typing import NDArray
-import pandas as pd
 from netCDF4 import Dataset  # pylint: disable=no-name-in-module
 
+from seat.modules.run_timer import RunTimer
 from seat.modules.stressor_utils import (
     estimate_grid_spacing,
-    create_structured_array_from_unstructured,
+    UnstructuredGridRegridder,
     calc_receptor_array,
     trim_zeros,
+    pair_run_files,
+    read_bc_probabilities,
+    map_runs,
     create_raster,
     numpy_array_to_raster,
-    classify_layer_area,
-    bin_layer,
-    classify_layer_area_2nd_constraint,
+    convert_to_cog,
+    layer_overview_resampling,
+    write_result_bundle,
+    report_progress,
+    scale_progress,
+    raster_from_array,
+    GridGeometry,
+    classify_raster_area,
+    bin_raster,
+    classify_raster_area_2nd_constraint,
     resample_structured_grid,
     secondary_constraint_geotiff_to_numpy,
 )
@@ -206,23 +216,22 @@ def check_grid_define_vars(dataset: Dataset) -> tuple[str, str, str, str]:
     return gridtype, xvar, yvar, tauvar
 
 
-def calculate_shear_stress_stressors(
+def combine_shear_stress_in_memory(
     fpath_nodev: str,
     fpath_dev: str,
     probabilities_file: str,
-    receptor_filename: Optional[str] = None,
-    latlon: bool = True,
     value_selection: Optional[str] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
 ) -> Tuple[
-    list[NDArray[np.float64]],
+    str,
+    NDArray[np.float64],
+    NDArray[np.float64],
     NDArray[np.float64],
     NDArray[np.float64],
-    float,
-    float,
-    str,
 ]:
     """
-    Calculates the stressor layers as arrays from model and parameter input.
+    Loads all runs into memory and combines the shear stress of the runs
+    weighted by their probability.
 
     Parameters
     ----------
@@ -232,49 +241,34 @@ def calculate_shear_stress_stressors(
         Directory path to the with device model run netcdf files.
     probabilities_file : str
         File path to probabilities/bondary condition *.csv file.
-    receptor_filename : str, optional
-        File path to the recetptor file (*.csv or *.tif). The default is None.
-    latlon : Bool, optional
-        True is coordinates are lat/lon. The default is True.
     value_selection : str, optional
-        Temporal selection of shears stress (not currently used). The default is 'MAX'.
+        Temporal selection of shear stress (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    progress_callback : callable, optional
+        called with 'run file i of n' before each run is read, see
+        report_progress. The default is None.
 
     Raises
     ------
-    Exception
+    ValueError
         "Number of device runs files must be the same as no device runs files".
 
     Returns
     -------
-    listOfFiles : list
-        2D arrays of:
-        [0] tau_diff
-        [1] mobility_parameter_nodev
-        [2] mobility_parameter_dev
-        [3] mobility_parameter_diff
-        [4] mobility_classification
-        [5] receptor array
-        [6] tau_combined_dev
-        [7] tau_combined_nodev
-    rx : array
-        X-Coordiantes.
-    ry : array
-        Y-Coordinates.
-    dx : scalar
-        x-spacing.
-    dy : scalar
-        y-spacing.
     gridtype : str
         grid type [structured or unstructured].
+    xcor : array
+        x-coordinates.
+    ycor : array
+        y-coordinates.
+    tau_combined_nodev : array
+        probability weighted shear stress without devices.
+    tau_combined_dev : array
+        probability weighted shear stress with devices.
 
     """
-    if not os.path.exists(fpath_nodev):
-        raise FileNotFoundError(f"The file {fpath_nodev} does not exist.")
-    if not os.path.exists(fpath_dev):
-        raise FileNotFoundError(f"The file {fpath_dev} does not exist.")
-
     xcor, ycor = None, None
-
+    run_numbers = None
     files_nodev = [i for i in os.listdir(fpath_nodev) if i.endswith(".nc")]
     files_dev = [i for i in os.listdir(fpath_dev) if i.endswith(".nc")]
 
@@ -298,34 +292,16 @@ def calculate_shear_stress_stressors(
     elif len(files_nodev) == len(files_dev):
         # asumes each run is separate with the some_name_RunNum_map.nc,
         # where run number comes at the last underscore before _map.nc
-        run_num_nodev = np.zeros((len(files_nodev)))
-        for ic, file in enumerate(files_nodev):
-            run_num_nodev[ic] = int(file.split(".")[0].split("_")[-2])
-        run_num_dev = np.zeros((len(files_dev)))
-        for ic, file in enumerate(files_dev):
-            run_num_dev[ic] = int(file.split(".")[0].split("_")[-2])
-
-        # ensure run oder for nodev matches dev files
-        if np.any(run_num_nodev != run_num_dev):
-            adjust_dev_order = []
-            for ri in run_num_nodev:
-                adjust_dev_order = np.append(
-                    adjust_dev_order, np.flatnonzero(run_num_dev == ri)
-                )
-            files_dev = [files_dev[int(i)] for i in adjust_dev_order]
-            run_num_dev = [run_num_dev[int(i)] for i in adjust_dev_order]
-        df = pd.DataFrame(
-            {
-                "files_nodev": files_nodev,
-                "run_num_nodev": run_num_nodev,
-                "files_dev": files_dev,
-                "run_num_dev": run_num_dev,
-            }
-        )
-        df = df.sort_values(by="run_num_dev")
+        df = pair_run_files(files_nodev, files_dev)
+        run_numbers = df.run_num_dev.to_numpy()
         first_run = True
         ir = 0
         for _, row in df.iterrows():
+            report_progress(
+                progress_callback,
+                f"run file {ir + 1} of {df.shape[0]}",
+                ir / df.shape[0],
+            )
             with Dataset(
                 os.path.join(fpath_nodev, row.files_nodev)
             ) as file_dev_notpresent, Dataset(
@@ -365,31 +341,7 @@ def calculate_shear_stress_stressors(
             # at least for some runs the boundary has 0 coordinates. Check and fix.
             xcor, ycor, tau_nodev, tau_dev = trim_zeros(xcor, ycor, tau_nodev, tau_dev)
 
-    if not probabilities_file == "":
-        if not os.path.exists(probabilities_file):
-            raise FileNotFoundError(f"The file {probabilities_file} does not exist.")
-        # Load BC file with probabilities and find appropriate probability
-        bc_probability = pd.read_csv(probabilities_file, delimiter=",")
-        bc_probability["run_num"] = bc_probability["run number"] - 1
-        bc_probability = bc_probability.sort_values(by="run number")
-        bc_probability["probability"] = bc_probability["% of yr"].values / 100
-        # bc_probability
-        if "Exclude" in bc_probability.columns:
-            bc_probability = bc_probability[
-                ~(
-                    (bc_probability["Exclude"] == "x")
-                    | (bc_probability["Exclude"] == "X")
-                )
-            ]
-    else:  # assume run_num in file name is return interval
-        bc_probability = pd.DataFrame()
-        # ignore number and start sequentially from zero
-        bc_probability["run_num"] = np.arange(0, tau_dev.shape[0])
-        # assumes run_num in name is the return interval
-        bc_probability["probability"] = 1 / df.run_num_dev.to_numpy()
-        bc_probability["probability"] = (
-            bc_probability["probability"] / bc_probability["probability"].sum()
-        )  # rescale to ensure = 1
+    bc_probability = read_bc_probabilities(probabilities_file, run_numbers)
 
     # Calculate Stressor and Receptors
     if value_selection == "Maximum":
@@ -421,6 +373,327 @@ def calculate_shear_stress_stressors(
         tau_combined_nodev = tau_combined_nodev + prob * tau_nodev[run_number, -1, :]
         tau_combined_dev = tau_combined_dev + prob * tau_dev[run_number, -1, :]
 
+    return gridtype, xcor, ycor, tau_combined_nodev, tau_combined_dev
+
+
+def reduce_shear_stress(
+    tau: NDArray[np.float64], value_selection: Optional[str] = None
+) -> NDArray[np.float64]:
+    """
+    Reduces the shear stress of a single run over time.
+
+    Parameters
+    ----------
+    tau : array
+        shear stress [time, ...].
+    value_selection : str, optional
+        Temporal selection of shear stress (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+
+    Returns
+    -------
+    array
+        shear stress [...].
+
+    """
+    if value_selection == "Mean":
+        return np.nanmean(tau, axis=0)  # mean over time
+    if value_selection == "Final Timestep":
+        return tau[-2:-1][-1]  # final timestep, as in combine_shear_stress_in_memory
+    return np.nanmax(tau, axis=0)  # max over time (default)
+
+
+def read_reduced_shear_stress_run(
+    file_nodev: str,
+    file_dev: str,
+    tauvar: str,
+    value_selection: Optional[str] = None,
+    run_index: Optional[int] = None,
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Reads the shear stress of a single run with and without devices and
+    reduces it over time.
+
+    Parameters
+    ----------
+    file_nodev : str
+        File path to the baseline/no device model run netcdf file.
+    file_dev : str
+        File path to the with device model run netcdf file.
+    tauvar : str
+        name of shear stress variable.
+    value_selection : str, optional
+        Temporal selection of shear stress (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    run_index : int, optional
+        run to read if the files are concatenated with shape
+        [run_num, time, ...]. The default is None.
+
+    Returns
+    -------
+    tau_nodev : array
+        shear stress without devices.
+    tau_dev : array
+        shear stress with devices.
+
+    """
+    with Dataset(file_nodev) as file_dev_notpresent, Dataset(
+        file_dev
+    ) as file_dev_present:
+        if run_index is None:
+            tau_nodev = file_dev_notpresent.variables[tauvar][:].data.astype(float)
+            tau_dev = file_dev_present.variables[tauvar][:].data.astype(float)
+        else:
+            tau_nodev = file_dev_notpresent.variables[tauvar][run_index]
+            tau_dev = file_dev_present.variables[tauvar][run_index]
+    return (
+        reduce_shear_stress(tau_nodev, value_selection),
+        reduce_shear_stress(tau_dev, value_selection),
+    )
+
+
+def combine_shear_stress_streaming(
+    fpath_nodev: str,
+    fpath_dev: str,
+    probabilities_file: str,
+    value_selection: Optional[str] = None,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+) -> Tuple[
+    str,
+    NDArray[np.float64],
+    NDArray[np.float64],
+    NDArray[np.float64],
+    NDArray[np.float64],
+]:
+    """
+    Combines the shear stress of the runs weighted by their probability, reading
+    and reducing one run at a time so only a single run is held in memory.
+
+    Parameters
+    ----------
+    fpath_nodev : str
+        Directory path to the baseline/no device model run netcdf files.
+    fpath_dev : str
+        Directory path to the with device model run netcdf files.
+    probabilities_file : str
+        File path to probabilities/bondary condition *.csv file.
+    value_selection : str, optional
+        Temporal selection of shear stress (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    max_workers : int, optional
+        number of runs read concurrently. The default is 1.
+    use_processes : bool, optional
+        True to read runs in a process pool, False for a thread pool.
+        The default is False.
+    progress_callback : callable, optional
+        called with 'run file i of n' before each run is read, see
+        report_progress. The default is None.
+
+    Raises
+    ------
+    ValueError
+        "Number of device runs files must be the same as no device runs files".
+
+    Returns
+    -------
+    gridtype : str
+        grid type [structured or unstructured].
+    xcor : array
+        x-coordinates.
+    ycor : array
+        y-coordinates.
+    tau_combined_nodev : array
+        probability weighted shear stress without devices.
+    tau_combined_dev : array
+        probability weighted shear stress with devices.
+
+    """
+    files_nodev = [i for i in os.listdir(fpath_nodev) if i.endswith(".nc")]
+    files_dev = [i for i in os.listdir(fpath_dev) if i.endswith(".nc")]
+
+    if len(files_nodev) == 1 & len(files_dev) == 1:
+        # asumes a concatonated files with shape
+        # [run_num, time, rows, cols]
+        bc_probability = read_bc_probabilities(probabilities_file)
+        file_nodev = os.path.join(fpath_nodev, files_nodev[0])
+        file_dev = os.path.join(fpath_dev, files_dev[0])
+        with Dataset(file_dev) as file_dev_present:
+            gridtype, xvar, yvar, tauvar = check_grid_define_vars(file_dev_present)
+            xcor = file_dev_present.variables[xvar][:].data
+            ycor = file_dev_present.variables[yvar][:].data
+            shape = file_dev_present.variables[tauvar].shape[2:]
+        run_args = [
+            (file_nodev, file_dev, tauvar, value_selection, run_number)
+            for run_number in bc_probability["run_num"].values
+        ]
+
+    # same number of files, file name must be formatted with either run number
+    elif len(files_nodev) == len(files_dev):
+        df = pair_run_files(files_nodev, files_dev)
+        bc_probability = read_bc_probabilities(
+            probabilities_file, df.run_num_dev.to_numpy()
+        )
+        with Dataset(
+            os.path.join(fpath_nodev, df.files_nodev.iloc[0])
+        ) as file_dev_notpresent, Dataset(
+            os.path.join(fpath_dev, df.files_dev.iloc[0])
+        ) as file_dev_present:
+            gridtype, xvar, yvar, tauvar = check_grid_define_vars(file_dev_present)
+            xcor = file_dev_notpresent.variables[xvar][:].data
+            ycor = file_dev_notpresent.variables[yvar][:].data
+            shape = file_dev_notpresent.variables[tauvar].shape[1:]
+        run_args = [
+            (
+                os.path.join(fpath_nodev, df.files_nodev.iloc[run_number]),
+                os.path.join(fpath_dev, df.files_dev.iloc[run_number]),
+                tauvar,
+                value_selection,
+            )
+            for run_number in bc_probability["run_num"].values
+        ]
+    else:
+        raise ValueError(
+            f"Number of device runs ({len(files_dev)}) must be the same "
+            f"as no device runs ({len(files_nodev)})."
+        )
+
+    tau_combined_nodev = np.zeros(shape)
+    tau_combined_dev = np.zeros(shape)
+    for prob, (tau_nodev, tau_dev) in zip(
+        bc_probability["probability"].values,
+        map_runs(
+            read_reduced_shear_stress_run,
+            run_args,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            progress_callback=progress_callback,
+        ),
+    ):
+        tau_combined_nodev = tau_combined_nodev + prob * tau_nodev
+        tau_combined_dev = tau_combined_dev + prob * tau_dev
+
+    if gridtype == "structured":
+        if (xcor[0, 0] == 0) & (xcor[-1, 0] == 0):
+            # at least for some runs the boundary has 0 coordinates. Check and fix.
+            xcor, ycor, tau_combined_nodev, tau_combined_dev = trim_zeros(
+                xcor, ycor, tau_combined_nodev, tau_combined_dev
+            )
+
+    return gridtype, xcor, ycor, tau_combined_nodev, tau_combined_dev
+
+
+def calculate_shear_stress_stressors(
+    fpath_nodev: str,
+    fpath_dev: str,
+    probabilities_file: str,
+    receptor_filename: Optional[str] = None,
+    latlon: bool = True,
+    value_selection: Optional[str] = None,
+    streaming: bool = True,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    spacing_method: str = "random",
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+) -> Tuple[
+    list[NDArray[np.float64]],
+    NDArray[np.float64],
+    NDArray[np.float64],
+    float,
+    float,
+    str,
+]:
+    """
+    Calculates the stressor layers as arrays from model and parameter input.
+
+    Parameters
+    ----------
+    fpath_nodev : str
+        Directory path to the baseline/no device model run netcdf files.
+    fpath_dev : str
+        Directory path to the with device model run netcdf files.
+    probabilities_file : str
+        File path to probabilities/bondary condition *.csv file.
+    receptor_filename : str, optional
+        File path to the recetptor file (*.csv or *.tif). The default is None.
+    latlon : Bool, optional
+        True is coordinates are lat/lon. The default is True.
+    value_selection : str, optional
+        Temporal selection of shears stress (not currently used). The default is 'MAX'.
+    streaming : bool, optional
+        True to read and reduce one run at a time instead of loading all runs
+        into memory. The default is True.
+    max_workers : int, optional
+        number of runs read concurrently when streaming. The default is 1.
+    use_processes : bool, optional
+        True to read runs in a process pool, False for a thread pool.
+        The default is False.
+    spacing_method : str, optional
+        sampling method of estimate_grid_spacing for unstructured grids
+        ("random", "stratified" or "all"). The default is "random".
+    progress_callback : callable, optional
+        called with the stage name and the fraction completed before each run
+        file is read and before regridding, can raise RunCancelled to stop
+        the calculation. The default is None.
+
+    Raises
+    ------
+    Exception
+        "Number of device runs files must be the same as no device runs files".
+
+    Returns
+    -------
+    listOfFiles : list
+        2D arrays of:
+        [0] tau_diff
+        [1] mobility_parameter_nodev
+        [2] mobility_parameter_dev
+        [3] mobility_parameter_diff
+        [4] mobility_classification
+        [5] receptor array
+        [6] tau_combined_dev
+        [7] tau_combined_nodev
+    rx : array
+        X-Coordiantes.
+    ry : array
+        Y-Coordinates.
+    dx : scalar
+        x-spacing.
+    dy : scalar
+        y-spacing.
+    gridtype : str
+        grid type [structured or unstructured].
+
+    """
+    if not os.path.exists(fpath_nodev):
+        raise FileNotFoundError(f"The file {fpath_nodev} does not exist.")
+    if not os.path.exists(fpath_dev):
+        raise FileNotFoundError(f"The file {fpath_dev} does not exist.")
+
+    if streaming:
+        gridtype, xcor, ycor, tau_combined_nodev, tau_combined_dev = (
+            combine_shear_stress_streaming(
+                fpath_nodev,
+                fpath_dev,
+                probabilities_file,
+                value_selection,
+                max_workers=max_workers,
+                use_processes=use_processes,
+                progress_callback=scale_progress(progress_callback, 0.0, 0.8),
+            )
+        )
+    else:
+        gridtype, xcor, ycor, tau_combined_nodev, tau_combined_dev = (
+            combine_shear_stress_in_memory(
+                fpath_nodev,
+                fpath_dev,
+                probabilities_file,
+                value_selection,
+                progress_callback=scale_progress(progress_callback, 0.0, 0.8),
+            )
+        )
+
     receptor_array = calc_receptor_array(receptor_filename, xcor, ycor, latlon=latlon)
     taucrit = critical_shear_stress(
         d_meters=receptor_array * 1e-6, rhow=1024, nu=1e-6, s=2.65, g=9.81
@@ -465,40 +738,36 @@ def calculate_shear_stress_stressors(
             "shear_stress_risk_metric": risk,
         }
     else:  # unstructured
-        dxdy = estimate_grid_spacing(xcor, ycor, nsamples=100)
+        dxdy = estimate_grid_spacing(xcor, ycor, nsamples=100, method=spacing_method)
         dx = dxdy
         dy = dxdy
-        rx, ry, tau_diff_struct = create_structured_array_from_unstructured(
-            xcor, ycor, tau_diff, dxdy, flatness=0.2
-        )
-        _, _, tau_combined_dev_struct = create_structured_array_from_unstructured(
-            xcor, ycor, tau_combined_dev, dxdy, flatness=0.2
-        )
-        _, _, tau_combined_nodev_struct = create_structured_array_from_unstructured(
-            xcor, ycor, tau_combined_nodev, dxdy, flatness=0.2
-        )
+        report_progress(progress_callback, "triangulation", 0.8)
+        regridder = UnstructuredGridRegridder(xcor, ycor, dxdy, flatness=0.2)
+        rx = regridder.x_grid
+        ry = regridder.y_grid
+        fields = {
+            "tau_diff": tau_diff,
+            "tau_combined_dev": tau_combined_dev,
+            "tau_combined_nodev": tau_combined_nodev,
+        }
         if not ((receptor_filename is None) or (receptor_filename == "")):
-            _, _, mobility_parameter_nodev_struct = (
-                create_structured_array_from_unstructured(
-                    xcor, ycor, mobility_parameter_nodev, dxdy, flatness=0.2
-                )
-            )
-            _, _, mobility_parameter_dev_struct = (
-                create_structured_array_from_unstructured(
-                    xcor, ycor, mobility_parameter_dev, dxdy, flatness=0.2
-                )
-            )
-            _, _, mobility_parameter_diff_struct = (
-                create_structured_array_from_unstructured(
-                    xcor, ycor, mobility_parameter_diff, dxdy, flatness=0.2
-                )
-            )
-            _, _, receptor_array_struct = create_structured_array_from_unstructured(
-                xcor, ycor, receptor_array, dxdy, flatness=0.2
-            )
-            _, _, risk_struct = create_structured_array_from_unstructured(
-                xcor, ycor, risk, dxdy, flatness=0.2
-            )
+            fields["mobility_parameter_nodev"] = mobility_parameter_nodev
+            fields["mobility_parameter_dev"] = mobility_parameter_dev
+            fields["mobility_parameter_diff"] = mobility_parameter_diff
+            fields["receptor_array"] = receptor_array
+            fields["risk"] = risk
+        # all fields are interpolated in one pass
+        report_progress(progress_callback, f"regridding {len(fields)} fields", 0.9)
+        structured = regridder.regrid_fields(fields)
+        tau_diff_struct = structured["tau_diff"]
+        tau_combined_dev_struct = structured["tau_combined_dev"]
+        tau_combined_nodev_struct = structured["tau_combined_nodev"]
+        if not ((receptor_filename is None) or (receptor_filename == "")):
+            mobility_parameter_nodev_struct = structured["mobility_parameter_nodev"]
+            mobility_parameter_dev_struct = structured["mobility_parameter_dev"]
+            mobility_parameter_diff_struct = structured["mobility_parameter_diff"]
+            receptor_array_struct = structured["receptor_array"]
+            risk_struct = structured["risk"]
         else:
             mobility_parameter_nodev_struct = np.nan * tau_diff_struct
             mobility_parameter_dev_struct = np.nan * tau_diff_struct
@@ -536,6 +805,15 @@ def run_shear_stress_stressor(
     receptor_filename: Optional[str] = None,
     secondary_constraint_filename: Optional[str] = None,
     value_selection: Optional[str] = None,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    spacing_method: str = "random",
+    raster_profile: Union[str, List[str]] = "default",
+    approx_stats: bool = False,
+    cog: bool = False,
+    overview_resampling: Optional[Dict[str, str]] = None,
+    output_format: str = "gtiff",
+    progress_callback: Optional[Callable[[str, float], None]] = None,
 ) -> Dict[str, str]:
     """
     creates geotiffs and area change statistics files for shear stress change
@@ -556,6 +834,38 @@ def run_shear_stress_stressor(
         File path to the recetptor file (*.csv or *.tif). The default is None.
     secondary_constraint_filename: str, optional
         File path to the secondary constraint file (*.tif). The default is None.
+    value_selection : str, optional
+        Temporal selection of shear stress (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    max_workers : int, optional
+        number of runs read concurrently. The default is 1.
+    use_processes : bool, optional
+        True to read runs in a process pool, False for a thread pool.
+        The default is False.
+    spacing_method : str, optional
+        sampling method of estimate_grid_spacing for unstructured grids
+        ("random", "stratified" or "all"). The default is "random".
+    raster_profile : str or list, optional
+        GeoTIFF output profile ('default', 'tiled', 'deflate' or 'zstd') or
+        list of GTiff creation options. The default is 'default'.
+    approx_stats : bool, optional
+        True to compute approximate raster statistics. The default is False.
+    cog : bool, optional
+        True to write Cloud-Optimized GeoTIFFs with internal overviews. The
+        default is False.
+    overview_resampling : dict, optional
+        key = output raster name, val = overview resampling method. The
+        default is None (nearest for classified layers, average otherwise).
+    output_format : str, optional
+        'gtiff' for one geotiff per output, 'multiband' for one multi-band
+        geotiff (shear_stress.tif) or 'netcdf' for one compressed
+        CF-NetCDF (shear_stress.nc). The default is 'gtiff'.
+    progress_callback : callable, optional
+        called with the stage name and the fraction of the run completed at
+        the start of each step ('file loading', each 'run file i of n',
+        'triangulation' and 'regridding' of unstructured grids, 'raster
+        writing' each raster, 'statistics' each table and 'done'), can raise
+        RunCancelled to stop the run. The default is None.
 
     Returns
     -------
@@ -566,254 +876,266 @@ def run_shear_stress_stressor(
     os.makedirs(
         output_path, exist_ok=True
     )  # create output directory if it doesn't exist
-
-    dict_of_arrays, rx, ry, dx, dy, gridtype = calculate_shear_stress_stressors(
-        fpath_nodev=dev_notpresent_file,
-        fpath_dev=dev_present_file,
-        probabilities_file=probabilities_file,
-        receptor_filename=receptor_filename,
-        latlon=crs == 4326,
-        value_selection=value_selection,
-    )
-
-    if not ((receptor_filename is None) or (receptor_filename == "")):
-        use_numpy_arrays = [
-            "shear_stress_without_devices",
-            "shear_stress_with_devices",
-            "shear_stress_difference",
-            "sediment_mobility_without_devices",
-            "sediment_mobility_with_devices",
-            "sediment_mobility_difference",
-            "sediment_mobility_classified",
-            "sediment_grain_size",
-            "shear_stress_risk_metric",
-        ]
-    else:
-        use_numpy_arrays = [
-            "shear_stress_without_devices",
-            "shear_stress_with_devices",
-            "shear_stress_difference",
-        ]
-
-    if not (
-        (secondary_constraint_filename is None) or (secondary_constraint_filename == "")
-    ):
-        if not os.path.exists(secondary_constraint_filename):
-            raise FileNotFoundError(
-                f"The file {secondary_constraint_filename} does not exist."
-            )
-        rrx, rry, constraint = secondary_constraint_geotiff_to_numpy(
-            secondary_constraint_filename
-        )
-        dict_of_arrays["shear_stress_risk_layer"] = resample_structured_grid(
-            rrx, rry, constraint, rx, ry, interpmethod="nearest"
+    timer = RunTimer("shear_stress", progress_callback)
+    try:
+        report_progress(timer, "file loading", 0.0)
+
+        dict_of_arrays, rx, ry, dx, dy, gridtype = calculate_shear_stress_stressors(
+            fpath_nodev=dev_notpresent_file,
+            fpath_dev=dev_present_file,
+            probabilities_file=probabilities_file,
+            receptor_filename=receptor_filename,
+            latlon=crs == 4326,
+            value_selection=value_selection,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            spacing_method=spacing_method,
+            progress_callback=scale_progress(timer, 0.0, 0.5),
         )
-        use_numpy_arrays.append("shear_stress_risk_layer")
 
-    numpy_array_names = [i + ".tif" for i in use_numpy_arrays]
-
-    output_rasters = []
-    for array_name, use_numpy_array in zip(numpy_array_names, use_numpy_arrays):
-        if gridtype == "structured":
-            numpy_array = np.flip(np.transpose(dict_of_arrays[use_numpy_array]), axis=0)
-        else:
-            numpy_array = np.flip(dict_of_arrays[use_numpy_array], axis=0)
-
-        cell_resolution = [dx, dy]
-        if crs == 4326:
-            rxx = np.where(rx > 180, rx - 360, rx)
-            bounds = [rxx.min() - dx / 2, ry.max() - dy / 2]
+        if not ((receptor_filename is None) or (receptor_filename == "")):
+            use_numpy_arrays = [
+                "shear_stress_without_devices",
+                "shear_stress_with_devices",
+                "shear_stress_difference",
+                "sediment_mobility_without_devices",
+                "sediment_mobility_with_devices",
+                "sediment_mobility_difference",
+                "sediment_mobility_classified",
+                "sediment_grain_size",
+                "shear_stress_risk_metric",
+            ]
         else:
-            bounds = [rx.min() - dx / 2, ry.max() - dy / 2]
-        rows, cols = numpy_array.shape
-        # create an ouput raster given the stressor file path
-        output_rasters.append(os.path.join(output_path, array_name))
-        output_raster = create_raster(
-            os.path.join(output_path, array_name), cols, rows, nbands=1
-        )
+            use_numpy_arrays = [
+                "shear_stress_without_devices",
+                "shear_stress_with_devices",
+                "shear_stress_difference",
+            ]
 
-        # post processing of numpy array to output raster
-        numpy_array_to_raster(
-            output_raster,
-            numpy_array,
-            bounds,
-            cell_resolution,
-            crs,
-            os.path.join(output_path, array_name),
-        )
-        output_raster = None
-
-    # Area calculations pull form rasters to ensure uniformity
-    bin_layer(
-        os.path.join(output_path, "shear_stress_difference.tif"),
-        receptor_filename=None,
-        receptor_names=None,
-        latlon=crs == 4326,
-    ).to_csv(os.path.join(output_path, "shear_stress_difference.csv"), index=False)
-    if not (
-        (secondary_constraint_filename is None) or (secondary_constraint_filename == "")
-    ):
-        bin_layer(
-            os.path.join(output_path, "shear_stress_difference.tif"),
-            receptor_filename=os.path.join(output_path, "shear_stress_risk_layer.tif"),
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="risk layer",
-        ).to_csv(
-            os.path.join(
-                output_path, "shear_stress_difference_at_secondary_constraint.csv"
-            ),
-            index=False,
-        )
-    if not ((receptor_filename is None) or (receptor_filename == "")):
-        bin_layer(
-            os.path.join(output_path, "shear_stress_difference.tif"),
-            receptor_filename=os.path.join(output_path, "sediment_grain_size.tif"),
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="grain size",
-        ).to_csv(
-            os.path.join(
-                output_path, "shear_stress_difference_at_sediment_grain_size.csv"
-            ),
-            index=False,
-        )
+        if not (
+            (secondary_constraint_filename is None)
+            or (secondary_constraint_filename == "")
+        ):
+            if not os.path.exists(secondary_constraint_filename):
+                raise FileNotFoundError(
+                    f"The file {secondary_constraint_filename} does not exist."
+                )
+            rrx, rry, constraint = secondary_constraint_geotiff_to_numpy(
+                secondary_constraint_filename, rx, ry
+            )
+            report_progress(timer, "regridding shear_stress_risk_layer", 0.5)
+            dict_of_arrays["shear_stress_risk_layer"] = resample_structured_grid(
+                rrx, rry, constraint, rx, ry, interpmethod="nearest"
+            )
+            use_numpy_arrays.append("shear_stress_risk_layer")
 
-        bin_layer(
-            os.path.join(output_path, "sediment_mobility_difference.tif"),
-            receptor_filename=None,
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-        ).to_csv(
-            os.path.join(output_path, "sediment_mobility_difference.csv"), index=False
-        )
+        numpy_array_names = [i + ".tif" for i in use_numpy_arrays]
 
-        bin_layer(
-            os.path.join(output_path, "sediment_mobility_difference.tif"),
-            receptor_filename=os.path.join(output_path, "sediment_grain_size.tif"),
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="grain size",
-        ).to_csv(
-            os.path.join(
-                output_path, "sediment_mobility_difference_at_sediment_grain_size.csv"
-            ),
-            index=False,
-        )
+        output_rasters = []
+        rasters = {}  # arrays as stored in the rasters, for the area calculations
+        bundle_arrays = {}
+        for ic, (array_name, use_numpy_array) in enumerate(
+            zip(numpy_array_names, use_numpy_arrays)
+        ):
+            if gridtype == "structured":
+                numpy_array = np.flip(
+                    np.transpose(dict_of_arrays[use_numpy_array]), axis=0
+                )
+            else:
+                numpy_array = np.flip(dict_of_arrays[use_numpy_array], axis=0)
+
+            cell_resolution = [dx, dy]
+            if crs == 4326:
+                rxx = np.where(rx > 180, rx - 360, rx)
+                bounds = [rxx.min() - dx / 2, ry.max() - dy / 2]
+            else:
+                bounds = [rx.min() - dx / 2, ry.max() - dy / 2]
+            rows, cols = numpy_array.shape
+            rasters[use_numpy_array] = raster_from_array(
+                numpy_array, bounds, cell_resolution
+            )
+            if output_format != "gtiff":
+                # written together after the loop
+                bundle_arrays[use_numpy_array] = numpy_array
+                continue
+            report_progress(
+                timer,
+                f"raster writing {use_numpy_array}",
+                0.6 + 0.2 * ic / len(numpy_array_names),
+            )
+            # create an ouput raster given the stressor file path
+            output_rasters.append(os.path.join(output_path, array_name))
+            output_raster = create_raster(
+                os.path.join(output_path, array_name),
+                cols,
+                rows,
+                nbands=1,
+                profile=raster_profile,
+            )
 
-        bin_layer(
-            os.path.join(output_path, "shear_stress_risk_metric.tif"),
-            receptor_filename=None,
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-        ).to_csv(os.path.join(output_path, "shear_stress_risk_metric.csv"), index=False)
+            # post processing of numpy array to output raster
+            numpy_array_to_raster(
+                output_raster,
+                numpy_array,
+                bounds,
+                cell_resolution,
+                crs,
+                os.path.join(output_path, array_name),
+                approx_stats=approx_stats,
+            )
+            output_raster = None
+            if cog:
+                convert_to_cog(
+                    os.path.join(output_path, array_name),
+                    resampling=layer_overview_resampling(
+                        use_numpy_array, overview_resampling
+                    ),
+                    compress="ZSTD" if raster_profile == "zstd" else "DEFLATE",
+                )
 
-        bin_layer(
-            os.path.join(output_path, "shear_stress_risk_metric.tif"),
-            receptor_filename=os.path.join(output_path, "sediment_grain_size.tif"),
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="grain size",
-        ).to_csv(
-            os.path.join(
-                output_path, "shear_stress_risk_metric_at_sediment_grain_size.csv"
-            ),
-            index=False,
-        )
+        bundle_layers = {}
+        if output_format != "gtiff":
+            report_progress(timer, f"raster writing {output_format}", 0.6)
+            bundle_layers = write_result_bundle(
+                os.path.join(output_path, "shear_stress"),
+                bundle_arrays,
+                bounds,
+                cell_resolution,
+                crs,
+                output_format=output_format,
+                profile=raster_profile,
+                approx_stats=approx_stats,
+                cog=cog,
+                overview_resampling=overview_resampling,
+            )
 
-        classify_layer_area(
-            os.path.join(output_path, "sediment_mobility_classified.tif"),
-            at_values=[-3, -2, -1, 0, 1, 2, 3],
-            value_names=[
-                "New Deposition",
-                "Increased Deposition",
-                "Reduced Deposition",
-                "No Change",
-                "Reduced Erosion",
-                "Increased Erosion",
-                "New Erosion",
-            ],
-            latlon=crs == 4326,
-        ).to_csv(
-            os.path.join(output_path, "sediment_mobility_classified.csv"), index=False
-        )
+        # cell centres and areas are shared by all rasters on the output grid
+        geometry = GridGeometry(*next(iter(rasters.values()))[:2], latlon=crs == 4326)
 
-        classify_layer_area(
-            os.path.join(output_path, "sediment_mobility_classified.tif"),
-            receptor_filename=os.path.join(output_path, "sediment_grain_size.tif"),
-            at_values=[-3, -2, -1, 0, 1, 2, 3],
-            value_names=[
-                "New Deposition",
-                "Increased Deposition",
-                "Reduced Deposition",
-                "No Change",
-                "Reduced Erosion",
-                "Increased Erosion",
-                "New Erosion",
-            ],
-            limit_receptor_range=[0, np.inf],
+        # Area calculations pull form rasters to ensure uniformity
+        report_progress(timer, "statistics shear_stress_difference", 0.8)
+        bin_raster(
+            rasters["shear_stress_difference"],
+            receptor_raster=None,
+            receptor_names=None,
             latlon=crs == 4326,
-            receptor_type="grain size",
-        ).to_csv(
-            os.path.join(
-                output_path, "sediment_mobility_classified_at_sediment_grain_size.csv"
-            ),
-            index=False,
-        )
-
+            geometry=geometry,
+        ).to_csv(os.path.join(output_path, "shear_stress_difference.csv"), index=False)
         if not (
             (secondary_constraint_filename is None)
             or (secondary_constraint_filename == "")
         ):
-            bin_layer(
-                os.path.join(output_path, "sediment_mobility_difference.tif"),
-                receptor_filename=os.path.join(
-                    output_path, "shear_stress_risk_layer.tif"
-                ),
+            report_progress(
+                timer,
+                "statistics shear_stress_difference_at_secondary_constraint",
+                0.82,
+            )
+            bin_raster(
+                rasters["shear_stress_difference"],
+                receptor_raster=rasters["shear_stress_risk_layer"],
                 receptor_names=None,
                 limit_receptor_range=[0, np.inf],
                 latlon=crs == 4326,
+                geometry=geometry,
                 receptor_type="risk layer",
             ).to_csv(
                 os.path.join(
-                    output_path,
-                    "sediment_mobility_difference_at_shear_stress_risk_layer.csv",
+                    output_path, "shear_stress_difference_at_secondary_constraint.csv"
                 ),
                 index=False,
             )
-
-            bin_layer(
-                os.path.join(output_path, "shear_stress_risk_metric.tif"),
-                receptor_filename=os.path.join(
-                    output_path, "shear_stress_risk_layer.tif"
+        if not ((receptor_filename is None) or (receptor_filename == "")):
+            report_progress(
+                timer,
+                "statistics shear_stress_difference_at_sediment_grain_size",
+                0.83,
+            )
+            bin_raster(
+                rasters["shear_stress_difference"],
+                receptor_raster=rasters["sediment_grain_size"],
+                receptor_names=None,
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+                receptor_type="grain size",
+            ).to_csv(
+                os.path.join(
+                    output_path, "shear_stress_difference_at_sediment_grain_size.csv"
                 ),
+                index=False,
+            )
+
+            report_progress(timer, "statistics sediment_mobility_difference", 0.85)
+            bin_raster(
+                rasters["sediment_mobility_difference"],
+                receptor_raster=None,
                 receptor_names=None,
                 limit_receptor_range=[0, np.inf],
                 latlon=crs == 4326,
-                receptor_type="risk layer",
+                geometry=geometry,
+            ).to_csv(
+                os.path.join(output_path, "sediment_mobility_difference.csv"),
+                index=False,
+            )
+
+            report_progress(
+                timer,
+                "statistics sediment_mobility_difference_at_sediment_grain_size",
+                0.87,
+            )
+            bin_raster(
+                rasters["sediment_mobility_difference"],
+                receptor_raster=rasters["sediment_grain_size"],
+                receptor_names=None,
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+                receptor_type="grain size",
             ).to_csv(
                 os.path.join(
                     output_path,
-                    "shear_stress_risk_metric_at_shear_stress_risk_layer.csv",
+                    "sediment_mobility_difference_at_sediment_grain_size.csv",
                 ),
                 index=False,
             )
 
-            classify_layer_area_2nd_constraint(
-                raster_to_sample=os.path.join(
-                    output_path, "sediment_mobility_difference.tif"
-                ),
-                secondary_constraint_filename=os.path.join(
-                    output_path, "shear_stress_risk_layer.tif"
+            report_progress(timer, "statistics shear_stress_risk_metric", 0.88)
+            bin_raster(
+                rasters["shear_stress_risk_metric"],
+                receptor_raster=None,
+                receptor_names=None,
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+            ).to_csv(
+                os.path.join(output_path, "shear_stress_risk_metric.csv"), index=False
+            )
+
+            report_progress(
+                timer,
+                "statistics shear_stress_risk_metric_at_sediment_grain_size",
+                0.9,
+            )
+            bin_raster(
+                rasters["shear_stress_risk_metric"],
+                receptor_raster=rasters["sediment_grain_size"],
+                receptor_names=None,
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+                receptor_type="grain size",
+            ).to_csv(
+                os.path.join(
+                    output_path, "shear_stress_risk_metric_at_sediment_grain_size.csv"
                 ),
-                at_raster_values=[-3, -2, -1, 0, 1, 2, 3],
-                at_raster_value_names=[
+                index=False,
+            )
+
+            report_progress(timer, "statistics sediment_mobility_classified", 0.92)
+            classify_raster_area(
+                rasters["sediment_mobility_classified"],
+                at_values=[-3, -2, -1, 0, 1, 2, 3],
+                value_names=[
                     "New Deposition",
                     "Increased Deposition",
                     "Reduced Deposition",
@@ -822,17 +1144,124 @@ def run_shear_stress_stressor(
                     "Increased Erosion",
                     "New Erosion",
                 ],
-                limit_constraint_range=[0, np.inf],
                 latlon=crs == 4326,
-                receptor_type="risk layer",
+                geometry=geometry,
+            ).to_csv(
+                os.path.join(output_path, "sediment_mobility_classified.csv"),
+                index=False,
+            )
+
+            report_progress(
+                timer,
+                "statistics sediment_mobility_classified_at_sediment_grain_size",
+                0.93,
+            )
+            classify_raster_area(
+                rasters["sediment_mobility_classified"],
+                receptor_raster=rasters["sediment_grain_size"],
+                at_values=[-3, -2, -1, 0, 1, 2, 3],
+                value_names=[
+                    "New Deposition",
+                    "Increased Deposition",
+                    "Reduced Deposition",
+                    "No Change",
+                    "Reduced Erosion",
+                    "Increased Erosion",
+                    "New Erosion",
+                ],
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+                receptor_type="grain size",
             ).to_csv(
                 os.path.join(
                     output_path,
-                    "sediment_mobility_difference_at_shear_stress_risk_layer.csv",
+                    "sediment_mobility_classified_at_sediment_grain_size.csv",
                 ),
                 index=False,
             )
-    output = {}
+
+            if not (
+                (secondary_constraint_filename is None)
+                or (secondary_constraint_filename == "")
+            ):
+                report_progress(
+                    timer,
+                    "statistics sediment_mobility_difference_at_shear_stress_risk_layer",
+                    0.95,
+                )
+                bin_raster(
+                    rasters["sediment_mobility_difference"],
+                    receptor_raster=rasters["shear_stress_risk_layer"],
+                    receptor_names=None,
+                    limit_receptor_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path,
+                        "sediment_mobility_difference_at_shear_stress_risk_layer.csv",
+                    ),
+                    index=False,
+                )
+
+                report_progress(
+                    timer,
+                    "statistics shear_stress_risk_metric_at_shear_stress_risk_layer",
+                    0.97,
+                )
+                bin_raster(
+                    rasters["shear_stress_risk_metric"],
+                    receptor_raster=rasters["shear_stress_risk_layer"],
+                    receptor_names=None,
+                    limit_receptor_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path,
+                        "shear_stress_risk_metric_at_shear_stress_risk_layer.csv",
+                    ),
+                    index=False,
+                )
+
+                report_progress(
+                    timer,
+                    "statistics sediment_mobility_difference_at_shear_stress_risk_layer",
+                    0.98,
+                )
+                classify_raster_area_2nd_constraint(
+                    raster=rasters["sediment_mobility_difference"],
+                    secondary_constraint_raster=rasters["shear_stress_risk_layer"],
+                    at_raster_values=[-3, -2, -1, 0, 1, 2, 3],
+                    at_raster_value_names=[
+                        "New Deposition",
+                        "Increased Deposition",
+                        "Reduced Deposition",
+                        "No Change",
+                        "Reduced Erosion",
+                        "Increased Erosion",
+                        "New Erosion",
+                    ],
+                    limit_constraint_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path,
+                        "sediment_mobility_difference_at_shear_stress_risk_layer.csv",
+                    ),
+                    index=False,
+                )
+        timer.write(output_path)
+    finally:
+        # stop tracing and profiling if the run failed or was cancelled
+        timer.stop()
+    report_progress(progress_callback, "done", 1.0)
+    output = dict(bundle_layers)
     for val in output_rasters:
         output[os.path.basename(os.path.normpath(val)).split(".")[0]] = val
     return output
@@ -15,55 +15,251 @@ Dependencies:
 import os
 import sys
 import random
-from typing import List, Tuple, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Tuple, Dict, Optional, Union
 import numpy as np
 from numpy.typing import NDArray
 from pyproj import Geod
 import pandas as pd
 from pandas import DataFrame
-from matplotlib.tri import LinearTriInterpolator, TriAnalyzer, Triangulation
+from matplotlib.tri import TriAnalyzer, Triangulation
 from scipy.interpolate import griddata
+from scipy.spatial import cKDTree, Delaunay
+from scipy.sparse import csr_matrix
+from netCDF4 import Dataset  # pylint: disable=no-name-in-module
 from osgeo import gdal, osr
+from seat.modules.regrid_cache import RegridCache, get_regrid_cache
 
 
 def estimate_grid_spacing(
-    x: NDArray[np.float64], y: NDArray[np.float64], nsamples: int = 100
+    x: NDArray[np.float64],
+    y: NDArray[np.float64],
+    nsamples: int = 100,
+    method: str = "random",
+    seed: int = 10,
 ) -> float:
     """
     Estimate grid spacing for an unstructured grid to create a structured grid.
 
+    The distance from each sampled node to its nearest neighbour is found with
+    a KD-tree built over the unique node coordinates.
+
     Parameters
     ----------
     x, y : array
         Coordinates of the points.
     nsamples : int, optional
-        Number of random points to sample. Default is 100.
+        Number of points to sample. Default is 100. Not used when method is "all".
+    method : str, optional
+        Sampling method. The default is "random".
+            "random" : seeded random sample of nodes (reproduces earlier SEAT results).
+            "stratified" : one node from each cell of a sqrt(nsamples) by
+            sqrt(nsamples) grid over the bounding box of the nodes.
+            "all" : every node.
+    seed : int, optional
+        Seed of the random sample. The default is 10.
+
+    Raises
+    ------
+    ValueError
+        if the method is unknown, or "stratified" or "all" is given no finite
+        coordinates.
 
     Returns
     -------
     float
         Estimated median spacing between samples.
     """
-    random.seed(10)
-    coords = list(set(zip(x, y)))
-    if nsamples != len(x):
-        points = [
-            random.choice(coords) for i in range(nsamples)
-        ]  # pick N random points
+    if method == "random":
+        random.seed(seed)
+        coords = list(set(zip(x, y)))
+        if nsamples != len(x):
+            points = [
+                random.choice(coords) for i in range(nsamples)
+            ]  # pick N random points
+        else:
+            points = coords
+        coords = np.array(coords, dtype=float)
+        points = np.array(points, dtype=float)
+    elif method in ("stratified", "all"):
+        coords = np.unique(np.column_stack((x, y)).astype(float), axis=0)
+        coords = coords[np.all(np.isfinite(coords), axis=1)]
+        if coords.shape[0] == 0:
+            raise ValueError(
+                "No finite node coordinates to estimate the grid spacing from."
+            )
+        if method == "all":
+            points = coords
+        else:
+            ncells = max(int(np.ceil(np.sqrt(nsamples))), 1)
+            cmin = coords.min(axis=0)
+            cspan = np.where(np.ptp(coords, axis=0) > 0, np.ptp(coords, axis=0), 1)
+            cell = np.minimum(
+                ((coords - cmin) / cspan * ncells).astype(int), ncells - 1
+            )
+            order = np.random.default_rng(seed).permutation(coords.shape[0])
+            _, first = np.unique(
+                cell[order, 0] * ncells + cell[order, 1], return_index=True
+            )
+            points = coords[order[first]]
     else:
-        points = coords
-    md = []
-    for p0x, p0y in points:
-        minimum_distance = sys.maxsize
-        for px, py in coords:
-            distance = np.sqrt((p0x - px) ** 2 + (p0y - py) ** 2)
-            if (distance < minimum_distance) & (distance != 0):
-                minimum_distance = distance
-        md.append(minimum_distance)
+        raise ValueError(
+            f"Invalid method {method}. Must be 'random', 'stratified' or 'all'"
+        )
+    finite = np.all(np.isfinite(coords), axis=1)
+    tree = cKDTree(coords[finite])
+    md = np.full(points.shape[0], float(sys.maxsize))
+    finite_points = np.all(np.isfinite(points), axis=1)
+    if np.any(finite_points) and tree.n > 1:
+        # nearest neighbour other than the point itself (coordinates are unique)
+        distance, _ = tree.query(points[finite_points], k=2)
+        md[finite_points] = distance[:, 1]
     dxdy = np.median(md)
     return dxdy
 
 
+class UnstructuredGridRegridder:
+    """
+    Interpolates values from an unstructured grid onto a structured grid.
+
+    The triangulation, flat triangle mask and location of the structured grid
+    points are computed once and stored as a sparse matrix of barycentric
+    weights, so any number of value arrays on the same unstructured grid can be
+    interpolated with a matrix product.
+
+    Parameters
+    ----------
+    x : array
+        input x-coordinates.
+    y : array
+        input y-coordiantes.
+    dxdy : scalar
+        spacing between x and y.
+    flatness : scalar, optional
+        minimum circle ratio of triangles used in the interpolation, from 0-.5
+        (.5 is equilateral triangle). The default is 0.2.
+    cache : RegridCache, optional
+        cache for the interpolation weights. The default is None (cache
+        configured by the environment, see regrid_cache.py).
+
+    Attributes
+    ----------
+    x_grid : array
+        x-coordinate of the structured grid.
+    y_grid : array
+        y-coordinate of the structured grid.
+    weights : sparse matrix
+        barycentric weights [structured grid points, unstructured nodes].
+    """
+
+    def __init__(
+        self,
+        x: NDArray[np.float64],
+        y: NDArray[np.float64],
+        dxdy: float,
+        flatness: float = 0.2,
+        cache: Optional[RegridCache] = None,
+    ):
+        refx = np.arange(np.nanmin(x), np.nanmax(x) + dxdy, dxdy)
+        refy = np.arange(np.nanmin(y), np.nanmax(y) + dxdy, dxdy)
+        self.x_grid, self.y_grid = np.meshgrid(refx, refy)
+
+        cache = get_regrid_cache() if cache is None else cache
+        key = cache.make_key(
+            "unstructured",
+            np.asarray(x, dtype=float),
+            np.asarray(y, dtype=float),
+            dxdy=float(dxdy),
+            flatness=float(flatness),
+        )
+        cached = cache.load(key)
+        if cached is not None:
+            self.weights = csr_matrix(
+                (cached["data"], cached["indices"], cached["indptr"]),
+                shape=tuple(cached["shape"]),
+            )
+            self.outside = cached["outside"]
+            return
+
+        tri = Triangulation(x, y)
+        mask = TriAnalyzer(tri).get_flat_tri_mask(flatness)
+        tri.set_mask(mask)
+        triangle = tri.get_trifinder()(self.x_grid, self.y_grid).ravel()
+        inside = np.flatnonzero(triangle >= 0)
+        nodes = tri.triangles[triangle[inside]]
+
+        # barycentric weights of each structured point in its triangle
+        px = self.x_grid.ravel()[inside]
+        py = self.y_grid.ravel()[inside]
+        x0, x1, x2 = (tri.x[nodes[:, i]] for i in range(3))
+        y0, y1, y2 = (tri.y[nodes[:, i]] for i in range(3))
+        det = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+        w0 = ((y1 - y2) * (px - x2) + (x2 - x1) * (py - y2)) / det
+        w1 = ((y2 - y0) * (px - x2) + (x0 - x2) * (py - y2)) / det
+        weights = np.column_stack((w0, w1, 1 - w0 - w1))
+
+        # zero weights are kept so nan values propagate as in LinearTriInterpolator
+        self.weights = csr_matrix(
+            (weights.ravel(), (np.repeat(inside, 3), nodes.ravel())),
+            shape=(self.x_grid.size, tri.x.size),
+        )
+        self.outside = np.ones(self.x_grid.size, dtype=bool)
+        self.outside[inside] = False
+        cache.save(
+            key,
+            {
+                "data": self.weights.data,
+                "indices": self.weights.indices,
+                "indptr": self.weights.indptr,
+                "shape": np.array(self.weights.shape),
+                "outside": self.outside,
+            },
+        )
+
+    def regrid(self, z: NDArray[np.float64]) -> NDArray[np.float64]:
+        """
+        Interpolates values onto the structured grid.
+
+        Parameters
+        ----------
+        z : array
+            value at each unstructured node [nodes] or several values
+            [nodes, nvalues].
+
+        Returns
+        -------
+        array
+            interpolated value [rows, cols] or [rows, cols, nvalues],
+            nan outside of the triangulation.
+        """
+        z = np.asarray(z, dtype=float)
+        z_interp = self.weights @ z
+        z_interp[self.outside] = np.nan
+        return z_interp.reshape(self.x_grid.shape + z.shape[1:])
+
+    def regrid_fields(
+        self, fields: Dict[str, NDArray[np.float64]]
+    ) -> Dict[str, NDArray[np.float64]]:
+        """
+        Interpolates several values onto the structured grid in one pass.
+
+        Parameters
+        ----------
+        fields : Dict
+            key = name, val = value at each unstructured node.
+
+        Returns
+        -------
+        Dict
+            key = name, val = interpolated value [rows, cols].
+        """
+        z_interp = self.regrid(
+            np.column_stack([np.asarray(z, dtype=float) for z in fields.values()])
+        )
+        return {key: z_interp[:, :, ic] for ic, key in enumerate(fields)}
+
+
 def create_structured_array_from_unstructured(
     x: NDArray[np.float64],
     y: NDArray[np.float64],
@@ -98,15 +294,8 @@ def create_structured_array_from_unstructured(
 
     """
     # flatness is from 0-.5 .5 is equilateral triangle
-    refx = np.arange(np.nanmin(x), np.nanmax(x) + dxdy, dxdy)
-    refy = np.arange(np.nanmin(y), np.nanmax(y) + dxdy, dxdy)
-    refxg, refyg = np.meshgrid(refx, refy)
-    tri = Triangulation(x, y)
-    mask = TriAnalyzer(tri).get_flat_tri_mask(flatness)
-    tri.set_mask(mask)
-    tli = LinearTriInterpolator(tri, z)
-    z_interp = tli(refxg, refyg)
-    return refxg, refyg, z_interp.data
+    regridder = UnstructuredGridRegridder(x, y, dxdy, flatness=flatness)
+    return regridder.x_grid, regridder.y_grid, regridder.regrid(z)
 
 
 def redefine_structured_grid(
@@ -154,6 +343,273 @@ def redefine_structured_grid(
     return x_new, y_new, z_new
 
 
+def rectilinear_axes(
+    x_grid: NDArray[np.float64], y_grid: NDArray[np.float64]
+) -> Optional[Tuple[NDArray[np.float64], NDArray[np.float64]]]:
+    """
+    Returns the axes of a rectilinear grid, i.e. x only varies along columns,
+    y only varies along rows and both are strictly monotonic. The spacing does
+    not need to be constant.
+
+    Parameters
+    ----------
+    x_grid : array
+        x-coordinates.
+    y_grid : array
+        y-coordinates.
+
+    Returns
+    -------
+    Tuple or None
+        x-axis [cols] and y-axis [rows], None if the grid is not rectilinear.
+
+    """
+    x_grid = np.asarray(x_grid, dtype=float)
+    y_grid = np.asarray(y_grid, dtype=float)
+    if (
+        (x_grid.ndim != 2)
+        or (x_grid.shape != y_grid.shape)
+        or (x_grid.shape[0] < 2)
+        or (x_grid.shape[1] < 2)
+    ):
+        return None
+    if not (np.all(x_grid == x_grid[:1, :]) and np.all(y_grid == y_grid[:, :1])):
+        return None
+    x_axis = x_grid[0, :]
+    y_axis = y_grid[:, 0]
+    for axis in (x_axis, y_axis):
+        spacing = np.diff(axis)
+        # nan spacing fails both comparisons
+        if not (np.all(spacing > 0) or np.all(spacing < 0)):
+            return None
+    return x_axis, y_axis
+
+
+class StructuredGridResampler:
+    """
+    Interpolates values from a structured grid onto new points.
+
+    The nearest point indices or linear interpolation weights are computed once
+    (or loaded from the regridding cache) and applied to any number of value
+    arrays on the same grid. Results are identical to scipy griddata, except
+    on rectilinear grids (see rectilinear_axes) where the indices come from a
+    search along each axis and linear interpolation is bilinear within each
+    cell instead of linear on an arbitrary triangulation of it. The
+    rectilinear weights are not cached, they are cheaper to compute than to
+    load.
+
+    Parameters
+    ----------
+    x_grid : array
+        x-coordinates.
+    y_grid : array
+        y-coordinates.
+    x_grid_out : array
+        x-coordinates to interpolate at.
+    y_grid_out : array
+        y-coordinates to interpolate at.
+    interpmethod : str, optional
+        interpolation method to use, 'nearest' or 'linear'. The default is
+        'nearest'.
+    cache : RegridCache, optional
+        cache for the interpolation weights. The default is None (cache
+        configured by the environment, see regrid_cache.py).
+    exact : bool, optional
+        True to use the KD-tree and Delaunay triangulation on rectilinear
+        grids too, reproducing scipy griddata exactly (including ties between
+        equally near points and the diagonal splitting each cell). The default
+        is False.
+
+    Raises
+    ------
+    ValueError
+        if interpmethod is not 'nearest' or 'linear'.
+    """
+
+    def __init__(
+        self,
+        x_grid: NDArray[np.float64],
+        y_grid: NDArray[np.float64],
+        x_grid_out: NDArray[np.float64],
+        y_grid_out: NDArray[np.float64],
+        interpmethod: str = "nearest",
+        cache: Optional[RegridCache] = None,
+        exact: bool = False,
+    ):
+        if interpmethod not in ("nearest", "linear"):
+            raise ValueError(
+                f"Invalid interpolation method {interpmethod}. Must be 'nearest' or 'linear'"
+            )
+        self.interpmethod = interpmethod
+        self.shape = np.shape(x_grid_out)
+        axes = None if exact else rectilinear_axes(x_grid, y_grid)
+        if axes is not None:
+            self._init_rectilinear(
+                *axes,
+                np.broadcast_to(x_grid_out, self.shape).astype(float).ravel(),
+                np.broadcast_to(y_grid_out, self.shape).astype(float).ravel(),
+            )
+            return
+
+        points = np.column_stack(
+            (
+                np.asarray(x_grid, dtype=float).ravel(),
+                np.asarray(y_grid, dtype=float).ravel(),
+            )
+        )
+        xi = np.column_stack(
+            (
+                np.broadcast_to(x_grid_out, self.shape).astype(float).ravel(),
+                np.broadcast_to(y_grid_out, self.shape).astype(float).ravel(),
+            )
+        )
+
+        cache = get_regrid_cache() if cache is None else cache
+        key = cache.make_key(interpmethod, points, xi)
+        cached = cache.load(key)
+        if cached is not None:
+            self.indices = cached["indices"]
+            self.weights = cached["weights"]
+            self.valid = cached["valid"]
+            return
+
+        if interpmethod == "nearest":
+            distance, indices = cKDTree(points).query(xi)
+            self.valid = np.isfinite(distance)
+            self.indices = indices[self.valid, np.newaxis]
+            self.weights = np.ones(self.indices.shape)
+        else:
+            tri = Delaunay(points)
+            simplex = tri.find_simplex(xi)
+            self.valid = simplex >= 0
+            transform = tri.transform[simplex[self.valid]]
+            delta = xi[self.valid] - transform[:, 2]
+            w0 = transform[:, 0, 0] * delta[:, 0] + transform[:, 0, 1] * delta[:, 1]
+            w1 = transform[:, 1, 0] * delta[:, 0] + transform[:, 1, 1] * delta[:, 1]
+            self.indices = tri.simplices[simplex[self.valid]]
+            self.weights = np.column_stack((w0, w1, 1.0 - w0 - w1))
+        cache.save(
+            key, {"indices": self.indices, "weights": self.weights, "valid": self.valid}
+        )
+
+    def _init_rectilinear(
+        self,
+        x_axis: NDArray[np.float64],
+        y_axis: NDArray[np.float64],
+        x_out: NDArray[np.float64],
+        y_out: NDArray[np.float64],
+    ) -> None:
+        """
+        Computes the indices and weights on a rectilinear grid with one search
+        along each axis (no KD-tree or triangulation).
+        """
+        ncols = x_axis.size
+        if self.interpmethod == "nearest":
+            col = self._axis_nearest(x_axis, x_out)
+            row = self._axis_nearest(y_axis, y_out)
+            self.valid = np.isfinite(x_out) & np.isfinite(y_out)
+            self.indices = (row * ncols + col)[self.valid, np.newaxis]
+            self.weights = np.ones(self.indices.shape)
+        else:
+            col0, col1, x_weight, x_inside = self._axis_linear(x_axis, x_out)
+            row0, row1, y_weight, y_inside = self._axis_linear(y_axis, y_out)
+            self.valid = x_inside & y_inside
+            col0, col1, x_weight = (
+                col0[self.valid],
+                col1[self.valid],
+                x_weight[self.valid],
+            )
+            row0, row1, y_weight = (
+                row0[self.valid],
+                row1[self.valid],
+                y_weight[self.valid],
+            )
+            self.indices = np.column_stack(
+                (
+                    row0 * ncols + col0,
+                    row0 * ncols + col1,
+                    row1 * ncols + col0,
+                    row1 * ncols + col1,
+                )
+            )
+            self.weights = np.column_stack(
+                (
+                    (1 - y_weight) * (1 - x_weight),
+                    (1 - y_weight) * x_weight,
+                    y_weight * (1 - x_weight),
+                    y_weight * x_weight,
+                )
+            )
+
+    @staticmethod
+    def _axis_nearest(
+        axis: NDArray[np.float64], points: NDArray[np.float64]
+    ) -> NDArray[np.int64]:
+        """
+        Index of the nearest axis value to each point (clamped to the axis).
+        """
+        descending = axis[-1] < axis[0]
+        if descending:
+            axis = axis[::-1]
+        upper = np.clip(np.searchsorted(axis, points), 1, axis.size - 1)
+        lower = upper - 1
+        index = np.where(points - axis[lower] <= axis[upper] - points, lower, upper)
+        return axis.size - 1 - index if descending else index
+
+    @staticmethod
+    def _axis_linear(
+        axis: NDArray[np.float64], points: NDArray[np.float64]
+    ) -> Tuple[
+        NDArray[np.int64], NDArray[np.int64], NDArray[np.float64], NDArray[np.bool_]
+    ]:
+        """
+        Indices of the axis values either side of each point, the weight of
+        the second one and whether the point is within the axis.
+        """
+        descending = axis[-1] < axis[0]
+        if descending:
+            axis = axis[::-1]
+        upper = np.clip(np.searchsorted(axis, points, side="right"), 1, axis.size - 1)
+        lower = upper - 1
+        weight = (points - axis[lower]) / (axis[upper] - axis[lower])
+        inside = (points >= axis[0]) & (points <= axis[-1])
+        if descending:
+            return axis.size - 1 - lower, axis.size - 1 - upper, weight, inside
+        return lower, upper, weight, inside
+
+    def resample(
+        self, z: NDArray[np.float64], fill_value: float = 0
+    ) -> NDArray[np.float64]:
+        """
+        Interpolates values onto the output points.
+
+        Parameters
+        ----------
+        z : array
+            value at each input grid point.
+        fill_value : scalar, optional
+            value outside of the input grid for linear interpolation. The
+            default is 0.
+
+        Returns
+        -------
+        array
+            interpolated z-value at the output points.
+        """
+        z = np.asarray(z, dtype=float).ravel()
+        z_out = np.full(
+            self.valid.shape,
+            np.nan if self.interpmethod == "nearest" else fill_value,
+            dtype=float,
+        )
+        z_valid = np.zeros(self.indices.shape[0])
+        # accumulate in vertex order to match griddata bit for bit
+        for ic in range(self.indices.shape[1]):
+            z_valid = z_valid + self.weights[:, ic] * z[self.indices[:, ic]]
+        z_out[self.valid] = z_valid
+        return z_out.reshape(self.shape)
+
+
 def resample_structured_grid(
     x_grid: NDArray[np.float64],
     y_grid: NDArray[np.float64],
@@ -186,13 +642,18 @@ def resample_structured_grid(
         interpolated z-value on X/Y _grid_out.
 
     """
-    return griddata(
-        (x_grid.flatten(), y_grid.flatten()),
-        z.flatten(),
-        (x_grid_out, y_grid_out),
-        method=interpmethod,
-        fill_value=0,
+    if interpmethod not in ("nearest", "linear"):
+        return griddata(
+            (x_grid.flatten(), y_grid.flatten()),
+            z.flatten(),
+            (x_grid_out, y_grid_out),
+            method=interpmethod,
+            fill_value=0,
+        )
+    resampler = StructuredGridResampler(
+        x_grid, y_grid, x_grid_out, y_grid_out, interpmethod=interpmethod
     )
+    return resampler.resample(z)
 
 
 def calc_receptor_array(
@@ -231,23 +692,13 @@ def calc_receptor_array(
     if not ((receptor_filename is None) or (receptor_filename == "")):
         if receptor_filename.endswith(".tif"):
             data = gdal.Open(receptor_filename)
-            img = data.GetRasterBand(1)
-            receptor_array = img.ReadAsArray()
+            x_grid, y_grid, receptor_array = read_raster_window(
+                data, x, y, latlon=latlon
+            )
+            data = None
             receptor_array[receptor_array < 0] = 0
-            (upper_left_x, x_size, _, upper_left_y, _, y_size) = data.GetGeoTransform()
-            cols = data.RasterXSize
-            rows = data.RasterYSize
-            r_rows = np.arange(rows) * y_size + upper_left_y + (y_size / 2)
-            r_cols = np.arange(cols) * x_size + upper_left_x + (x_size / 2)
-            if latlon:
-                r_cols = np.where(r_cols < 0, r_cols + 360, r_cols)
-            x_grid, y_grid = np.meshgrid(r_cols, r_rows)
-            receptor_array = griddata(
-                (x_grid.flatten(), y_grid.flatten()),
-                receptor_array.flatten(),
-                (x, y),
-                method="nearest",
-                fill_value=0,
+            receptor_array = StructuredGridResampler(x_grid, y_grid, x, y).resample(
+                receptor_array
             )
 
         elif receptor_filename.endswith(".csv"):
@@ -268,6 +719,245 @@ def calc_receptor_array(
     return receptor_array
 
 
+def pair_run_files(files_nodev: List[str], files_dev: List[str]) -> DataFrame:
+    """
+    Pairs the no device and device run files by run number.
+
+    File names must be formatted as some_name_RunNum_map.nc, where the run number
+    comes at the last underscore before _map.nc.
+
+    Parameters
+    ----------
+    files_nodev : list
+        baseline/no device model run file names.
+    files_dev : list
+        with device model run file names.
+
+    Returns
+    -------
+    DataFrame
+        files_nodev, run_num_nodev, files_dev and run_num_dev for each run,
+        sorted by run number.
+
+    """
+    run_num_nodev = np.zeros((len(files_nodev)))
+    for ic, file in enumerate(files_nodev):
+        run_num_nodev[ic] = int(file.split(".")[0].split("_")[-2])
+    run_num_dev = np.zeros((len(files_dev)))
+    for ic, file in enumerate(files_dev):
+        run_num_dev[ic] = int(file.split(".")[0].split("_")[-2])
+
+    # ensure run oder for nodev matches dev files
+    if np.any(run_num_nodev != run_num_dev):
+        adjust_dev_order = []
+        for ri in run_num_nodev:
+            adjust_dev_order = np.append(
+                adjust_dev_order, np.flatnonzero(run_num_dev == ri)
+            )
+        files_dev = [files_dev[int(i)] for i in adjust_dev_order]
+        run_num_dev = [run_num_dev[int(i)] for i in adjust_dev_order]
+    df = pd.DataFrame(
+        {
+            "files_nodev": files_nodev,
+            "run_num_nodev": run_num_nodev,
+            "files_dev": files_dev,
+            "run_num_dev": run_num_dev,
+        }
+    )
+    return df.sort_values(by="run_num_dev")
+
+
+def read_bc_probabilities(
+    probabilities_file: str, run_numbers: Optional[NDArray[np.float64]] = None
+) -> DataFrame:
+    """
+    Reads the probability of each boundary condition run.
+
+    Parameters
+    ----------
+    probabilities_file : str
+        File path to probabilities/bondary condition *.csv file. If empty, the
+        run numbers are assumed to be return intervals.
+    run_numbers : array, optional
+        run number of each run in the order they are stored, used when
+        probabilities_file is empty. The default is None.
+
+    Raises
+    ------
+    FileNotFoundError
+        if probabilities_file does not exist.
+    ValueError
+        if probabilities_file is empty and run_numbers is not given.
+
+    Returns
+    -------
+    bc_probability : DataFrame
+        run_num (zero-based index of the run) and probability of each run to
+        include.
+
+    """
+    if not probabilities_file == "":
+        if not os.path.exists(probabilities_file):
+            raise FileNotFoundError(f"The file {probabilities_file} does not exist.")
+        # Load BC file with probabilities and find appropriate probability
+        bc_probability = pd.read_csv(probabilities_file, delimiter=",")
+        bc_probability["run_num"] = bc_probability["run number"] - 1
+        bc_probability = bc_probability.sort_values(by="run number")
+        bc_probability["probability"] = bc_probability["% of yr"].values / 100
+        # bc_probability
+        if "Exclude" in bc_probability.columns:
+            bc_probability = bc_probability[
+                ~(
+                    (bc_probability["Exclude"] == "x")
+                    | (bc_probability["Exclude"] == "X")
+                )
+            ]
+    else:  # assume run_num in file name is return interval
+        if run_numbers is None:
+            raise ValueError(
+                "A probabilities file is required when the runs are not separate files."
+            )
+        run_numbers = np.asarray(run_numbers)
+        bc_probability = pd.DataFrame()
+        # ignore number and start sequentially from zero
+        bc_probability["run_num"] = np.arange(0, run_numbers.shape[0])
+        # assumes run_num in name is the return interval
+        bc_probability["probability"] = 1 / run_numbers
+        bc_probability["probability"] = (
+            bc_probability["probability"] / bc_probability["probability"].sum()
+        )  # rescale to ensure = 1
+    return bc_probability
+
+
+class RunCancelled(Exception):
+    """
+    Raised by a progress callback to stop a module run at the next stage.
+    """
+
+
+def report_progress(
+    progress_callback: Optional[Callable[[str, float], None]],
+    stage: str,
+    fraction: float,
+) -> None:
+    """
+    Reports the progress of a module run.
+
+    Parameters
+    ----------
+    progress_callback : callable or None
+        called with the stage name and the fraction of the run completed
+        (0 to 1). It can raise RunCancelled to stop the run.
+    stage : str
+        name of the stage starting, e.g. 'file loading' or 'raster writing'.
+    fraction : float
+        fraction of the run completed.
+
+    """
+    if progress_callback is not None:
+        progress_callback(stage, fraction)
+
+
+def scale_progress(
+    progress_callback: Optional[Callable[[str, float], None]],
+    start: float,
+    stop: float,
+) -> Optional[Callable[[str, float], None]]:
+    """
+    Maps the progress of one step of a run onto its share of the whole run,
+    e.g. so calculate_*_stressors can report per run file while called from
+    run_*_stressor.
+
+    Parameters
+    ----------
+    progress_callback : callable or None
+        progress callback of the whole run, see report_progress.
+    start : float
+        fraction of the whole run completed when the step starts.
+    stop : float
+        fraction of the whole run completed when the step ends.
+
+    Returns
+    -------
+    callable or None
+        progress callback of the step, None if progress_callback is None.
+
+    """
+    if progress_callback is None:
+        return None
+
+    def scaled_progress_callback(stage: str, fraction: float) -> None:
+        progress_callback(stage, start + (stop - start) * fraction)
+
+    return scaled_progress_callback
+
+
+def map_runs(
+    func: Callable[..., Any],
+    run_args: List[Tuple[Any, ...]],
+    max_workers: int = 1,
+    use_processes: bool = False,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+) -> Iterator[Any]:
+    """
+    Reads (and reduces) each run by calling func with each tuple of arguments,
+    using a pool of workers when max_workers is greater than one. At most
+    max_workers runs are submitted ahead of the one being yielded, so only a
+    bounded number of run results is held while they are folded into a
+    running sum.
+
+    Parameters
+    ----------
+    func : callable
+        module level function that reads a single run. Must be picklable when
+        use_processes is True.
+    run_args : list
+        tuple of arguments passed to func for each run.
+    max_workers : int, optional
+        number of runs read concurrently. The default is 1 (read serially in
+        the calling thread).
+    use_processes : bool, optional
+        True to use a process pool, False to use a thread pool (e.g. when
+        running inside QGIS where new processes cannot be spawned).
+        The default is False.
+    progress_callback : callable, optional
+        called with 'run file i of n' before each run is read (or waited
+        for), see report_progress. The default is None.
+
+    Yields
+    ------
+    object
+        result of func for each run, in the order of run_args.
+
+    """
+    nruns = len(run_args)
+    if (max_workers is None) or (max_workers <= 1) or (nruns <= 1):
+        for ic, args in enumerate(run_args):
+            report_progress(
+                progress_callback, f"run file {ic + 1} of {nruns}", ic / nruns
+            )
+            yield func(*args)
+        return
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    workers = min(max_workers, nruns)
+    executor = executor_class(max_workers=workers)
+    try:
+        pending = deque(executor.submit(func, *args) for args in run_args[:workers])
+        for ic in range(nruns):
+            report_progress(
+                progress_callback, f"run file {ic + 1} of {nruns}", ic / nruns
+            )
+            result = pending.popleft().result()
+            # keep the workers busy while the caller uses this result
+            if ic + workers < nruns:
+                pending.append(executor.submit(func, *run_args[ic + workers]))
+            yield result
+    finally:
+        # runs not started yet are dropped if the caller stops early
+        # (e.g. RunCancelled raised by progress_callback)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def trim_zeros(
     x: NDArray[np.float64],
     y: NDArray[np.float64],
@@ -286,9 +976,9 @@ def trim_zeros(
     y : array
         y-coordiantes.
     z1 : array
-        first value (e.g. uvar).
+        first value (e.g. uvar), with rows and columns as the last two dimensions.
     z2 : array
-        second value (e.g. vvar).
+        second value (e.g. vvar), with rows and columns as the last two dimensions.
 
     Returns
     -------
@@ -303,11 +993,69 @@ def trim_zeros(
 
     """
     # edges of structured array have zeros, not sure if universal issue
-    return x[1:-1, 1:-1], y[1:-1, 1:-1], z1[:, :, 1:-1, 1:-1], z2[:, :, 1:-1, 1:-1]
+    return x[1:-1, 1:-1], y[1:-1, 1:-1], z1[..., 1:-1, 1:-1], z2[..., 1:-1, 1:-1]
+
+
+# GTiff creation options of the output rasters. "default" is a plain striped
+# uncompressed file, the compressed profiles are tiled and use the floating
+# point predictor (horizontal differencing for integer rasters).
+_TILED_OPTIONS = ["TILED=YES", "BLOCKXSIZE=256", "BLOCKYSIZE=256", "BIGTIFF=IF_SAFER"]
+GEOTIFF_PROFILES: Dict[str, List[str]] = {
+    "default": [],
+    "tiled": _TILED_OPTIONS,
+    "deflate": _TILED_OPTIONS
+    + ["COMPRESS=DEFLATE", "PREDICTOR=3", "NUM_THREADS=ALL_CPUS"],
+    "zstd": _TILED_OPTIONS + ["COMPRESS=ZSTD", "PREDICTOR=3", "NUM_THREADS=ALL_CPUS"],
+}
+
+
+def geotiff_creation_options(
+    profile: Union[str, List[str]] = "default", e_type: int = gdal.GDT_Float32
+) -> List[str]:
+    """
+    Returns the GTiff creation options of an output profile.
+
+    Parameters
+    ----------
+    profile : str or list, optional
+        name of a profile in GEOTIFF_PROFILES ('default', 'tiled', 'deflate'
+        or 'zstd') or a list of GTiff creation options. The default is
+        'default'.
+    e_type : gdal, optional
+        type of geotiff and precision. The default is gdal.GDT_Float32.
+
+    Raises
+    ------
+    ValueError
+        if the profile name is unknown.
+
+    Returns
+    -------
+    list
+        creation options, e.g. ['TILED=YES', 'COMPRESS=DEFLATE'].
+
+    """
+    if isinstance(profile, str):
+        if profile not in GEOTIFF_PROFILES:
+            raise ValueError(
+                f"Invalid GeoTIFF profile {profile}. Must be one of {list(GEOTIFF_PROFILES)}"
+            )
+        options = list(GEOTIFF_PROFILES[profile])
+    else:
+        options = list(profile)
+    if e_type not in (gdal.GDT_Float32, gdal.GDT_Float64):
+        # the floating point predictor is only valid for floating point data
+        options = ["PREDICTOR=2" if opt == "PREDICTOR=3" else opt for opt in options]
+    return options
 
 
 def create_raster(
-    output_path: str, cols: int, rows: int, nbands: int, e_type: int = gdal.GDT_Float32
+    output_path: str,
+    cols: int,
+    rows: int,
+    nbands: int,
+    e_type: int = gdal.GDT_Float32,
+    profile: Union[str, List[str]] = "default",
 ) -> gdal.Dataset:
     """
     Create a gdal raster object.
@@ -324,6 +1072,9 @@ def create_raster(
         number of bads to write.
     e_type : gdal, optional
         type of geotiff and precision. The default is gdal.GDT_Float32.
+    profile : str or list, optional
+        output profile name or GTiff creation options, see
+        geotiff_creation_options. The default is 'default'.
 
     Returns
     -------
@@ -341,6 +1092,7 @@ def create_raster(
         int(rows),
         nbands,
         e_type,
+        options=geotiff_creation_options(profile, e_type),
     )
 
     # spatial_reference = osr.SpatialReference()
@@ -359,6 +1111,7 @@ def numpy_array_to_raster(
     spatial_reference_system_wkid: int,
     output_path: str,
     nodata_val: float = None,
+    approx_stats: bool = False,
 ) -> str:
     """
 
@@ -377,6 +1130,11 @@ def numpy_array_to_raster(
         EPSG code.
     output_path : str
         Absolute filepath of geotiff to create.
+    nodata_val : scalar, optional
+        no data value of the band. The default is None.
+    approx_stats : bool, optional
+        True to compute the band statistics from a subsample (faster for
+        large rasters), False for exact statistics. The default is False.
 
     Raises
     ------
@@ -404,26 +1162,364 @@ def numpy_array_to_raster(
     spatial_reference = osr.SpatialReference()
     spatial_reference.ImportFromEPSG(spatial_reference_system_wkid)
 
-    output_raster.SetProjection(
-        spatial_reference.ExportToWkt(),
-    )  # exports the cords to the file
-    output_raster.SetGeoTransform(geotransform)
-    output_band = output_raster.GetRasterBand(1)
-    if nodata_val is not None:
-        output_band.SetNoDataValue(nodata_val)  # Not an issue, may be in other cases?
-    output_band.WriteArray(numpy_array)
+    output_raster.SetProjection(
+        spatial_reference.ExportToWkt(),
+    )  # exports the cords to the file
+    output_raster.SetGeoTransform(geotransform)
+    output_band = output_raster.GetRasterBand(1)
+    if nodata_val is not None:
+        output_band.SetNoDataValue(nodata_val)  # Not an issue, may be in other cases?
+    output_band.WriteArray(numpy_array)
+
+    output_band.FlushCache()
+    output_band.ComputeStatistics(
+        approx_stats,
+    )  # exact by default, approximate statistics are faster for large rasters
+
+    if not os.path.exists(output_path):
+        raise RuntimeError(f"Failed to create raster: {output_path}")
+    # this closes the file
+    output_raster = None
+    return output_path
+
+
+def write_multiband_raster(
+    output_path: str,
+    arrays: Dict[str, NDArray[np.float64]],
+    bounds: Tuple[float, float],
+    cell_resolution: Tuple[float, float],
+    spatial_reference_system_wkid: int,
+    profile: Union[str, List[str]] = "default",
+    approx_stats: bool = False,
+) -> Dict[str, str]:
+    """
+    Writes arrays on the same grid as the bands of one geotiff.
+
+    Parameters
+    ----------
+    output_path : str
+        Absolute filepath of geotiff to create.
+    arrays : Dict
+        key = band name, val = numpy array [rows, cols] as for
+        numpy_array_to_raster.
+    bounds : array
+        [xmin, ymin].
+    cell_resolution : array
+        [dx, dy].
+    spatial_reference_system_wkid : scalar
+        EPSG code.
+    profile : str or list, optional
+        output profile name or GTiff creation options, see
+        geotiff_creation_options. The default is 'default'.
+    approx_stats : bool, optional
+        True to compute approximate band statistics. The default is False.
+
+    Raises
+    ------
+    Exception
+        "Failed to create raster: %s" % output_path.
+
+    Returns
+    -------
+    Dict
+        key = band name, val = GDAL dataset name of the single band
+        (vrt://<output_path>?bands=<band>), which QGIS opens as a layer.
+
+    """
+    rows, cols = np.shape(next(iter(arrays.values())))
+    # each layer reads a single band
+    options = geotiff_creation_options(profile) + ["INTERLEAVE=BAND"]
+    output_raster = gdal.GetDriverByName(str("GTiff")).Create(
+        output_path, int(cols), int(rows), len(arrays), gdal.GDT_Float32, options
+    )
+    spatial_reference = osr.SpatialReference()
+    spatial_reference.ImportFromEPSG(spatial_reference_system_wkid)
+    output_raster.SetProjection(spatial_reference.ExportToWkt())
+    output_raster.SetGeoTransform(
+        (
+            bounds[0],
+            cell_resolution[0],
+            0,
+            bounds[1] + cell_resolution[1],
+            0,
+            -1 * cell_resolution[1],
+        )
+    )
+    layers = {}
+    for band_number, (name, numpy_array) in enumerate(arrays.items(), start=1):
+        output_band = output_raster.GetRasterBand(band_number)
+        output_band.SetDescription(name)
+        output_band.WriteArray(numpy_array)
+        output_band.FlushCache()
+        output_band.ComputeStatistics(approx_stats)
+        layers[name] = f"vrt://{output_path}?bands={band_number}"
+    if not os.path.exists(output_path):
+        raise RuntimeError(f"Failed to create raster: {output_path}")
+    # this closes the file
+    output_raster = None
+    return layers
+
+
+def write_netcdf_bundle(
+    output_path: str,
+    arrays: Dict[str, NDArray[np.float64]],
+    bounds: Tuple[float, float],
+    cell_resolution: Tuple[float, float],
+    spatial_reference_system_wkid: int,
+    complevel: int = 4,
+) -> Dict[str, str]:
+    """
+    Writes arrays on the same grid as the variables of one compressed
+    CF-NetCDF file.
+
+    Parameters
+    ----------
+    output_path : str
+        Absolute filepath of netcdf to create.
+    arrays : Dict
+        key = variable name, val = numpy array [rows, cols] as for
+        numpy_array_to_raster (first row is the top of the grid).
+    bounds : array
+        [xmin, ymin].
+    cell_resolution : array
+        [dx, dy].
+    spatial_reference_system_wkid : scalar
+        EPSG code.
+    complevel : int, optional
+        zlib compression level. The default is 4.
+
+    Returns
+    -------
+    Dict
+        key = variable name, val = GDAL dataset name of the variable
+        (NETCDF:"<output_path>":<name>), which QGIS opens as a layer.
+
+    """
+    rx, ry, _ = raster_from_array(next(iter(arrays.values())), bounds, cell_resolution)
+    spatial_reference = osr.SpatialReference()
+    spatial_reference.ImportFromEPSG(spatial_reference_system_wkid)
+    geographic = spatial_reference.IsGeographic()
+
+    layers = {}
+    with Dataset(output_path, "w", format="NETCDF4") as nc:
+        nc.Conventions = "CF-1.8"
+        nc.createDimension("y", rx.shape[0])
+        nc.createDimension("x", rx.shape[1])
+        x_var = nc.createVariable("x", "f8", ("x",))
+        y_var = nc.createVariable("y", "f8", ("y",))
+        x_var[:] = rx[0, :]
+        y_var[:] = ry[:, 0]
+        if geographic:
+            x_var.standard_name, x_var.units = "longitude", "degrees_east"
+            y_var.standard_name, y_var.units = "latitude", "degrees_north"
+        else:
+            x_var.standard_name = "projection_x_coordinate"
+            y_var.standard_name = "projection_y_coordinate"
+            x_var.units = y_var.units = "m"
+        crs_var = nc.createVariable("crs", "i4")
+        crs_var.crs_wkt = spatial_reference.ExportToWkt()
+        crs_var.spatial_ref = crs_var.crs_wkt
+        crs_var.epsg_code = f"EPSG:{spatial_reference_system_wkid}"
+        for name, numpy_array in arrays.items():
+            var = nc.createVariable(
+                name,
+                "f4",
+                ("y", "x"),
+                zlib=True,
+                complevel=complevel,
+                fill_value=np.float32(np.nan),
+            )
+            var.grid_mapping = "crs"
+            var[:] = np.asarray(numpy_array, dtype=np.float32)
+            layers[name] = f'NETCDF:"{output_path}":{name}'
+    return layers
+
+
+def layer_overview_resampling(
+    layer_name: str, overview_resampling: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Returns the overview resampling method of an output layer.
+
+    Parameters
+    ----------
+    layer_name : str
+        name of the output layer, e.g. 'sediment_mobility_classified'.
+    overview_resampling : Dict, optional
+        key = layer name, val = resampling method, overrides the default.
+        The default is None.
+
+    Returns
+    -------
+    str
+        'nearest' for classified layers and risk layers (values are classes
+        that must not be averaged), 'average' for continuous layers.
+
+    """
+    if (overview_resampling is not None) and (layer_name in overview_resampling):
+        return overview_resampling[layer_name]
+    if layer_name.endswith(("_classified", "_risk_layer")):
+        return "nearest"
+    return "average"
+
+
+def convert_to_cog(
+    raster_path: str, resampling: str = "average", compress: str = "DEFLATE"
+) -> str:
+    """
+    Rewrites a GeoTIFF as a Cloud-Optimized GeoTIFF with internal overviews.
+
+    The overviews are stored ahead of the full resolution tiles so zoomed out
+    views only read the overview levels.
+
+    Parameters
+    ----------
+    raster_path : str
+        Absolute filepath of the geotiff, replaced in place.
+    resampling : str, optional
+        overview resampling method ('nearest', 'average', 'mode', ...). The
+        default is 'average'.
+    compress : str, optional
+        compression of the tiles. The default is 'DEFLATE'.
+
+    Returns
+    -------
+    raster_path : str
+        filepath of the geotiff.
+
+    """
+    cog_path = f"{os.path.splitext(raster_path)[0]}.cog.tif"
+    driver = gdal.GetDriverByName(str("COG"))
+    source = gdal.Open(raster_path)
+    if driver is not None:
+        cog = driver.CreateCopy(
+            cog_path,
+            source,
+            options=[
+                f"COMPRESS={compress}",
+                "PREDICTOR=YES",
+                "BLOCKSIZE=256",
+                "BIGTIFF=IF_SAFER",
+                "NUM_THREADS=ALL_CPUS",
+                f"OVERVIEW_RESAMPLING={resampling.upper()}",
+            ],
+        )
+    else:
+        # GDAL < 3.1, build the overviews and copy them into a tiled GTiff
+        factors = []
+        factor = 2
+        while max(source.RasterXSize, source.RasterYSize) / factor >= 256:
+            factors.append(factor)
+            factor *= 2
+        source = None
+        source = gdal.Open(raster_path, gdal.GA_Update)
+        source.BuildOverviews(resampling.upper(), factors or [2])
+        cog = gdal.GetDriverByName(str("GTiff")).CreateCopy(
+            cog_path,
+            source,
+            options=[
+                "TILED=YES",
+                "BLOCKXSIZE=256",
+                "BLOCKYSIZE=256",
+                "COPY_SRC_OVERVIEWS=YES",
+                f"COMPRESS={compress}",
+                "BIGTIFF=IF_SAFER",
+            ],
+        )
+    if cog is None:
+        raise RuntimeError(f"Failed to create cloud optimized raster: {raster_path}")
+    # this closes the files
+    cog = None
+    source = None
+    os.replace(cog_path, raster_path)
+    return raster_path
+
+
+def write_result_bundle(
+    output_path: str,
+    arrays: Dict[str, NDArray[np.float64]],
+    bounds: Tuple[float, float],
+    cell_resolution: Tuple[float, float],
+    spatial_reference_system_wkid: int,
+    output_format: str = "multiband",
+    profile: Union[str, List[str]] = "default",
+    approx_stats: bool = False,
+    cog: bool = False,
+    overview_resampling: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """
+    Writes all output arrays of a module to one file.
+
+    Parameters
+    ----------
+    output_path : str
+        Absolute filepath of the bundle without extension.
+    arrays : Dict
+        key = layer name, val = numpy array as for numpy_array_to_raster.
+    bounds : array
+        [xmin, ymin].
+    cell_resolution : array
+        [dx, dy].
+    spatial_reference_system_wkid : scalar
+        EPSG code.
+    output_format : str, optional
+        'multiband' for a multi-band geotiff (*.tif) or 'netcdf' for a
+        compressed CF-NetCDF (*.nc). The default is 'multiband'.
+    profile : str or list, optional
+        output profile of the geotiff, see geotiff_creation_options. The
+        default is 'default'.
+    approx_stats : bool, optional
+        True to compute approximate band statistics. The default is False.
+    cog : bool, optional
+        True to write the geotiff as a Cloud-Optimized GeoTIFF. The overviews
+        use nearest resampling if any layer is classified. The default is
+        False.
+    overview_resampling : Dict, optional
+        key = layer name, val = overview resampling method, see
+        layer_overview_resampling. The default is None.
+
+    Raises
+    ------
+    ValueError
+        if output_format is not 'multiband' or 'netcdf'.
 
-    output_band.FlushCache()
-    output_band.ComputeStatistics(
-        False,
-    )  # you want this false, true will make computed results, but is faster,
-    # could be a setting in the UI perhaps, esp for large rasters?
+    Returns
+    -------
+    Dict
+        key = layer name, val = GDAL dataset name of the layer.
 
-    if not os.path.exists(output_path):
-        raise RuntimeError(f"Failed to create raster: {output_path}")
-    # this closes the file
-    output_raster = None
-    return output_path
+    """
+    if output_format == "netcdf":
+        return write_netcdf_bundle(
+            f"{output_path}.nc",
+            arrays,
+            bounds,
+            cell_resolution,
+            spatial_reference_system_wkid,
+        )
+    if output_format != "multiband":
+        raise ValueError(
+            f"Invalid output format {output_format}. Must be 'multiband' or 'netcdf'"
+        )
+    layers = write_multiband_raster(
+        f"{output_path}.tif",
+        arrays,
+        bounds,
+        cell_resolution,
+        spatial_reference_system_wkid,
+        profile=profile,
+        approx_stats=approx_stats,
+    )
+    if cog:
+        methods = {
+            layer_overview_resampling(name, overview_resampling) for name in arrays
+        }
+        convert_to_cog(
+            f"{output_path}.tif",
+            resampling="nearest" if "nearest" in methods else methods.pop(),
+            compress="ZSTD" if profile == "zstd" else "DEFLATE",
+        )
+    return layers
 
 
 def find_utm_srid(lon: float, lat: float, srid: int) -> int:
@@ -499,8 +1595,127 @@ def read_raster(
     return rx, ry, raster_array
 
 
+def read_raster_window(
+    data: gdal.Dataset,
+    x: Optional[NDArray[np.float64]] = None,
+    y: Optional[NDArray[np.float64]] = None,
+    latlon: bool = False,
+    halo: int = 2,
+) -> Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Reads the part of a raster band around a set of points.
+
+    Only the window of cells whose centres fall within the bounding box of
+    the points, grown by a halo of cells, is read from the file, so a large
+    raster costs no more I/O or memory than the area it is sampled at. The
+    nearest cell to any point is always within the window.
+
+    Parameters
+    ----------
+    data : gdal.Dataset
+        open raster.
+    x : array, optional
+        x-coordinates the raster will be sampled at. The default is None
+        (read the whole raster).
+    y : array, optional
+        y-coordinates the raster will be sampled at. The default is None.
+    latlon : Bool, optional
+        True if coordinates are lat/lon, in which case negative longitudes
+        of the raster are shifted by 360 to match the model grid. The default
+        is False.
+    halo : int, optional
+        number of cells added around the bounding box. The default is 2.
+
+    Returns
+    -------
+    x_grid : array
+        x-coordinates of the window cell centres.
+    y_grid : array
+        y-coordinates of the window cell centres.
+    array : array
+        values of the window.
+
+    """
+    (upper_left_x, x_size, _, upper_left_y, _, y_size) = data.GetGeoTransform()
+    r_rows = np.arange(data.RasterYSize) * y_size + upper_left_y + (y_size / 2)
+    r_cols = np.arange(data.RasterXSize) * x_size + upper_left_x + (x_size / 2)
+    if latlon:
+        r_cols = np.where(r_cols < 0, r_cols + 360, r_cols)
+
+    col_slice = slice(0, r_cols.size)
+    row_slice = slice(0, r_rows.size)
+    if (x is not None) and (y is not None):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        finite = np.isfinite(x) & np.isfinite(y)
+        if np.any(finite):
+            slices = []
+            for centres, points in ((r_cols, x[finite]), (r_rows, y[finite])):
+                lower, upper = np.min(points), np.max(points)
+                within = np.flatnonzero((centres >= lower) & (centres <= upper))
+                if within.size == 0:
+                    # points beyond the raster, use the closest cells
+                    distance = np.maximum(lower - centres, centres - upper)
+                    within = np.array([np.argmin(distance)])
+                slices.append(
+                    slice(
+                        max(int(within.min()) - halo, 0),
+                        min(int(within.max()) + halo + 1, centres.size),
+                    )
+                )
+            col_slice, row_slice = slices
+
+    array = data.GetRasterBand(1).ReadAsArray(
+        col_slice.start,
+        row_slice.start,
+        col_slice.stop - col_slice.start,
+        row_slice.stop - row_slice.start,
+    )
+    x_grid, y_grid = np.meshgrid(r_cols[col_slice], r_rows[row_slice])
+    return x_grid, y_grid, array
+
+
+def raster_from_array(
+    numpy_array: NDArray[np.float64],
+    bounds: Tuple[float, float],
+    cell_resolution: Tuple[float, float],
+) -> Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Coordinates and values of an array as read_raster would return them after
+    it is written with numpy_array_to_raster, without reading the file back.
+
+    Parameters
+    ----------
+    numpy_array : array
+        numpy array saved to geotiff.
+    bounds : array
+        [xmin, ymin].
+    cell_resolution : array
+        [dx, dy].
+
+    Returns
+    -------
+    rx : array
+        x-coordinates.
+    ry : array
+        y-coordinate.
+    raster_array : array
+        value array (single precision, as stored in the geotiff).
+
+    """
+    upper_left_x, x_size = bounds[0], cell_resolution[0]
+    upper_left_y, y_size = bounds[1] + cell_resolution[1], -1 * cell_resolution[1]
+    rows, cols = np.shape(numpy_array)
+    r_rows = np.arange(rows) * y_size + upper_left_y + (y_size / 2)
+    r_cols = np.arange(cols) * x_size + upper_left_x + (x_size / 2)
+    rx, ry = np.meshgrid(r_cols, r_rows)
+    return rx, ry, np.asarray(numpy_array).astype(np.float32)
+
+
 def secondary_constraint_geotiff_to_numpy(
     filename: str,
+    x: Optional[NDArray[np.float64]] = None,
+    y: Optional[NDArray[np.float64]] = None,
 ) -> Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
     """
     Converts a secondary constraint GeoTIFF file to a NumPy array.
@@ -509,6 +1724,13 @@ def secondary_constraint_geotiff_to_numpy(
     ----------
     filename : str
         The file path to the GeoTIFF file.
+    x : array, optional
+        x-coordinates the constraint will be resampled onto, only the window
+        around them is read (see read_raster_window). The default is None
+        (read the whole file).
+    y : array, optional
+        y-coordinates the constraint will be resampled onto. The default is
+        None.
 
     Returns
     -------
@@ -519,19 +1741,12 @@ def secondary_constraint_geotiff_to_numpy(
         - array (ndarray): The data values from the GeoTIFF file as a 2D array.
     """
     data = gdal.Open(filename)
-    img = data.GetRasterBand(1)
-    array = img.ReadAsArray()
-
-    (upper_left_x, x_size, _, upper_left_y, _, y_size) = data.GetGeoTransform()
-    cols = data.RasterXSize
-    rows = data.RasterYSize
-    r_rows = np.arange(rows) * y_size + upper_left_y + (y_size / 2)
-    r_cols = np.arange(cols) * x_size + upper_left_x + (x_size / 2)
     prj = data.GetProjection()
     srs = osr.SpatialReference(wkt=prj)
-    if srs.GetAttrValue("AUTHORITY", 1) == "4326":
-        r_cols = np.where(r_cols < 0, r_cols + 360, r_cols)
-    x_grid, y_grid = np.meshgrid(r_cols, r_rows)
+    x_grid, y_grid, array = read_raster_window(
+        data, x, y, latlon=srs.GetAttrValue("AUTHORITY", 1) == "4326"
+    )
+    data = None
     return x_grid, y_grid, array
 
 
@@ -571,23 +1786,185 @@ def calculate_cell_area(
             lon_2d[1:, :], lat_2d[1:, :], lon_2d[1:, :], lat_2d[:-1, :]
         )
         square_area = dist_ew[1:, :] * dist_ns[:, 1:]
+    elif is_regular_grid(rx, ry):
+        # constant dx * dy, broadcast rather than allocated for every cell
+        dx = (rx[0, -1] - rx[0, 0]) / (rx.shape[1] - 1)
+        dy = (ry[-1, 0] - ry[0, 0]) / (ry.shape[0] - 1)
+        square_area = np.broadcast_to(dx * dy, (rx.shape[0] - 1, ry.shape[1] - 1))
     else:
-        square_area = np.zeros((rx.shape[0] - 1, ry.shape[1] - 1))
-        for row in range(rx.shape[0] - 1):
-            for col in range(ry.shape[1] - 1):
-                dx = rx[row, col + 1] - rx[row, col]
-                dy = ry[row + 1, col] - ry[row, col]
-                square_area[row, col] = dx * dy
-    rxm = np.zeros(square_area.shape)
-    rym = np.zeros(square_area.shape)
-    for row in range(rx.shape[0] - 1):
-        rxm[row, :] = (rx[row, :-1] + rx[row, 1:]) / 2
-    for col in range(ry.shape[1] - 1):
-        rym[:, col] = (ry[:-1, col] + ry[1:, col]) / 2
+        dx = rx[:-1, 1:] - rx[:-1, :-1]
+        dy = ry[1:, :-1] - ry[:-1, :-1]
+        square_area = dx * dy
+    rxm = (rx[:-1, :-1] + rx[:-1, 1:]) / 2
+    rym = (ry[:-1, :-1] + ry[1:, :-1]) / 2
 
     return rxm, rym, square_area
 
 
+def is_regular_grid(
+    rx: NDArray[np.float64], ry: NDArray[np.float64], rtol: float = 1e-9
+) -> bool:
+    """
+    Checks if a grid is regular, i.e. x only varies along columns, y only
+    varies along rows and both have a constant spacing (as for a geotiff).
+
+    Parameters
+    ----------
+    rx : array
+        x-coordinate array.
+    ry : array
+        y-coordinate array.
+    rtol : scalar, optional
+        relative tolerance of the spacing. The default is 1e-9.
+
+    Returns
+    -------
+    Bool
+        True if the grid is regular.
+
+    """
+    if (np.ndim(rx) != 2) or (rx.shape[0] < 2) or (rx.shape[1] < 2):
+        return False
+    if not (np.all(rx == rx[:1, :]) and np.all(ry == ry[:, :1])):
+        return False
+    x_spacing = np.diff(rx[0, :])
+    y_spacing = np.diff(ry[:, 0])
+    return bool(
+        np.allclose(x_spacing, x_spacing.mean(), rtol=rtol, atol=0)
+        and np.allclose(y_spacing, y_spacing.mean(), rtol=rtol, atol=0)
+    )
+
+
+class GridGeometry:
+    """
+    Cell centres and cell areas of a raster grid.
+
+    calculate_cell_area (two geodesic sweeps for lat/lon grids) and the
+    interpolation weights onto the cell centres are computed once and shared
+    by the area statistics of every raster on the grid. By default the
+    interpolation reproduces scipy griddata, so the statistics are unchanged.
+
+    Parameters
+    ----------
+    rx : array
+        x-coordinate array.
+    ry : array
+        y-coordinate array.
+    latlon : Bool, optional
+        True is coordinates are lat/lon. The default is True.
+    bilinear : Bool, optional
+        True to interpolate bilinearly within each cell instead of on the
+        griddata triangulation. Linear values on a regular grid are then the
+        mean of the 2x2 surrounding points, without a triangulation, and a
+        NaN at any of the four points makes the cell centre NaN. The results
+        differ from griddata on fields that are not planar within a cell.
+        The default is False.
+    """
+
+    def __init__(
+        self,
+        rx: NDArray[np.float64],
+        ry: NDArray[np.float64],
+        latlon: bool = True,
+        bilinear: bool = False,
+    ):
+        self.rx = rx
+        self.ry = ry
+        self.latlon = latlon
+        self.bilinear = bilinear
+        self.regular = is_regular_grid(rx, ry)
+        self.rxm, self.rym, square_area = calculate_cell_area(rx, ry, latlon)
+        if (square_area.size > 0) and not np.any(square_area.strides):
+            # constant area of a regular grid
+            self.square_area = np.broadcast_to(square_area.flat[0], square_area.size)
+        else:
+            self.square_area = square_area.flatten()
+        self._resamplers = {}
+
+    def is_grid_of(self, rx: NDArray[np.float64], ry: NDArray[np.float64]) -> bool:
+        """
+        True if rx and ry are the coordinates of this grid.
+        """
+        return (
+            (np.shape(rx) == np.shape(self.rx))
+            and np.array_equal(rx, self.rx)
+            and np.array_equal(ry, self.ry)
+        )
+
+    def to_cell_centres(
+        self,
+        raster: Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]],
+        interpmethod: str = "nearest",
+    ) -> NDArray[np.float64]:
+        """
+        Interpolates a raster onto the cell centres.
+
+        Parameters
+        ----------
+        raster : tuple
+            (rx, ry, raster_array) as returned by read_raster or raster_from_array.
+        interpmethod : str, optional
+            interpolation method to use. The default is 'nearest'.
+
+        Returns
+        -------
+        array
+            flattened value at each cell centre.
+        """
+        rx, ry, z = raster
+        if not self.is_grid_of(rx, ry):
+            return (
+                StructuredGridResampler(
+                    rx,
+                    ry,
+                    self.rxm,
+                    self.rym,
+                    interpmethod=interpmethod,
+                    exact=not self.bilinear,
+                )
+                .resample(z)
+                .flatten()
+            )
+        if (interpmethod == "linear") and self.bilinear and self.regular:
+            # each cell centre is the middle of 2x2 raster points, so the
+            # (bi)linear value is their mean, without a triangulation
+            z = np.asarray(z, dtype=float)
+            return (
+                ((z[:-1, :-1] + z[:-1, 1:]) + (z[1:, :-1] + z[1:, 1:])) / 4
+            ).flatten()
+        if interpmethod not in self._resamplers:
+            self._resamplers[interpmethod] = StructuredGridResampler(
+                self.rx,
+                self.ry,
+                self.rxm,
+                self.rym,
+                interpmethod=interpmethod,
+                exact=not self.bilinear,
+            )
+        return self._resamplers[interpmethod].resample(z).flatten()
+
+
+def bin_index(zm: NDArray[np.float64], bins: NDArray[np.float64]) -> NDArray[np.int64]:
+    """
+    Index of the bin of each value, where each bin includes its start and the
+    last bin also includes its end (as in np.histogram).
+
+    Parameters
+    ----------
+    zm : array
+        value array.
+    bins : array
+        bin edges (output of np.histogram).
+
+    Returns
+    -------
+    array
+        bin index of each value.
+
+    """
+    return np.digitize(zm, bins[1:-1], right=False)
+
+
 def bin_data(
     zm: NDArray[np.float64], square_area: NDArray[np.float64], nbins: int = 25
 ) -> Dict[str, NDArray[np.float64]]:
@@ -621,13 +1998,9 @@ def bin_data(
     data["bin end"] = bins[1:]
     data["bin center"] = center
     data["count"] = hist
-    data["Area"] = np.zeros(hist.shape)
-    for ic, (bin_start, bin_end) in enumerate(zip(bins[:-1], bins[1:])):
-        if ic < len(hist) - 1:
-            area_ix = np.flatnonzero((zm >= bin_start) & (zm < bin_end))
-        else:
-            area_ix = np.flatnonzero((zm >= bin_start) & (zm <= bin_end))
-        data["Area"][ic] = np.sum(square_area[area_ix])
+    data["Area"] = np.bincount(
+        bin_index(zm, bins), weights=square_area, minlength=len(hist)
+    ).astype(float)
     return data
 
 
@@ -678,21 +2051,23 @@ def bin_receptor(
     data["bin start"] = bins[:-1]
     data["bin end"] = bins[1:]
     data["bin center"] = center
-    for ic, rval in enumerate(np.unique(receptor)):
-        zz = zm[receptor == rval]
-        sqa = square_area[receptor == rval]
+    # area of each (receptor value, bin) pair from a single weighted bincount
+    receptor_values, receptor_index = np.unique(receptor, return_inverse=True)
+    receptor_index = receptor_index.ravel()
+    area = np.bincount(
+        receptor_index * len(hist) + bin_index(zm, bins),
+        weights=square_area,
+        minlength=len(receptor_values) * len(hist),
+    ).reshape(len(receptor_values), len(hist))
+    if np.issubdtype(receptor_values.dtype, np.floating):
+        area[np.isnan(receptor_values)] = 0  # receptor == nan matches no cells
+    for ic, rval in enumerate(receptor_values):
         rcolname = (
             f"Area, {receptor_type} value {rval}"
             if receptor_names is None
             else receptor_names[ic]
         )
-        data[rcolname] = np.zeros(hist.shape)
-        for ic, (bin_start, bin_end) in enumerate(zip(bins[:-1], bins[1:])):
-            if ic < len(hist) - 1:
-                area_ix = np.flatnonzero((zz >= bin_start) & (zz < bin_end))
-            else:
-                area_ix = np.flatnonzero((zz >= bin_start) & (zz <= bin_end))
-            data[rcolname][ic] = np.sum(sqa[area_ix])
+        data[rcolname] = area[ic]
         data[f"Area percent, {receptor_type} value {rval}"] = (
             100 * data[rcolname] / data[rcolname].sum()
         )
@@ -706,6 +2081,7 @@ def bin_layer(
     limit_receptor_range: Tuple[float, float] = None,
     latlon: bool = True,
     receptor_type: str = "receptor",
+    geometry: Optional[GridGeometry] = None,
 ) -> DataFrame:
     """
     creates a dataframe of binned raster values and associtaed area and percent of array.
@@ -724,6 +2100,60 @@ def bin_layer(
         True is coordinates are lat/lon. The default is True.
     receptor_type : str, optional
         name to display in output (eg. grain size, risk layer). the default is receptor.
+    geometry : GridGeometry, optional
+        cell centres and areas of the raster grid, shared between calls on
+        the same grid. The default is None (computed from the raster and latlon).
+
+    Returns
+    -------
+    DataFrame
+        DataFrame with bins as rows and statistics values as columns.
+            [bin stats, area, count, percent]
+
+    """
+    return bin_raster(
+        read_raster(raster_filename),
+        None if receptor_filename is None else read_raster(receptor_filename),
+        receptor_names=receptor_names,
+        limit_receptor_range=limit_receptor_range,
+        latlon=latlon,
+        receptor_type=receptor_type,
+        geometry=geometry,
+    )
+
+
+def bin_raster(
+    raster: Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]],
+    receptor_raster: Tuple[
+        NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]
+    ] = None,
+    receptor_names: List[str] = None,
+    limit_receptor_range: Tuple[float, float] = None,
+    latlon: bool = True,
+    receptor_type: str = "receptor",
+    geometry: Optional[GridGeometry] = None,
+) -> DataFrame:
+    """
+    creates a dataframe of binned raster values and associtaed area and percent
+    of array from a raster already in memory (see bin_layer).
+
+    Parameters
+    ----------
+    raster : tuple
+        (rx, ry, raster_array) as returned by read_raster or raster_from_array.
+    receptor_raster : tuple, optional
+        (rx, ry, raster_array) of the receptor. The default is None.
+    receptor_names : list, opional
+        optional names for each unique value in the receptor. The default is None.
+    limit_receptor_range : array, optional
+        Range over which to limit uniuqe raster values [start, stop]. The default is None.
+    latlon : Bool, optional
+        True is coordinates are lat/lon. The default is True.
+    receptor_type : str, optional
+        name to display in output (eg. grain size, risk layer). the default is receptor.
+    geometry : GridGeometry, optional
+        cell centres and areas of the raster grid, shared between calls on
+        the same grid. The default is None (computed from the raster and latlon).
 
     Returns
     -------
@@ -732,19 +2162,18 @@ def bin_layer(
             [bin stats, area, count, percent]
 
     """
-    rx, ry, z = read_raster(raster_filename)
-    rxm, rym, square_area = calculate_cell_area(rx, ry, latlon)
-    square_area = square_area.flatten()
-    zm = resample_structured_grid(rx, ry, z, rxm, rym, interpmethod="linear").flatten()
-    if receptor_filename is None:
+    if geometry is None:
+        geometry = GridGeometry(raster[0], raster[1], latlon)
+    square_area = geometry.square_area
+    zm = geometry.to_cell_centres(raster, interpmethod="linear")
+    if receptor_raster is None:
         data = bin_data(
             zm[np.invert(np.isnan(zm))], square_area[np.invert(np.isnan(zm))], nbins=25
         )
         # DF = pd.DataFrame(data)
         data["Area percent"] = 100 * data["Area"] / data["Area"].sum()
     else:
-        rrx, rry, receptor = read_raster(receptor_filename)
-        receptor = resample_structured_grid(rrx, rry, receptor, rxm, rym).flatten()
+        receptor = geometry.to_cell_centres(receptor_raster)
         if limit_receptor_range is not None:
             receptor = np.where(
                 (receptor >= np.min(limit_receptor_range))
@@ -762,6 +2191,64 @@ def bin_layer(
     return pd.DataFrame(data)
 
 
+def classify_area(
+    zm: NDArray[np.float64],
+    square_area: NDArray[np.float64],
+    at_values: NDArray[np.float64],
+    receptor: Optional[NDArray[np.float64]] = None,
+) -> Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Area and count of cells equal to each of at_values, for each unique value
+    in the receptor, using a single weighted 2-D histogram.
+
+    Parameters
+    ----------
+    zm : array
+        value array (ensure same dimension as square_area).
+    square_area : array
+        square area array (output of calculate_cell_area).
+    at_values : array
+        values to sample.
+    receptor : array, optional
+        receptor array values (ensure same dimension as square_area).
+        The default is None (a single receptor value of 0).
+
+    Returns
+    -------
+    receptor_values : array
+        unique receptor values.
+    area : array
+        area of each at_value (columns) for each receptor value (rows).
+    count : array
+        number of cells of each at_value (columns) for each receptor value (rows).
+
+    """
+    if receptor is None:
+        receptor = np.zeros(zm.shape)
+    receptor_values, receptor_index = np.unique(receptor, return_inverse=True)
+    receptor_index = receptor_index.ravel()
+
+    # map each value to the index of the matching unique at_value, if any
+    unique_values, value_index = np.unique(at_values, return_inverse=True)
+    value_index = value_index.ravel()
+    if len(unique_values) == 0:
+        empty = np.zeros((len(receptor_values), 0))
+        return receptor_values, empty, empty
+    zm_index = np.clip(np.searchsorted(unique_values, zm), 0, len(unique_values) - 1)
+    matched = unique_values[zm_index] == zm
+    if np.issubdtype(receptor_values.dtype, np.floating):
+        # receptor == nan matches no cells
+        matched &= ~np.isnan(receptor_values)[receptor_index]
+
+    key = receptor_index[matched] * len(unique_values) + zm_index[matched]
+    shape = (len(receptor_values), len(unique_values))
+    area = np.bincount(
+        key, weights=square_area[matched], minlength=shape[0] * shape[1]
+    ).reshape(shape)
+    count = np.bincount(key, minlength=shape[0] * shape[1]).reshape(shape)
+    return receptor_values, area[:, value_index], count[:, value_index].astype(float)
+
+
 def classify_layer_area(
     raster_filename: str,
     receptor_filename: str = None,
@@ -770,6 +2257,7 @@ def classify_layer_area(
     limit_receptor_range: Tuple[float, float] = None,
     latlon: bool = True,
     receptor_type: str = "receptor",
+    geometry: Optional[GridGeometry] = None,
 ) -> DataFrame:
     """
     Creates a dataframe of raster values and associtaed area and
@@ -791,7 +2279,65 @@ def classify_layer_area(
         True is coordinates are lat/lon. The default is True.
     receptor_type : str, optional
         name to display in output (eg. grain size, risk layer). the default is receptor.
+    geometry : GridGeometry, optional
+        cell centres and areas of the raster grid, shared between calls on
+        the same grid. The default is None (computed from the raster and latlon).
 
+    Returns
+    -------
+    DataFrame
+        DataFrame with sampled values as rows and statistics values as columns.
+            [sampled value, stats, area, count, percent]
+
+    """
+    return classify_raster_area(
+        read_raster(raster_filename),
+        None if receptor_filename is None else read_raster(receptor_filename),
+        at_values=at_values,
+        value_names=value_names,
+        limit_receptor_range=limit_receptor_range,
+        latlon=latlon,
+        receptor_type=receptor_type,
+        geometry=geometry,
+    )
+
+
+def classify_raster_area(
+    raster: Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]],
+    receptor_raster: Tuple[
+        NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]
+    ] = None,
+    at_values: List[float] = None,
+    value_names: List[str] = None,
+    limit_receptor_range: Tuple[float, float] = None,
+    latlon: bool = True,
+    receptor_type: str = "receptor",
+    geometry: Optional[GridGeometry] = None,
+) -> DataFrame:
+    """
+    Creates a dataframe of raster values and associtaed area and percent of
+    array at specified raster values from a raster already in memory
+    (see classify_layer_area).
+
+    Parameters
+    ----------
+    raster : tuple
+        (rx, ry, raster_array) as returned by read_raster or raster_from_array.
+    receptor_raster : tuple, optional
+        (rx, ry, raster_array) of the receptor. The default is None.
+    at_values : list, optional
+        raster values to sample. The default is None.
+    value_names : list, optional
+        names of unique raster values. The default is None.
+    limit_receptor_range : array, optional
+        Range over which to limit uniuqe raster values [start, stop]. The default is None.
+    latlon : Bool, optional
+        True is coordinates are lat/lon. The default is True.
+    receptor_type : str, optional
+        name to display in output (eg. grain size, risk layer). the default is receptor.
+    geometry : GridGeometry, optional
+        cell centres and areas of the raster grid, shared between calls on
+        the same grid. The default is None (computed from the raster and latlon).
 
     Returns
     -------
@@ -800,10 +2346,10 @@ def classify_layer_area(
             [sampled value, stats, area, count, percent]
 
     """
-    rx, ry, z = read_raster(raster_filename)
-    rxm, rym, square_area = calculate_cell_area(rx, ry, latlon=latlon)
-    square_area = square_area.flatten()
-    zm = resample_structured_grid(rx, ry, z, rxm, rym).flatten()
+    if geometry is None:
+        geometry = GridGeometry(raster[0], raster[1], latlon=latlon)
+    square_area = geometry.square_area
+    zm = geometry.to_cell_centres(raster)
     if at_values is None:
         at_values = np.unique(zm)
     else:
@@ -812,14 +2358,12 @@ def classify_layer_area(
     data["value"] = at_values
     if value_names is not None:
         data["value name"] = value_names
-    if receptor_filename is None:
-        data["Area"] = np.zeros(len(at_values))
-        for ic, value in enumerate(at_values):
-            area_ix = np.flatnonzero(zm == value)
-            data["Area"][ic] = np.sum(square_area[area_ix])
+    if receptor_raster is None:
+        _, area, _ = classify_area(zm, square_area, at_values)
+        data["Area"] = area[0]
         data["Area percent"] = 100 * data["Area"] / data["Area"].sum()
     else:
-        rrx, rry, receptor = read_raster(receptor_filename)
+        rrx, rry, receptor = receptor_raster
         if limit_receptor_range is not None:
             receptor = np.where(
                 (receptor >= np.min(limit_receptor_range))
@@ -827,18 +2371,15 @@ def classify_layer_area(
                 receptor,
                 0,
             )
-        receptor = resample_structured_grid(rrx, rry, receptor, rxm, rym).flatten()
-        for ic, rval in enumerate(np.unique(receptor)):
-            zz = zm[receptor == rval]
-            sqa = square_area[receptor == rval]
+        receptor = geometry.to_cell_centres((rrx, rry, receptor))
+        receptor_values, area, count = classify_area(
+            zm, square_area, at_values, receptor
+        )
+        for ic, rval in enumerate(receptor_values):
             rcolname = f"Area, {receptor_type} value {rval}"
             ccolname = f"Count, {receptor_type} value {rval}"
-            data[rcolname] = np.zeros(len(at_values))
-            data[ccolname] = np.zeros(len(at_values))
-            for iic, value in enumerate(at_values):
-                area_ix = np.flatnonzero(zz == value)
-                data[ccolname][iic] = len(area_ix)
-                data[rcolname][iic] = np.sum(sqa[area_ix])
+            data[rcolname] = area[ic]
+            data[ccolname] = count[ic]
             data[f"Area percent, {receptor_type} value {rval}"] = (
                 100 * data[rcolname] / data[rcolname].sum()
             )
@@ -853,6 +2394,7 @@ def classify_layer_area_2nd_constraint(
     limit_constraint_range: Tuple[float, float] = None,
     latlon: bool = True,
     receptor_type: str = "receptor",
+    geometry: Optional[GridGeometry] = None,
 ) -> DataFrame:
     """
     Classifies layer areas based on a secondary constraint raster.
@@ -877,6 +2419,70 @@ def classify_layer_area_2nd_constraint(
         Boolean to indicate if the coordinate system is latitude/longitude. Default is True.
     receptor_type : str, optional
         Type of receptor for naming purposes in the output. Default is "receptor".
+    geometry : GridGeometry, optional
+        cell centres and areas of the raster grid, shared between calls on
+        the same grid. The default is None (computed from the raster and latlon).
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame with areas and their percentages calculated for each classification
+        and optionally for each classification within a constraint range.
+    """
+    return classify_raster_area_2nd_constraint(
+        read_raster(raster_to_sample),
+        (
+            None
+            if secondary_constraint_filename is None
+            else read_raster(secondary_constraint_filename)
+        ),
+        at_raster_values,
+        at_raster_value_names,
+        limit_constraint_range=limit_constraint_range,
+        latlon=latlon,
+        receptor_type=receptor_type,
+        geometry=geometry,
+    )
+
+
+def classify_raster_area_2nd_constraint(
+    raster: Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]],
+    secondary_constraint_raster: Optional[
+        Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]
+    ],
+    at_raster_values: List[float],
+    at_raster_value_names: List[str],
+    limit_constraint_range: Tuple[float, float] = None,
+    latlon: bool = True,
+    receptor_type: str = "receptor",
+    geometry: Optional[GridGeometry] = None,
+) -> DataFrame:
+    """
+    Classifies layer areas based on a secondary constraint, for rasters already
+    in memory (see classify_layer_area_2nd_constraint).
+
+    Parameters
+    ----------
+    raster : tuple
+        (rx, ry, raster_array) to be sampled, as returned by read_raster or
+        raster_from_array.
+    secondary_constraint_raster : tuple or None
+        (rx, ry, raster_array) of the secondary constraint. If None, no
+        secondary constraint is applied.
+    at_raster_values : list or None
+        List of values in the raster to classify. If None, all unique values are considered.
+    at_raster_value_names : list or None
+        List of names corresponding to the `at_raster_values` for more descriptive output.
+    limit_constraint_range : tuple or None, optional
+        A tuple specifying the range (min, max) to limit the secondary constraint values.
+        Default is None.
+    latlon : bool, optional
+        Boolean to indicate if the coordinate system is latitude/longitude. Default is True.
+    receptor_type : str, optional
+        Type of receptor for naming purposes in the output. Default is "receptor".
+    geometry : GridGeometry, optional
+        cell centres and areas of the raster grid, shared between calls on
+        the same grid. The default is None (computed from the raster and latlon).
 
     Returns
     -------
@@ -884,10 +2490,10 @@ def classify_layer_area_2nd_constraint(
         A DataFrame with areas and their percentages calculated for each classification
         and optionally for each classification within a constraint range.
     """
-    rx, ry, z = read_raster(raster_to_sample)
-    rxm, rym, square_area = calculate_cell_area(rx, ry, latlon=latlon)
-    square_area = square_area.flatten()
-    zm = resample_structured_grid(rx, ry, z, rxm, rym).flatten()
+    if geometry is None:
+        geometry = GridGeometry(raster[0], raster[1], latlon=latlon)
+    square_area = geometry.square_area
+    zm = geometry.to_cell_centres(raster)
     if at_raster_values is None:
         at_values = np.unique(zm)
     else:
@@ -896,17 +2502,14 @@ def classify_layer_area_2nd_constraint(
     data["value"] = at_values
     if at_raster_value_names is not None:
         data["value name"] = at_raster_value_names
-    if secondary_constraint_filename is None:
-        data["Area"] = np.zeros(len(at_values))
-        for ic, value in enumerate(at_values):
-            area_ix = np.flatnonzero(zm == value)
-            data["Area"][ic] = np.sum(square_area[area_ix])
+    if secondary_constraint_raster is None:
+        _, area, _ = classify_area(zm, square_area, at_values)
+        data["Area"] = area[0]
         data["Area percent"] = 100 * data["Area"] / data["Area"].sum()
     else:
-        rrx, rry, constraint = read_raster(secondary_constraint_filename)
-        constraint = resample_structured_grid(
-            rrx, rry, constraint, rxm, rym, interpmethod="nearest"
-        ).flatten()
+        constraint = geometry.to_cell_centres(
+            secondary_constraint_raster, interpmethod="nearest"
+        )
         if limit_constraint_range is not None:
             constraint = np.where(
                 (constraint >= np.min(limit_constraint_range))
@@ -914,18 +2517,15 @@ def classify_layer_area_2nd_constraint(
                 constraint,
                 np.nan,
             )
-        for ic, rval in enumerate(np.unique(constraint)):
+        constraint_values, area, count = classify_area(
+            zm, square_area, at_values, constraint
+        )
+        for ic, rval in enumerate(constraint_values):
             if ~np.isnan(rval):
-                zz = zm[constraint == rval]
-                sqa = square_area[constraint == rval]
                 rcolname = f"Area, {receptor_type} value {rval}"
                 ccolname = f"Count, {receptor_type} value {rval}"
-                data[rcolname] = np.zeros(len(at_values))
-                data[ccolname] = np.zeros(len(at_values))
-                for iic, value in enumerate(at_values):
-                    area_ix = np.flatnonzero(zz == value)
-                    data[ccolname][iic] = len(area_ix)
-                    data[rcolname][iic] = np.sum(sqa[area_ix])
+                data[rcolname] = area[ic]
+                data[ccolname] = count[ic]
                 data[f"Area percent, {receptor_type} value {rval}"] = (
                     100 * data[rcolname] / data[rcolname].sum()
                 )
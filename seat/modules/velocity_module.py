@@ -28,22 +28,32 @@
 
 import os
 
-from typing import Optional, Tuple, List, Dict
+from typing import Callable, Optional, Tuple, List, Dict, Union
 import numpy as np
 from numpy.typing import NDArray
-import pandas as pd
-from netCDF4 import Dataset  # pylint: disable=no-name-in-module
+from netCDF4 import Dataset, Variable  # pylint: disable=no-name-in-module
 
+from seat.modules.run_timer import RunTimer
 from seat.modules.stressor_utils import (
     estimate_grid_spacing,
-    create_structured_array_from_unstructured,
+    UnstructuredGridRegridder,
     calc_receptor_array,
     trim_zeros,
+    pair_run_files,
+    read_bc_probabilities,
+    map_runs,
     create_raster,
     numpy_array_to_raster,
-    bin_layer,
-    classify_layer_area,
-    classify_layer_area_2nd_constraint,
+    convert_to_cog,
+    layer_overview_resampling,
+    write_result_bundle,
+    report_progress,
+    scale_progress,
+    raster_from_array,
+    GridGeometry,
+    bin_raster,
+    classify_raster_area,
+    classify_raster_area_2nd_constraint,
     resample_structured_grid,
     secondary_constraint_geotiff_to_numpy,
 )
@@ -159,23 +169,22 @@ def check_grid_define_vars(dataset: Dataset) -> tuple[str, str, str, str, str]:
     return gridtype, xvar, yvar, uvar, vvar
 
 
-def calculate_velocity_stressors(
+def combine_velocity_in_memory(
     fpath_nodev: str,
     fpath_dev: str,
     probabilities_file: str,
-    receptor_filename: Optional[str] = None,
-    latlon: bool = True,
     value_selection: Optional[str] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
 ) -> Tuple[
-    List[NDArray[np.float64]],
+    str,
+    NDArray[np.float64],
+    NDArray[np.float64],
     NDArray[np.float64],
     NDArray[np.float64],
-    float,
-    float,
-    str,
 ]:
     """
-
+    Loads all runs into memory and combines the velocity magnitude of the runs
+    weighted by their probability.
 
     Parameters
     ----------
@@ -185,50 +194,38 @@ def calculate_velocity_stressors(
         Directory path to the with device model run netcdf files.
     probabilities_file : str
         File path to probabilities/bondary condition *.csv file.
-    receptor_filename : str, optional
-        File path to the recetptor file (*.csv or *.tif). The default is None.
-    latlon : Bool, optional
-        True is coordinates are lat/lon. The default is True.
     value_selection : str, optional
-        Temporal selection of shears stress (not currently used). The default is 'MAX'.
+        Temporal selection of velocity (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    progress_callback : callable, optional
+        called with 'run file i of n' before each run is read, see
+        report_progress. The default is None.
 
     Raises
     ------
-    Exception
+    ValueError
         "Number of device runs files must be the same as no device runs files".
 
     Returns
     -------
-    listOfFiles : list
-        2D arrays of:
-            [0] mag_diff
-            [1] motility_nodev
-            [2] motility_dev
-            [3] motility_diff
-            [4] motility_classification
-            [5] receptor (vel_crit)
-    rx : array
-        X-Coordiantes.
-    ry : array
-        Y-Coordinates.
-    dx : scalar
-        x-spacing.
-    dy : scalar
-        y-spacing.
     gridtype : str
         grid type [structured or unstructured].
+    xcor : array
+        x-coordinates.
+    ycor : array
+        y-coordinates.
+    mag_combined_nodev : array
+        probability weighted velocity magnitude without devices.
+    mag_combined_dev : array
+        probability weighted velocity magnitude with devices.
 
     """
-    if not os.path.exists(fpath_nodev):
-        raise FileNotFoundError(f"The directory {fpath_nodev} does not exist.")
-    if not os.path.exists(fpath_dev):
-        raise FileNotFoundError(f"The directory {fpath_dev} does not exist.")
-
     files_nodev = [i for i in os.listdir(fpath_nodev) if i.endswith(".nc")]
     files_dev = [i for i in os.listdir(fpath_dev) if i.endswith(".nc")]
 
     xcor = None
     ycor = None
+    run_numbers = None
 
     # Load and sort files
     if len(files_nodev) == 1 & len(files_dev) == 1:
@@ -254,35 +251,17 @@ def calculate_velocity_stressors(
     elif len(files_nodev) == len(files_dev):
         # asumes each run is separate with the some_name_RunNum_map.nc,
         # where run number comes at the last underscore before _map.nc
-        run_num_nodev = np.zeros((len(files_nodev)))
-        for ic, file in enumerate(files_nodev):
-            run_num_nodev[ic] = int(file.split(".")[0].split("_")[-2])
-        run_num_dev = np.zeros((len(files_dev)))
-        for ic, file in enumerate(files_dev):
-            run_num_dev[ic] = int(file.split(".")[0].split("_")[-2])
-
-        # ensure run oder for nodev matches dev files
-        if np.any(run_num_nodev != run_num_dev):
-            adjust_dev_order = []
-            for ri in run_num_nodev:
-                adjust_dev_order = np.append(
-                    adjust_dev_order, np.flatnonzero(run_num_dev == ri)
-                )
-            files_dev = [files_dev[int(i)] for i in adjust_dev_order]
-            run_num_dev = [run_num_dev[int(i)] for i in adjust_dev_order]
-        data_frame = pd.DataFrame(
-            {
-                "files_nodev": files_nodev,
-                "run_num_nodev": run_num_nodev,
-                "files_dev": files_dev,
-                "run_num_dev": run_num_dev,
-            }
-        )
-        data_frame = data_frame.sort_values(by="run_num_dev")
+        data_frame = pair_run_files(files_nodev, files_dev)
+        run_numbers = data_frame.run_num_dev.to_numpy()
 
         first_run = True
         ir = 0
         for _, row in data_frame.iterrows():
+            report_progress(
+                progress_callback,
+                f"run file {ir + 1} of {data_frame.shape[0]}",
+                ir / data_frame.shape[0],
+            )
             with Dataset(
                 os.path.join(fpath_nodev, row.files_nodev)
             ) as file_dev_notpresent, Dataset(
@@ -310,7 +289,7 @@ def calculate_velocity_stressors(
                                 tmp.shape[0],
                                 tmp.shape[1],
                                 tmp.shape[2],
-                                tmp.shape,
+                                tmp.shape[3],
                             )
                         )
                     else:
@@ -332,8 +311,8 @@ def calculate_velocity_stressors(
                 ir += 1
     else:
         raise ValueError(
-            f"Number of device runs ({len(files_dev)}) must be the same \
-              as no device runs ({len(files_nodev)})."
+            f"Number of device runs ({len(files_dev)}) must be the same "
+            f"as no device runs ({len(files_nodev)})."
         )
     # Finished loading and sorting files
 
@@ -342,31 +321,7 @@ def calculate_velocity_stressors(
             # at least for some runs the boundary has 0 coordinates. Check and fix.
             xcor, ycor, mag_nodev, mag_dev = trim_zeros(xcor, ycor, mag_nodev, mag_dev)
 
-    if probabilities_file != "":
-        if not os.path.exists(probabilities_file):
-            raise FileNotFoundError(f"The file {probabilities_file} does not exist.")
-        # Load BC file with probabilities and find appropriate probability
-        bc_probability = pd.read_csv(probabilities_file, delimiter=",")
-        bc_probability["run_num"] = bc_probability["run number"] - 1
-        bc_probability = bc_probability.sort_values(by="run number")
-        bc_probability["probability"] = bc_probability["% of yr"].values / 100
-        # bc_probability
-        if "Exclude" in bc_probability.columns:
-            bc_probability = bc_probability[
-                ~(
-                    (bc_probability["Exclude"] == "x")
-                    | (bc_probability["Exclude"] == "X")
-                )
-            ]
-    else:  # assume run_num in file name is return interval
-        bc_probability = pd.DataFrame()
-        # ignor number and start sequentially from zero
-        bc_probability["run_num"] = np.arange(0, mag_dev.shape[0])
-        # assumes run_num in name is the return interval
-        bc_probability["probability"] = 1 / data_frame.run_num_dev.to_numpy()
-        bc_probability["probability"] = (
-            bc_probability["probability"] / bc_probability["probability"].sum()
-        )  # rescale to ensure = 1
+    bc_probability = read_bc_probabilities(probabilities_file, run_numbers)
 
     # ensure velocity is depth averaged for structured array [run_num, time, layer, x, y]
     #  and drop dimension
@@ -402,6 +357,394 @@ def calculate_velocity_stressors(
         mag_combined_nodev = mag_combined_nodev + prob * mag_nodev[run_number, :]
         mag_combined_dev = mag_combined_dev + prob * mag_dev[run_number, :]
 
+    return gridtype, xcor, ycor, mag_combined_nodev, mag_combined_dev
+
+
+def reduce_velocity_magnitude(
+    u_var: Variable,
+    v_var: Variable,
+    run_index: Optional[int] = None,
+    value_selection: Optional[str] = None,
+    time_chunk_size: int = 100,
+) -> NDArray[np.float64]:
+    """
+    Reduces the depth averaged velocity magnitude of a single run over time,
+    reading time_chunk_size time steps at a time.
+
+    Parameters
+    ----------
+    u_var : netCDF4 Variable
+        x-direction velocity [time, (layer), ...] or [run, time, (layer), ...].
+    v_var : netCDF4 Variable
+        y-direction velocity, same shape as u_var.
+    run_index : int, optional
+        run to read if the variables have a run dimension. The default is None.
+    value_selection : str, optional
+        Temporal selection of velocity (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    time_chunk_size : int, optional
+        number of time steps to read at a time. The default is 100.
+
+    Returns
+    -------
+    array
+        velocity magnitude [...].
+
+    """
+    prefix = () if run_index is None else (run_index,)
+    ntime = u_var.shape[len(prefix)]
+    layered = u_var.ndim - len(prefix) == 4  # structured [time, layer, rows, cols]
+
+    def read_magnitude(time_slice):
+        u = u_var[prefix + (time_slice,)].data.astype(float)
+        v = v_var[prefix + (time_slice,)].data.astype(float)
+        mag = np.sqrt(u**2 + v**2)
+        if layered:
+            mag = np.nanmean(mag, axis=1)  # depth average
+        return mag
+
+    if value_selection == "Final Timestep":
+        return read_magnitude(slice(ntime - 1, ntime))[0]  # last time step
+
+    mag_reduced = None
+    count = None
+    for t_start in range(0, ntime, time_chunk_size):
+        mag = read_magnitude(slice(t_start, min(t_start + time_chunk_size, ntime)))
+        if value_selection == "Mean":
+            # running sum and count of valid values for the mean over time
+            mag_sum = np.nansum(mag, axis=0)
+            mag_count = np.sum(~np.isnan(mag), axis=0)
+            mag_reduced = mag_sum if mag_reduced is None else mag_reduced + mag_sum
+            count = mag_count if count is None else count + mag_count
+        else:
+            # running max over time (default)
+            mag_max = np.nanmax(mag, axis=0)
+            mag_reduced = (
+                mag_max if mag_reduced is None else np.fmax(mag_reduced, mag_max)
+            )
+    if value_selection == "Mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mag_reduced = np.where(count > 0, mag_reduced / count, np.nan)
+    return mag_reduced
+
+
+def read_reduced_velocity_run(
+    file_nodev: str,
+    file_dev: str,
+    uvar: str,
+    vvar: str,
+    value_selection: Optional[str] = None,
+    time_chunk_size: int = 100,
+    run_index: Optional[int] = None,
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Reads the velocity magnitude of a single run with and without devices and
+    reduces it over time in chunks of time steps.
+
+    Parameters
+    ----------
+    file_nodev : str
+        File path to the baseline/no device model run netcdf file.
+    file_dev : str
+        File path to the with device model run netcdf file.
+    uvar : str
+        name of x-direction velocity variable.
+    vvar : str
+        name of y-direction velocity variable.
+    value_selection : str, optional
+        Temporal selection of velocity (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    time_chunk_size : int, optional
+        number of time steps to read at a time. The default is 100.
+    run_index : int, optional
+        run to read if the files are concatenated with shape
+        [run_num, time, ...]. The default is None.
+
+    Returns
+    -------
+    mag_nodev : array
+        velocity magnitude without devices.
+    mag_dev : array
+        velocity magnitude with devices.
+
+    """
+    with Dataset(file_nodev) as file_dev_notpresent, Dataset(
+        file_dev
+    ) as file_dev_present:
+        mag_nodev = reduce_velocity_magnitude(
+            file_dev_notpresent.variables[uvar],
+            file_dev_notpresent.variables[vvar],
+            run_index=run_index,
+            value_selection=value_selection,
+            time_chunk_size=time_chunk_size,
+        )
+        mag_dev = reduce_velocity_magnitude(
+            file_dev_present.variables[uvar],
+            file_dev_present.variables[vvar],
+            run_index=run_index,
+            value_selection=value_selection,
+            time_chunk_size=time_chunk_size,
+        )
+    return mag_nodev, mag_dev
+
+
+def combine_velocity_chunked(
+    fpath_nodev: str,
+    fpath_dev: str,
+    probabilities_file: str,
+    value_selection: Optional[str] = None,
+    time_chunk_size: int = 100,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+) -> Tuple[
+    str,
+    NDArray[np.float64],
+    NDArray[np.float64],
+    NDArray[np.float64],
+    NDArray[np.float64],
+]:
+    """
+    Combines the velocity magnitude of the runs weighted by their probability,
+    reducing each run over time as it is read in chunks of time steps, so
+    memory scales with the chunk size rather than the number of runs and time
+    steps.
+
+    Parameters
+    ----------
+    fpath_nodev : str
+        Directory path to the baseline/no device model run netcdf files.
+    fpath_dev : str
+        Directory path to the with device model run netcdf files.
+    probabilities_file : str
+        File path to probabilities/bondary condition *.csv file.
+    value_selection : str, optional
+        Temporal selection of velocity (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    time_chunk_size : int, optional
+        number of time steps to read at a time. The default is 100.
+    max_workers : int, optional
+        number of runs read concurrently. The default is 1.
+    use_processes : bool, optional
+        True to read runs in a process pool, False for a thread pool.
+        The default is False.
+    progress_callback : callable, optional
+        called with 'run file i of n' before each run is read, see
+        report_progress. The default is None.
+
+    Raises
+    ------
+    ValueError
+        "Number of device runs files must be the same as no device runs files".
+
+    Returns
+    -------
+    gridtype : str
+        grid type [structured or unstructured].
+    xcor : array
+        x-coordinates.
+    ycor : array
+        y-coordinates.
+    mag_combined_nodev : array
+        probability weighted velocity magnitude without devices.
+    mag_combined_dev : array
+        probability weighted velocity magnitude with devices.
+
+    """
+    files_nodev = [i for i in os.listdir(fpath_nodev) if i.endswith(".nc")]
+    files_dev = [i for i in os.listdir(fpath_dev) if i.endswith(".nc")]
+
+    if len(files_nodev) == 1 & len(files_dev) == 1:
+        # asumes a concatonated files with shape
+        # [run_num, time, rows, cols]
+        bc_probability = read_bc_probabilities(probabilities_file)
+        file_nodev = os.path.join(fpath_nodev, files_nodev[0])
+        file_dev = os.path.join(fpath_dev, files_dev[0])
+        with Dataset(file_dev) as file_dev_present:
+            gridtype, xvar, yvar, uvar, vvar = check_grid_define_vars(file_dev_present)
+            xcor = file_dev_present.variables[xvar][:].data
+            ycor = file_dev_present.variables[yvar][:].data
+        run_args = [
+            (
+                file_nodev,
+                file_dev,
+                uvar,
+                vvar,
+                value_selection,
+                time_chunk_size,
+                run_number,
+            )
+            for run_number in bc_probability["run_num"].values
+        ]
+
+    # same number of files, file name must be formatted with either run number or return interval
+    elif len(files_nodev) == len(files_dev):
+        data_frame = pair_run_files(files_nodev, files_dev)
+        bc_probability = read_bc_probabilities(
+            probabilities_file, data_frame.run_num_dev.to_numpy()
+        )
+        with Dataset(
+            os.path.join(fpath_dev, data_frame.files_dev.iloc[0])
+        ) as file_dev_present, Dataset(
+            os.path.join(fpath_nodev, data_frame.files_nodev.iloc[0])
+        ) as file_dev_notpresent:
+            gridtype, xvar, yvar, uvar, vvar = check_grid_define_vars(file_dev_present)
+            xcor = file_dev_notpresent.variables[xvar][:].data
+            ycor = file_dev_notpresent.variables[yvar][:].data
+        run_args = [
+            (
+                os.path.join(fpath_nodev, data_frame.files_nodev.iloc[run_number]),
+                os.path.join(fpath_dev, data_frame.files_dev.iloc[run_number]),
+                uvar,
+                vvar,
+                value_selection,
+                time_chunk_size,
+            )
+            for run_number in bc_probability["run_num"].values
+        ]
+    else:
+        raise ValueError(
+            f"Number of device runs ({len(files_dev)}) must be the same "
+            f"as no device runs ({len(files_nodev)})."
+        )
+
+    mag_combined_nodev = np.zeros(np.shape(xcor))
+    mag_combined_dev = np.zeros(np.shape(xcor))
+    for prob, (mag_nodev, mag_dev) in zip(
+        bc_probability["probability"].values,
+        map_runs(
+            read_reduced_velocity_run,
+            run_args,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            progress_callback=progress_callback,
+        ),
+    ):
+        mag_combined_nodev = mag_combined_nodev + prob * mag_nodev
+        mag_combined_dev = mag_combined_dev + prob * mag_dev
+
+    if gridtype == "structured":
+        if (xcor[0, 0] == 0) & (xcor[-1, 0] == 0):
+            # at least for some runs the boundary has 0 coordinates. Check and fix.
+            xcor, ycor, mag_combined_nodev, mag_combined_dev = trim_zeros(
+                xcor, ycor, mag_combined_nodev, mag_combined_dev
+            )
+
+    return gridtype, xcor, ycor, mag_combined_nodev, mag_combined_dev
+
+
+def calculate_velocity_stressors(
+    fpath_nodev: str,
+    fpath_dev: str,
+    probabilities_file: str,
+    receptor_filename: Optional[str] = None,
+    latlon: bool = True,
+    value_selection: Optional[str] = None,
+    streaming: bool = True,
+    time_chunk_size: int = 100,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    spacing_method: str = "random",
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+) -> Tuple[
+    List[NDArray[np.float64]],
+    NDArray[np.float64],
+    NDArray[np.float64],
+    float,
+    float,
+    str,
+]:
+    """
+
+
+    Parameters
+    ----------
+    fpath_nodev : str
+        Directory path to the baseline/no device model run netcdf files.
+    fpath_dev : str
+        Directory path to the with device model run netcdf files.
+    probabilities_file : str
+        File path to probabilities/bondary condition *.csv file.
+    receptor_filename : str, optional
+        File path to the recetptor file (*.csv or *.tif). The default is None.
+    latlon : Bool, optional
+        True is coordinates are lat/lon. The default is True.
+    value_selection : str, optional
+        Temporal selection of shears stress (not currently used). The default is 'MAX'.
+    streaming : bool, optional
+        True to read and reduce each run in chunks of time steps instead of
+        loading all runs into memory. The default is True.
+    time_chunk_size : int, optional
+        number of time steps to read at a time when streaming. The default is 100.
+    max_workers : int, optional
+        number of runs read concurrently when streaming. The default is 1.
+    use_processes : bool, optional
+        True to read runs in a process pool, False for a thread pool.
+        The default is False.
+    spacing_method : str, optional
+        sampling method of estimate_grid_spacing for unstructured grids
+        ("random", "stratified" or "all"). The default is "random".
+    progress_callback : callable, optional
+        called with the stage name and the fraction completed before each run
+        file is read and before regridding, can raise RunCancelled to stop
+        the calculation. The default is None.
+
+    Raises
+    ------
+    Exception
+        "Number of device runs files must be the same as no device runs files".
+
+    Returns
+    -------
+    listOfFiles : list
+        2D arrays of:
+            [0] mag_diff
+            [1] motility_nodev
+            [2] motility_dev
+            [3] motility_diff
+            [4] motility_classification
+            [5] receptor (vel_crit)
+    rx : array
+        X-Coordiantes.
+    ry : array
+        Y-Coordinates.
+    dx : scalar
+        x-spacing.
+    dy : scalar
+        y-spacing.
+    gridtype : str
+        grid type [structured or unstructured].
+
+    """
+    if not os.path.exists(fpath_nodev):
+        raise FileNotFoundError(f"The directory {fpath_nodev} does not exist.")
+    if not os.path.exists(fpath_dev):
+        raise FileNotFoundError(f"The directory {fpath_dev} does not exist.")
+
+    if streaming:
+        gridtype, xcor, ycor, mag_combined_nodev, mag_combined_dev = (
+            combine_velocity_chunked(
+                fpath_nodev,
+                fpath_dev,
+                probabilities_file,
+                value_selection,
+                time_chunk_size=time_chunk_size,
+                max_workers=max_workers,
+                use_processes=use_processes,
+                progress_callback=scale_progress(progress_callback, 0.0, 0.8),
+            )
+        )
+    else:
+        gridtype, xcor, ycor, mag_combined_nodev, mag_combined_dev = (
+            combine_velocity_in_memory(
+                fpath_nodev,
+                fpath_dev,
+                probabilities_file,
+                value_selection,
+                progress_callback=scale_progress(progress_callback, 0.0, 0.8),
+            )
+        )
+
     mag_diff = mag_combined_dev - mag_combined_nodev
     velcrit = calc_receptor_array(
         receptor_filename, xcor, ycor, latlon=latlon, mask=~np.isnan(mag_diff)
@@ -431,31 +774,34 @@ def calculate_velocity_stressors(
             "critical_velocity": velcrit,
         }
     else:  # unstructured
-        dxdy = estimate_grid_spacing(xcor, ycor, nsamples=100)
+        dxdy = estimate_grid_spacing(xcor, ycor, nsamples=100, method=spacing_method)
         dx = dxdy
         dy = dxdy
-        rx, ry, mag_diff_struct = create_structured_array_from_unstructured(
-            xcor, ycor, mag_diff, dxdy, flatness=0.2
-        )
-        _, _, mag_combined_dev_struct = create_structured_array_from_unstructured(
-            xcor, ycor, mag_combined_dev, dxdy, flatness=0.2
-        )
-        _, _, mag_combined_nodev_struct = create_structured_array_from_unstructured(
-            xcor, ycor, mag_combined_nodev, dxdy, flatness=0.2
-        )
+        report_progress(progress_callback, "triangulation", 0.8)
+        regridder = UnstructuredGridRegridder(xcor, ycor, dxdy, flatness=0.2)
+        rx = regridder.x_grid
+        ry = regridder.y_grid
+        fields = {
+            "mag_diff": mag_diff,
+            "mag_combined_dev": mag_combined_dev,
+            "mag_combined_nodev": mag_combined_nodev,
+        }
         if not ((receptor_filename is None) or (receptor_filename == "")):
-            _, _, motility_nodev_struct = create_structured_array_from_unstructured(
-                xcor, ycor, motility_nodev, dxdy, flatness=0.2
-            )
-            _, _, motility_dev_struct = create_structured_array_from_unstructured(
-                xcor, ycor, motility_dev, dxdy, flatness=0.2
-            )
-            _, _, motility_diff_struct = create_structured_array_from_unstructured(
-                xcor, ycor, motility_diff, dxdy, flatness=0.2
-            )
-            _, _, velcrit_struct = create_structured_array_from_unstructured(
-                xcor, ycor, velcrit, dxdy, flatness=0.2
-            )
+            fields["motility_nodev"] = motility_nodev
+            fields["motility_dev"] = motility_dev
+            fields["motility_diff"] = motility_diff
+            fields["velcrit"] = velcrit
+        # all fields are interpolated in one pass
+        report_progress(progress_callback, f"regridding {len(fields)} fields", 0.9)
+        structured = regridder.regrid_fields(fields)
+        mag_diff_struct = structured["mag_diff"]
+        mag_combined_dev_struct = structured["mag_combined_dev"]
+        mag_combined_nodev_struct = structured["mag_combined_nodev"]
+        if not ((receptor_filename is None) or (receptor_filename == "")):
+            motility_nodev_struct = structured["motility_nodev"]
+            motility_dev_struct = structured["motility_dev"]
+            motility_diff_struct = structured["motility_diff"]
+            velcrit_struct = structured["velcrit"]
 
         else:
             motility_nodev_struct = np.nan * mag_diff_struct
@@ -493,6 +839,15 @@ def run_velocity_stressor(
     receptor_filename: Optional[str] = None,
     secondary_constraint_filename: Optional[str] = None,
     value_selection: Optional[str] = None,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    spacing_method: str = "random",
+    raster_profile: Union[str, List[str]] = "default",
+    approx_stats: bool = False,
+    cog: bool = False,
+    overview_resampling: Optional[Dict[str, str]] = None,
+    output_format: str = "gtiff",
+    progress_callback: Optional[Callable[[str, float], None]] = None,
 ) -> Dict[str, str]:
     """
     creates geotiffs and area change statistics files for velocity change
@@ -513,6 +868,38 @@ def run_velocity_stressor(
         File path to the recetptor file (*.csv or *.tif). The default is None.
     secondary_constraint_filename: str, optional
         File path to the secondary constraint file (*.tif). The default is None.
+    value_selection : str, optional
+        Temporal selection of velocity (Maximum, Mean or Final Timestep).
+        The default is None (Maximum).
+    max_workers : int, optional
+        number of runs read concurrently. The default is 1.
+    use_processes : bool, optional
+        True to read runs in a process pool, False for a thread pool.
+        The default is False.
+    spacing_method : str, optional
+        sampling method of estimate_grid_spacing for unstructured grids
+        ("random", "stratified" or "all"). The default is "random".
+    raster_profile : str or list, optional
+        GeoTIFF output profile ('default', 'tiled', 'deflate' or 'zstd') or
+        list of GTiff creation options. The default is 'default'.
+    approx_stats : bool, optional
+        True to compute approximate raster statistics. The default is False.
+    cog : bool, optional
+        True to write Cloud-Optimized GeoTIFFs with internal overviews. The
+        default is False.
+    overview_resampling : dict, optional
+        key = output raster name, val = overview resampling method. The
+        default is None (nearest for classified layers, average otherwise).
+    output_format : str, optional
+        'gtiff' for one geotiff per output, 'multiband' for one multi-band
+        geotiff (velocity.tif) or 'netcdf' for one compressed
+        CF-NetCDF (velocity.nc). The default is 'gtiff'.
+    progress_callback : callable, optional
+        called with the stage name and the fraction of the run completed at
+        the start of each step ('file loading', each 'run file i of n',
+        'triangulation' and 'regridding' of unstructured grids, 'raster
+        writing' each raster, 'statistics' each table and 'done'), can raise
+        RunCancelled to stop the run. The default is None.
 
     Returns
     -------
@@ -523,206 +910,233 @@ def run_velocity_stressor(
     os.makedirs(
         output_path, exist_ok=True
     )  # create output directory if it doesn't exist
+    timer = RunTimer("velocity", progress_callback)
+    try:
+        report_progress(timer, "file loading", 0.0)
+
+        dict_of_arrays, rx, ry, dx, dy, gridtype = calculate_velocity_stressors(
+            fpath_nodev=dev_notpresent_file,
+            fpath_dev=dev_present_file,
+            probabilities_file=probabilities_file,
+            receptor_filename=receptor_filename,
+            latlon=crs == 4326,
+            value_selection=value_selection,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            spacing_method=spacing_method,
+            progress_callback=scale_progress(timer, 0.0, 0.5),
+        )
 
-    dict_of_arrays, rx, ry, dx, dy, gridtype = calculate_velocity_stressors(
-        fpath_nodev=dev_notpresent_file,
-        fpath_dev=dev_present_file,
-        probabilities_file=probabilities_file,
-        receptor_filename=receptor_filename,
-        latlon=crs == 4326,
-        value_selection=value_selection,
-    )
-
-    if not ((receptor_filename is None) or (receptor_filename == "")):
-        use_numpy_arrays = [
-            "velocity_magnitude_without_devices",
-            "velocity_magnitude_with_devices",
-            "velocity_magnitude_difference",
-            "motility_without_devices",
-            "motility_with_devices",
-            "motility_difference",
-            "motility_classified",
-            "critical_velocity",
-        ]
-    else:
-        use_numpy_arrays = [
-            "velocity_magnitude_without_devices",
-            "velocity_magnitude_with_devices",
-            "velocity_magnitude_difference",
-        ]
+        if not ((receptor_filename is None) or (receptor_filename == "")):
+            use_numpy_arrays = [
+                "velocity_magnitude_without_devices",
+                "velocity_magnitude_with_devices",
+                "velocity_magnitude_difference",
+                "motility_without_devices",
+                "motility_with_devices",
+                "motility_difference",
+                "motility_classified",
+                "critical_velocity",
+            ]
+        else:
+            use_numpy_arrays = [
+                "velocity_magnitude_without_devices",
+                "velocity_magnitude_with_devices",
+                "velocity_magnitude_difference",
+            ]
 
-    if not (
-        (secondary_constraint_filename is None) or (secondary_constraint_filename == "")
-    ):
-        if not os.path.exists(secondary_constraint_filename):
-            raise FileNotFoundError(
-                f"The file {secondary_constraint_filename} does not exist."
+        if not (
+            (secondary_constraint_filename is None)
+            or (secondary_constraint_filename == "")
+        ):
+            if not os.path.exists(secondary_constraint_filename):
+                raise FileNotFoundError(
+                    f"The file {secondary_constraint_filename} does not exist."
+                )
+            rrx, rry, constraint = secondary_constraint_geotiff_to_numpy(
+                secondary_constraint_filename, rx, ry
             )
-        rrx, rry, constraint = secondary_constraint_geotiff_to_numpy(
-            secondary_constraint_filename
-        )
-        dict_of_arrays["velocity_risk_layer"] = resample_structured_grid(
-            rrx, rry, constraint, rx, ry, interpmethod="nearest"
-        )
-        use_numpy_arrays.append("velocity_risk_layer")
+            report_progress(timer, "regridding velocity_risk_layer", 0.5)
+            dict_of_arrays["velocity_risk_layer"] = resample_structured_grid(
+                rrx, rry, constraint, rx, ry, interpmethod="nearest"
+            )
+            use_numpy_arrays.append("velocity_risk_layer")
 
-    numpy_array_names = [i + ".tif" for i in use_numpy_arrays]
+        numpy_array_names = [i + ".tif" for i in use_numpy_arrays]
 
-    output_rasters = []
-    for array_name, use_numpy_array in zip(numpy_array_names, use_numpy_arrays):
-        if gridtype == "structured":
-            numpy_array = np.flip(np.transpose(dict_of_arrays[use_numpy_array]), axis=0)
-        else:
-            numpy_array = np.flip(dict_of_arrays[use_numpy_array], axis=0)
+        output_rasters = []
+        rasters = {}  # arrays as stored in the rasters, for the area calculations
+        bundle_arrays = {}
+        for ic, (array_name, use_numpy_array) in enumerate(
+            zip(numpy_array_names, use_numpy_arrays)
+        ):
+            if gridtype == "structured":
+                numpy_array = np.flip(
+                    np.transpose(dict_of_arrays[use_numpy_array]), axis=0
+                )
+            else:
+                numpy_array = np.flip(dict_of_arrays[use_numpy_array], axis=0)
+
+            cell_resolution = [dx, dy]
+            if crs == 4326:
+                rxx = np.where(rx > 180, rx - 360, rx)
+                bounds = [rxx.min() - dx / 2, ry.max() - dy / 2]
+            else:
+                bounds = [rx.min() - dx / 2, ry.max() - dy / 2]
+            rows, cols = numpy_array.shape
+            rasters[use_numpy_array] = raster_from_array(
+                numpy_array, bounds, cell_resolution
+            )
+            if output_format != "gtiff":
+                # written together after the loop
+                bundle_arrays[use_numpy_array] = numpy_array
+                continue
+            report_progress(
+                timer,
+                f"raster writing {use_numpy_array}",
+                0.6 + 0.2 * ic / len(numpy_array_names),
+            )
+            # create an ouput raster given the stressor file path
+            output_rasters.append(os.path.join(output_path, array_name))
+            output_raster = create_raster(
+                os.path.join(output_path, array_name),
+                cols,
+                rows,
+                nbands=1,
+                profile=raster_profile,
+            )
 
-        cell_resolution = [dx, dy]
-        if crs == 4326:
-            rxx = np.where(rx > 180, rx - 360, rx)
-            bounds = [rxx.min() - dx / 2, ry.max() - dy / 2]
-        else:
-            bounds = [rx.min() - dx / 2, ry.max() - dy / 2]
-        rows, cols = numpy_array.shape
-        # create an ouput raster given the stressor file path
-        output_rasters.append(os.path.join(output_path, array_name))
-        output_raster = create_raster(
-            os.path.join(output_path, array_name),
-            cols,
-            rows,
-            nbands=1,
-        )
+            # post processing of numpy array to output raster
+            numpy_array_to_raster(
+                output_raster,
+                numpy_array,
+                bounds,
+                cell_resolution,
+                crs,
+                os.path.join(output_path, array_name),
+                approx_stats=approx_stats,
+            )
+            output_raster = None
+            if cog:
+                convert_to_cog(
+                    os.path.join(output_path, array_name),
+                    resampling=layer_overview_resampling(
+                        use_numpy_array, overview_resampling
+                    ),
+                    compress="ZSTD" if raster_profile == "zstd" else "DEFLATE",
+                )
 
-        # post processing of numpy array to output raster
-        numpy_array_to_raster(
-            output_raster,
-            numpy_array,
-            bounds,
-            cell_resolution,
-            crs,
-            os.path.join(output_path, array_name),
-        )
-        output_raster = None
-
-    # Area calculations pull form rasters to ensure uniformity
-    bin_layer(
-        os.path.join(output_path, "velocity_magnitude_difference.tif"),
-        receptor_filename=None,
-        receptor_names=None,
-        latlon=crs == 4326,
-    ).to_csv(
-        os.path.join(output_path, "velocity_magnitude_difference.csv"), index=False
-    )
-    if not (
-        (secondary_constraint_filename is None) or (secondary_constraint_filename == "")
-    ):
-        bin_layer(
-            os.path.join(output_path, "velocity_magnitude_difference.tif"),
-            receptor_filename=os.path.join(output_path, "velocity_risk_layer.tif"),
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="risk layer",
-        ).to_csv(
-            os.path.join(
-                output_path, "velocity_magnitude_difference_at_velocity_risk_layer.csv"
-            ),
-            index=False,
-        )
-    if not ((receptor_filename is None) or (receptor_filename == "")):
-        bin_layer(
-            os.path.join(output_path, "velocity_magnitude_difference.tif"),
-            receptor_filename=os.path.join(output_path, "critical_velocity.tif"),
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="critical velocity",
-        ).to_csv(
-            os.path.join(
-                output_path, "velocity_magnitude_difference_at_critical_velocity.csv"
-            ),
-            index=False,
-        )
+        bundle_layers = {}
+        if output_format != "gtiff":
+            report_progress(timer, f"raster writing {output_format}", 0.6)
+            bundle_layers = write_result_bundle(
+                os.path.join(output_path, "velocity"),
+                bundle_arrays,
+                bounds,
+                cell_resolution,
+                crs,
+                output_format=output_format,
+                profile=raster_profile,
+                approx_stats=approx_stats,
+                cog=cog,
+                overview_resampling=overview_resampling,
+            )
 
-        bin_layer(
-            os.path.join(output_path, "motility_difference.tif"),
-            receptor_filename=None,
-            receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-        ).to_csv(os.path.join(output_path, "motility_difference.csv"), index=False)
+        # cell centres and areas are shared by all rasters on the output grid
+        geometry = GridGeometry(*next(iter(rasters.values()))[:2], latlon=crs == 4326)
 
-        bin_layer(
-            os.path.join(output_path, "motility_difference.tif"),
-            receptor_filename=os.path.join(output_path, "critical_velocity.tif"),
+        # Area calculations pull form rasters to ensure uniformity
+        report_progress(timer, "statistics velocity_magnitude_difference", 0.8)
+        bin_raster(
+            rasters["velocity_magnitude_difference"],
+            receptor_raster=None,
             receptor_names=None,
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="critical velocity",
-        ).to_csv(
-            os.path.join(output_path, "motility_difference_at_critical_velocity.csv"),
-            index=False,
-        )
-
-        classify_layer_area(
-            os.path.join(output_path, "motility_classified.tif"),
-            at_values=[-3, -2, -1, 0, 1, 2, 3],
-            value_names=[
-                "New Deposition",
-                "Increased Deposition",
-                "Reduced Deposition",
-                "No Change",
-                "Reduced Erosion",
-                "Increased Erosion",
-                "New Erosion",
-            ],
             latlon=crs == 4326,
-        ).to_csv(os.path.join(output_path, "motility_classified.csv"), index=False)
-
-        classify_layer_area(
-            os.path.join(output_path, "motility_classified.tif"),
-            receptor_filename=os.path.join(output_path, "critical_velocity.tif"),
-            at_values=[-3, -2, -1, 0, 1, 2, 3],
-            value_names=[
-                "New Deposition",
-                "Increased Deposition",
-                "Reduced Deposition",
-                "No Change",
-                "Reduced Erosion",
-                "Increased Erosion",
-                "New Erosion",
-            ],
-            limit_receptor_range=[0, np.inf],
-            latlon=crs == 4326,
-            receptor_type="critical velocity",
+            geometry=geometry,
         ).to_csv(
-            os.path.join(output_path, "motility_classified_at_critical_velocity.csv"),
-            index=False,
+            os.path.join(output_path, "velocity_magnitude_difference.csv"), index=False
         )
-
         if not (
             (secondary_constraint_filename is None)
             or (secondary_constraint_filename == "")
         ):
-            bin_layer(
-                os.path.join(output_path, "motility_difference.tif"),
-                receptor_filename=os.path.join(output_path, "velocity_risk_layer.tif"),
+            report_progress(
+                timer,
+                "statistics velocity_magnitude_difference_at_velocity_risk_layer",
+                0.82,
+            )
+            bin_raster(
+                rasters["velocity_magnitude_difference"],
+                receptor_raster=rasters["velocity_risk_layer"],
                 receptor_names=None,
                 limit_receptor_range=[0, np.inf],
                 latlon=crs == 4326,
+                geometry=geometry,
                 receptor_type="risk layer",
             ).to_csv(
                 os.path.join(
-                    output_path, "motility_difference_at_velocity_risk_layer.csv"
+                    output_path,
+                    "velocity_magnitude_difference_at_velocity_risk_layer.csv",
+                ),
+                index=False,
+            )
+        if not ((receptor_filename is None) or (receptor_filename == "")):
+            report_progress(
+                timer,
+                "statistics velocity_magnitude_difference_at_critical_velocity",
+                0.84,
+            )
+            bin_raster(
+                rasters["velocity_magnitude_difference"],
+                receptor_raster=rasters["critical_velocity"],
+                receptor_names=None,
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+                receptor_type="critical velocity",
+            ).to_csv(
+                os.path.join(
+                    output_path,
+                    "velocity_magnitude_difference_at_critical_velocity.csv",
                 ),
                 index=False,
             )
 
-            classify_layer_area_2nd_constraint(
-                raster_to_sample=os.path.join(output_path, "motility_classified.tif"),
-                secondary_constraint_filename=os.path.join(
-                    output_path, "velocity_risk_layer.tif"
+            report_progress(timer, "statistics motility_difference", 0.87)
+            bin_raster(
+                rasters["motility_difference"],
+                receptor_raster=None,
+                receptor_names=None,
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+            ).to_csv(os.path.join(output_path, "motility_difference.csv"), index=False)
+
+            report_progress(
+                timer,
+                "statistics motility_difference_at_critical_velocity",
+                0.89,
+            )
+            bin_raster(
+                rasters["motility_difference"],
+                receptor_raster=rasters["critical_velocity"],
+                receptor_names=None,
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+                receptor_type="critical velocity",
+            ).to_csv(
+                os.path.join(
+                    output_path, "motility_difference_at_critical_velocity.csv"
                 ),
-                at_raster_values=[-3, -2, -1, 0, 1, 2, 3],
-                at_raster_value_names=[
+                index=False,
+            )
+
+            report_progress(timer, "statistics motility_classified", 0.91)
+            classify_raster_area(
+                rasters["motility_classified"],
+                at_values=[-3, -2, -1, 0, 1, 2, 3],
+                value_names=[
                     "New Deposition",
                     "Increased Deposition",
                     "Reduced Deposition",
@@ -731,16 +1145,97 @@ def run_velocity_stressor(
                     "Increased Erosion",
                     "New Erosion",
                 ],
-                limit_constraint_range=[0, np.inf],
                 latlon=crs == 4326,
-                receptor_type="risk layer",
+                geometry=geometry,
+            ).to_csv(os.path.join(output_path, "motility_classified.csv"), index=False)
+
+            report_progress(
+                timer,
+                "statistics motility_classified_at_critical_velocity",
+                0.93,
+            )
+            classify_raster_area(
+                rasters["motility_classified"],
+                receptor_raster=rasters["critical_velocity"],
+                at_values=[-3, -2, -1, 0, 1, 2, 3],
+                value_names=[
+                    "New Deposition",
+                    "Increased Deposition",
+                    "Reduced Deposition",
+                    "No Change",
+                    "Reduced Erosion",
+                    "Increased Erosion",
+                    "New Erosion",
+                ],
+                limit_receptor_range=[0, np.inf],
+                latlon=crs == 4326,
+                geometry=geometry,
+                receptor_type="critical velocity",
             ).to_csv(
                 os.path.join(
-                    output_path, "motility_classified_at_velocity_risk_layer.csv"
+                    output_path, "motility_classified_at_critical_velocity.csv"
                 ),
                 index=False,
             )
-    output = {}
+
+            if not (
+                (secondary_constraint_filename is None)
+                or (secondary_constraint_filename == "")
+            ):
+                report_progress(
+                    timer,
+                    "statistics motility_difference_at_velocity_risk_layer",
+                    0.96,
+                )
+                bin_raster(
+                    rasters["motility_difference"],
+                    receptor_raster=rasters["velocity_risk_layer"],
+                    receptor_names=None,
+                    limit_receptor_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path, "motility_difference_at_velocity_risk_layer.csv"
+                    ),
+                    index=False,
+                )
+
+                report_progress(
+                    timer,
+                    "statistics motility_classified_at_velocity_risk_layer",
+                    0.98,
+                )
+                classify_raster_area_2nd_constraint(
+                    raster=rasters["motility_classified"],
+                    secondary_constraint_raster=rasters["velocity_risk_layer"],
+                    at_raster_values=[-3, -2, -1, 0, 1, 2, 3],
+                    at_raster_value_names=[
+                        "New Deposition",
+                        "Increased Deposition",
+                        "Reduced Deposition",
+                        "No Change",
+                        "Reduced Erosion",
+                        "Increased Erosion",
+                        "New Erosion",
+                    ],
+                    limit_constraint_range=[0, np.inf],
+                    latlon=crs == 4326,
+                    geometry=geometry,
+                    receptor_type="risk layer",
+                ).to_csv(
+                    os.path.join(
+                        output_path, "motility_classified_at_velocity_risk_layer.csv"
+                    ),
+                    index=False,
+                )
+        timer.write(output_path)
+    finally:
+        # stop tracing and profiling if the run failed or was cancelled
+        timer.stop()
+    report_progress(progress_callback, "done", 1.0)
+    output = dict(bundle_layers)
 
     for val in output_rasters:
         output[os.path.basename(os.path.normpath(val)).split(".")[0]] = val
@@ -24,18 +24,21 @@
 """
 import configparser
 import os.path
+from functools import partial
 import xml.etree.ElementTree as ET
-from typing import Optional
+from typing import Dict, Optional
 import pandas as pd
 
 # pylint: disable=no-name-in-module
 from qgis.core import (
     Qgis,
+    QgsApplication,
     QgsCoordinateReferenceSystem,
     QgsMessageLog,
     QgsProject,
     QgsRasterLayer,
     QgsLayerTreeGroup,
+    QgsTask,
 )
 
 # pylint: disable=no-name-in-module
@@ -57,14 +60,19 @@ from qgis.PyQt.QtWidgets import QAction, QFileDialog, QWidget, QLineEdit
 from .resources import qInitResources
 
 # Import Modules
-from .modules.shear_stress_module import run_shear_stress_stressor
-from .modules.velocity_module import run_velocity_stressor
-from .modules.acoustics_module import run_acoustics_stressor
-from .modules.power_module import calculate_power
+from .modules.batch import selected_modules
+from .stressor_receptor_calc_task import StressorModuleTask
 
 # Import the code for the dialog
 from .stressor_receptor_calc_dialog import StressorReceptorCalcDialog
 
+# layer tree group of the output layers of each module
+MODULE_GROUP_NAMES = {
+    "shear stress": "Shear Stress Stressor",
+    "velocity": "Velocity Stressor",
+    "acoustics": "Acoustic Stressor",
+}
+
 
 # Most of the below is boilerplate code  until plugin specific functions start----
 def df_from_qml(fpath: str) -> pd.DataFrame:
@@ -138,6 +146,8 @@ class StressorReceptorCalc:
         # Check if plugin was started the first time in current QGIS session
         # Must be set in init_gui() to survive plugin reloads
         self.first_start = None
+        # background tasks of the module runs
+        self.tasks = []
 
     # noinspection PyMethodMayBeStatic
     def tr(self, message: str) -> str:
@@ -459,16 +469,19 @@ class StressorReceptorCalc:
         fpath: str,
         root: Optional[QgsLayerTreeGroup] = None,
         group: Optional[QgsLayerTreeGroup] = None,
+        name: Optional[str] = None,
     ) -> None:
         """
         Adds a raster layer to the QGIS project and optionally places it in a specified group.
 
         Args:
-            fpath (str): The file path of the raster layer to add.
+            fpath (str): The file path or GDAL dataset name (e.g. a band of a result
+            bundle) of the raster layer to add.
             root (QgsLayerTreeGroup, optional): The root group to add the layer to.
             group (QgsLayerTreeGroup, optional): The group within the root to add the layer to.
+            name (str, optional): The layer name. Defaults to the file name.
         """
-        basename = os.path.splitext(os.path.basename(fpath))[0]
+        basename = name or os.path.splitext(os.path.basename(fpath))[0]
         if group is not None:
             vlayer = QgsRasterLayer(fpath, basename)
             QgsProject.instance().addMapLayer(vlayer)
@@ -485,9 +498,10 @@ class StressorReceptorCalc:
         stylepath: Optional[str] = None,
         root: Optional[QgsLayerTreeGroup] = None,
         group: Optional[QgsLayerTreeGroup] = None,
+        name: Optional[str] = None,
     ) -> None:  # , ranges=True):
         """Style and add the result layer to map."""
-        basename = os.path.splitext(os.path.basename(fpath))[0]
+        basename = name or os.path.splitext(os.path.basename(fpath))[0]
         if group is not None:
             vlayer = QgsRasterLayer(fpath, basename)
             QgsProject.instance().addMapLayer(vlayer)
@@ -508,6 +522,49 @@ class StressorReceptorCalc:
             # refresh legend entries
             self.iface.layerTreeView().refreshLayerSymbology(layer.id())
 
+    def add_module_layers(
+        self,
+        module: str,
+        filenames: Dict[str, str],
+        stylefiles_df: Optional[pd.DataFrame] = None,
+    ) -> None:
+        """
+        Adds the output layers of a module to the QGIS project in the module's group.
+
+        Args:
+            module (str): The module name ("power", "shear stress", "velocity" or
+            "acoustics"). The power module has no layers.
+            filenames (dict): The layer names and file paths returned by the module.
+            stylefiles_df (pandas.DataFrame, optional): The style files by layer name.
+        """
+        if (module not in MODULE_GROUP_NAMES) or (not filenames):
+            return
+        root = QgsProject.instance().layerTreeRoot()
+        # adding a first layer outside of the groups sets up the project
+        group = root.addGroup("temporary")
+        self.add_layer(filenames[list(filenames.keys())[0]], root=root, group=group)
+
+        group_name = MODULE_GROUP_NAMES[module]
+        group = root.findGroup(group_name)
+        if group is None:
+            group = root.addGroup(group_name)
+        for key, value in filenames.items():
+            if stylefiles_df is None:
+                self.add_layer(value, root=root, group=group, name=key)
+            else:
+                self.style_layer(
+                    value,
+                    stylefiles_df.loc[key].item(),
+                    root=root,
+                    group=group,
+                    name=key,
+                )
+
+        # remove temproary layer group
+        group_layer = root.findGroup("temporary")
+        if group_layer is not None:
+            root.removeChildNode(group_layer)
+
     def select_folder_module(
         self, module: Optional[str] = None, option: Optional[str] = None
     ) -> None:
@@ -969,154 +1026,64 @@ class StressorReceptorCalc:
             else:
                 stylefiles_df = None
 
-            initialize_group = True
-
             # if the output file path is empty display a warning
             if output_folder_name == "":
                 QgsMessageLog.logMessage(
                     "Output file path not given.", level=Qgis.MessageLevel.Warnin
                 )
 
-            # Run Power Module
-            if power_files_directory != "":
-                if (power_probabilities_fname is None) or (
-                    power_probabilities_fname == ""
-                ):
-                    power_probabilities_fname = shear_stress_probabilities_fname
-                    # default to shear stress probabilities if none given
-                calculate_power(
-                    power_files_directory,
-                    power_probabilities_fname,
-                    save_path=os.path.join(output_folder_name, "Power Module"),
-                    crs=crs,
-                )
-
-            # Run Shear Stress Module
-            if not (
-                (shear_stress_device_present_directory is None)
-                or (shear_stress_device_present_directory == "")
-            ):  # svar == "Shear Stress":
-                sfilenames = run_shear_stress_stressor(
-                    dev_present_file=shear_stress_device_present_directory,
-                    dev_notpresent_file=shear_stress_device_not_present_directory,
-                    probabilities_file=shear_stress_probabilities_fname,
-                    crs=crs,
-                    output_path=os.path.join(output_folder_name, "Shear Stress Module"),
-                    receptor_filename=shear_grain_size_file,
-                    secondary_constraint_filename=shear_risk_layer_file,
-                    value_selection=shear_stress_averaging,
-                )
-
-                if initialize_group:
-                    root = QgsProject.instance().layerTreeRoot()
-                    group = root.addGroup("temporary")
-                    self.add_layer(
-                        sfilenames[list(sfilenames.keys())[0]], root=root, group=group
-                    )
-                    initialize_group = False
-
-                group_name = "Shear Stress Stressor"
-                root = QgsProject.instance().layerTreeRoot()
-                group = root.findGroup(group_name)
-                if group is None:
-                    group = root.addGroup(group_name)
-                for key, value in sfilenames.items():
-                    if stylefiles_df is None:
-                        self.add_layer(value, root=root, group=group)
-                    else:
-                        self.style_layer(
-                            value,
-                            stylefiles_df.loc[key].item(),
-                            root=root,
-                            group=group,
-                        )
-
-            # Run Velocity Module
-            if not (
-                (velocity_device_present_directory is None)
-                or (velocity_device_present_directory == "")
-            ):  # svar == "Velocity":
-                vfilenames = run_velocity_stressor(
-                    dev_present_file=velocity_device_present_directory,
-                    dev_notpresent_file=velocity_device_not_present_directory,
-                    probabilities_file=velocity_probabilities_fname,
-                    crs=crs,
-                    output_path=os.path.join(output_folder_name, "Velocity Module"),
-                    receptor_filename=velocity_threshold_file,
-                    secondary_constraint_filename=velocity_risk_layer_file,
-                    value_selection=velocity_averaging,
-                )
-
-                if initialize_group:
-                    root = QgsProject.instance().layerTreeRoot()
-                    group = root.addGroup("temporary")
-                    self.add_layer(
-                        vfilenames[list(vfilenames.keys())[0]], root=root, group=group
-                    )
-                    initialize_group = False
-
-                group_name = "Velocity Stressor"
-                root = QgsProject.instance().layerTreeRoot()
-                group = root.findGroup(group_name)
-                if group is None:
-                    group = root.addGroup(group_name)
-                for key, value in vfilenames.items():
-                    if stylefiles_df is None:
-                        self.add_layer(value, root=root, group=group)
-                    else:
-                        self.style_layer(
-                            value,
-                            stylefiles_df.loc[key].item(),
-                            root=root,
-                            group=group,
-                        )
-
-            # Run Acoustics Module
-            if not (
-                (paracousti_device_present_directory is None)
-                or (paracousti_device_present_directory == "")
-            ):  # if svar == "Acoustics":
-                pfilenames = run_acoustics_stressor(
-                    dev_present_file=paracousti_device_present_directory,
-                    dev_notpresent_file=paracousti_device_not_present_directory,
-                    probabilities_file=paracousti_probabilities_fname,
-                    crs=crs,
-                    output_path=os.path.join(output_folder_name, "Acoustics Module"),
-                    receptor_filename=paracousti_threshold_file,
-                    species_folder=paracousti_species_directory,
-                    Averaging=paracousti_averaging,
-                    secondary_constraint_filename=paracousti_risk_layer_file,
+            # Inputs in the format of an input file, see modules/batch.py
+            config = {
+                "shear stress device present filepath": shear_stress_device_present_directory,
+                "shear stress device not present filepath": shear_stress_device_not_present_directory,
+                "shear stress averaging": shear_stress_averaging,
+                "shear stress probabilities file": shear_stress_probabilities_fname,
+                "shear stress grain size file": shear_grain_size_file,
+                "shear stress risk layer file": shear_risk_layer_file,
+                "velocity device present filepath": velocity_device_present_directory,
+                "velocity device not present filepath": velocity_device_not_present_directory,
+                "velocity averaging": velocity_averaging,
+                "velocity probabilities file": velocity_probabilities_fname,
+                "velocity threshold file": velocity_threshold_file,
+                "velocity risk layer file": velocity_risk_layer_file,
+                "paracousti device present filepath": paracousti_device_present_directory,
+                "paracousti device not present filepath": paracousti_device_not_present_directory,
+                "paracousti averaging": paracousti_averaging,
+                "paracousti probabilities file": paracousti_probabilities_fname,
+                "paracousti threshold file": paracousti_threshold_file,
+                "paracousti risk layer file": paracousti_risk_layer_file,
+                "paracousti species filepath": paracousti_species_directory,
+                "power files filepath": power_files_directory,
+                "power probabilities file": power_probabilities_fname,
+                "coordinate reference system": str(crs),
+                "output filepath": output_folder_name,
+            }
+
+            # Run each module as a background task, in its own process unless
+            # disabled in the settings, and add its layers when it finishes
+            parallel = QSettings().value("seat/parallel_modules", True, type=bool)
+            log_timings = QSettings().value("seat/log_timings", False, type=bool)
+            # grid spacing sampling of unstructured runs, see estimate_grid_spacing
+            spacing_method = QSettings().value("seat/spacing_method", "random")
+            # keep references to running tasks, finished ones can be released
+            self.tasks = [
+                task
+                for task in self.tasks
+                if task.status() not in (QgsTask.Complete, QgsTask.Terminated)
+            ]
+            for module in selected_modules(config):
+                task = StressorModuleTask(
+                    module,
+                    config,
+                    on_finished=partial(
+                        self.add_module_layers, stylefiles_df=stylefiles_df
+                    ),
+                    parallel=parallel,
+                    log_timings=log_timings,
+                    options={"spacing_method": spacing_method},
                 )
-
-                if initialize_group:
-                    root = QgsProject.instance().layerTreeRoot()
-                    group = root.addGroup("temporary")
-                    self.add_layer(
-                        pfilenames[list(pfilenames.keys())[0]], root=root, group=group
-                    )
-                    initialize_group = False
-
-                group_name = "Acoustic Stressor"
-                root = QgsProject.instance().layerTreeRoot()
-                group = root.findGroup(group_name)
-                if group is None:
-                    group = root.addGroup(group_name)
-                for key, value in pfilenames.items():
-                    if stylefiles_df is None:
-                        self.add_layer(value, root=root, group=group)
-                    else:
-                        self.style_layer(
-                            value,
-                            stylefiles_df.loc[key].item(),
-                            root=root,
-                            group=group,
-                        )
-
-            # remove temproary layer group
-            root = QgsProject.instance().layerTreeRoot()
-            group_layer = root.findGroup("temporary")
-            if group_layer is not None:
-                root.removeChildNode(group_layer)
+                self.tasks.append(task)
+                QgsApplication.taskManager().addTask(task)
 
             # close and remove the filehandler
         # fh.close()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""stressor_receptor_calc_task.py
+
+NOTES (Data descriptions and any script specific notes)
+   1. runs a SEAT module as a QGIS background task so the interface stays
+      responsive. Progress is shown in the QGIS task manager and the task can
+      be cancelled between stages (see report_progress in stressor_utils.py).
+   2. with parallel the module runs in its own process, so modules do not
+      share the GIL, and its progress is forwarded through a queue.
+   3. with log_timings the stage timings the module writes to timings.json
+      (see modules/run_timer.py) are shown in the QGIS message log.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+# pylint: disable=no-name-in-module
+from qgis.core import Qgis, QgsMessageLog, QgsTask
+
+from .modules.batch import OUTPUT_FOLDERS, run_module, worker_context
+from .modules.run_timer import TIMINGS_FILENAME, format_timings
+from .modules.stressor_utils import RunCancelled
+
+
+class StressorModuleTask(QgsTask):
+    """
+    Runs one SEAT module in the background.
+
+    Parameters
+    ----------
+    module : str
+        module name, key of MODULES in modules/batch.py.
+    config : Dict
+        input options, see read_config in modules/batch.py.
+    on_finished : callable, optional
+        called on the main thread with the module name and its result when
+        the module completes. The default is None.
+    parallel : bool, optional
+        True to run the module in a worker process. The default is True.
+    log_timings : bool, optional
+        True to show the stage timings in the QGIS message log when the module
+        completes. The default is False.
+    options : Dict, optional
+        passed to the run_*_stressor functions (e.g. spacing_method), see
+        run_module in modules/batch.py. The default is None.
+    """
+
+    def __init__(
+        self,
+        module: str,
+        config: Dict[str, str],
+        on_finished: Optional[Callable[[str, Any], None]] = None,
+        parallel: bool = True,
+        log_timings: bool = False,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(f"SEAT {module} module", QgsTask.CanCancel)
+        self.module = module
+        self.config = config
+        self.on_finished = on_finished
+        self.parallel = parallel
+        self.log_timings = log_timings
+        self.options = options or {}
+        self.stage = ""
+        self.result = None
+        self.exception = None
+
+    def set_stage(self, stage: str, fraction: float) -> None:
+        """Shows the stage starting in the task manager."""
+        self.stage = stage
+        self.setProgress(100 * fraction)
+
+    def progress_callback(self, stage: str, fraction: float) -> None:
+        """Progress callback of a module run in this thread."""
+        if self.isCanceled():
+            raise RunCancelled(
+                f"The {self.module} module was cancelled before {stage}."
+            )
+        self.set_stage(stage, fraction)
+
+    def run(self) -> bool:
+        """Runs the module, in the task manager's thread."""
+        try:
+            if self.parallel:
+                self.result = self.run_in_process()
+            else:
+                self.result = run_module(
+                    self.module,
+                    self.config,
+                    progress_callback=self.progress_callback,
+                    **self.options,
+                )
+        except RunCancelled:
+            return False
+        except Exception as e:  # pylint: disable=broad-except
+            self.exception = e
+            return False
+        return True
+
+    def run_in_process(self) -> Any:
+        """Runs the module in a worker process, following its progress."""
+        context = worker_context()
+        with context.Manager() as manager:
+            progress_queue = manager.Queue()
+            cancel_event = manager.Event()
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                future = executor.submit(
+                    run_module,
+                    self.module,
+                    self.config,
+                    progress_queue,
+                    cancel_event,
+                    **self.options,
+                )
+                while not future.done():
+                    if self.isCanceled():
+                        cancel_event.set()
+                    wait([future], timeout=0.25)
+                    while not progress_queue.empty():
+                        self.set_stage(*progress_queue.get_nowait())
+                return future.result()
+
+    def finished(self, result: bool) -> None:
+        """Called on the main thread once the task ends."""
+        if result:
+            if self.log_timings:
+                self.log_stage_timings()
+            if self.on_finished is not None:
+                self.on_finished(self.module, self.result)
+        elif self.exception is not None:
+            QgsMessageLog.logMessage(
+                f"The {self.module} module failed during {self.stage}: {self.exception}",
+                level=Qgis.MessageLevel.Critical,
+            )
+        else:
+            QgsMessageLog.logMessage(
+                f"The {self.module} module was cancelled during {self.stage}.",
+                level=Qgis.MessageLevel.Info,
+            )
+
+    def log_stage_timings(self) -> None:
+        """Shows the timings.json written by the module in the message log."""
+        filename = os.path.join(
+            self.config["output filepath"],
+            OUTPUT_FOLDERS[self.module],
+            TIMINGS_FILENAME,
+        )
+        if not os.path.exists(filename):
+            return
+        with open(filename, encoding="utf-8") as timings_file:
+            QgsMessageLog.logMessage(
+                format_timings(json.load(timings_file)),
+                "SEAT timings",
+                level=Qgis.MessageLevel.Info,
+            )
@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+from netCDF4 import Dataset
+
+# Get the directory in which the current script is located
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+# Import seat
+parent_dir = os.path.dirname(script_dir)
+sys.path.insert(0, parent_dir)
+
+# fmt: off
+from seat.modules import acoustics_module as am
+# fmt: on
+
+
+class TestReadDepthReduced(unittest.TestCase):
+    """
+    Depth reduction of paracousti files in both [x, y, depth] and [depth, x, y] layouts.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        # [x, y, depth] with distinct sizes so the layouts cannot be confused
+        self.spl = rng.uniform(100, 200, (3, 4, 5)).astype(np.float32)
+        # shallow columns padded with NaN in the deepest bins
+        self.spl[0, 0, 3:] = np.nan
+        self.spl[2, 3, 1:] = np.nan
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_paracousti(self, depth_first):
+        filename = os.path.join(self.tmpdir.name, f'paracousti_{depth_first}.nc')
+        with Dataset(filename, 'w') as nc:
+            nc.createDimension('x', 3)
+            nc.createDimension('y', 4)
+            nc.createDimension('depth', 5)
+            lon = nc.createVariable('lon', 'f8', ('x', 'y'))
+            lon.units = 'degrees_east'
+            lon[:] = np.arange(12).reshape(3, 4)
+            lat = nc.createVariable('lat', 'f8', ('x', 'y'))
+            lat.units = 'degrees_north'
+            lat[:] = np.arange(12).reshape(3, 4)
+            if depth_first:
+                var = nc.createVariable('totSPL', 'f4', ('depth', 'x', 'y'))
+                var[:] = np.moveaxis(self.spl, 2, 0)
+            else:
+                var = nc.createVariable('totSPL', 'f4', ('x', 'y', 'depth'))
+                var[:] = self.spl
+            var.coordinates = 'lon lat'
+        return filename
+
+    def test_depth_reductions(self):
+        expected = {
+            None: np.nanmax(self.spl, axis=2),
+            'Depth Maximum': np.nanmax(self.spl, axis=2),
+            'Depth Average': np.nanmean(self.spl, axis=2),
+            'Bottom Bin': self.spl[:, :, -1],
+            'Top Bin': self.spl[:, :, 0],
+        }
+        for depth_first in [False, True]:
+            filename = self.write_paracousti(depth_first)
+            for averaging, values in expected.items():
+                with self.subTest(depth_first=depth_first, averaging=averaging):
+                    result = am.read_depth_reduced_file(filename, 'totSPL', averaging)
+                    self.assertEqual(result.shape, (3, 4))
+                    np.testing.assert_allclose(result, values)
+
+    def test_nan_padded_columns(self):
+        filename = self.write_paracousti(False)
+        # maximum and average ignore the padding
+        maximum = am.read_depth_reduced_file(filename, 'totSPL', 'Depth Maximum')
+        average = am.read_depth_reduced_file(filename, 'totSPL', 'Depth Average')
+        self.assertTrue(np.all(np.isfinite(maximum)))
+        self.assertAlmostEqual(average[2, 3], self.spl[2, 3, 0], places=4)
+        # the bottom bin of a padded column is the padding
+        bottom = am.read_depth_reduced_file(filename, 'totSPL', 'Bottom Bin')
+        self.assertTrue(np.isnan(bottom[0, 0]))
+        self.assertTrue(np.isnan(bottom[2, 3]))
+        self.assertEqual(np.count_nonzero(np.isnan(bottom)), 2)
+        top = am.read_depth_reduced_file(filename, 'totSPL', 'Top Bin')
+        self.assertTrue(np.all(np.isfinite(top)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import sys
+import os
+import configparser
+import tempfile
+import unittest
+
+# Get the directory in which the current script is located
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+# Import seat
+parent_dir = os.path.dirname(script_dir)
+sys.path.insert(0, parent_dir)
+
+# fmt: off
+from seat.modules import batch
+# fmt: on
+
+
+def fake_run(config, **options):
+    """
+    Stands in for a module in the worker processes.
+    """
+    return {'pid': os.getpid(), 'options': options}
+
+
+def fake_stressor(**kwargs):
+    """
+    Stands in for a run_*_stressor function, returns its arguments.
+    """
+    return kwargs
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmpdir.name, 'output')
+        self.grain_size_file = os.path.join(script_dir, 'data/structured/receptor/grainsize_receptor.tif')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_ini(self, **inputs):
+        """
+        Writes an input file in the format of StressorReceptorCalc.save_in.
+        """
+        config = configparser.ConfigParser()
+        config['Input'] = {option: '' for option in batch.INPUT_OPTIONS}
+        config['Input']['coordinate reference system'] = '4326'
+        config['Input'].update(inputs)
+        config['Output'] = {'output filepath': self.output_path}
+        filename = os.path.join(self.tmpdir.name, 'input.ini')
+        with open(filename, 'w', encoding='utf-8') as configfile:
+            config.write(configfile)
+        return filename
+
+    def test_read_config(self):
+        filename = self.write_ini(**{'shear stress grain size file': self.grain_size_file, 'shear stress averaging': 'Maximum'})
+        config = batch.read_config(filename)
+        self.assertEqual(config['shear stress grain size file'], self.grain_size_file)
+        self.assertEqual(config['shear stress averaging'], 'Maximum')
+        self.assertEqual(config['velocity device present filepath'], '')
+        self.assertEqual(config['output filepath'], self.output_path)
+
+    def test_missing_input_path(self):
+        filename = self.write_ini(**{'velocity threshold file': os.path.join(self.tmpdir.name, 'missing.csv')})
+        with self.assertRaises(FileNotFoundError):
+            batch.read_config(filename)
+
+    def test_main_without_modules(self):
+        # nothing to run, only the output folder is created
+        self.assertEqual(batch.main([self.write_ini()]), 0)
+        self.assertTrue(os.path.isdir(self.output_path))
+        self.assertEqual(os.listdir(self.output_path), [])
+
+    def test_parallel_modules(self):
+        from unittest.mock import patch
+
+        modules = {
+            'velocity': (fake_run, 'velocity device present filepath'),
+            'acoustics': (fake_run, 'paracousti device present filepath'),
+        }
+        config = batch.read_config(self.write_ini())
+        config['velocity device present filepath'] = self.tmpdir.name
+        config['paracousti device present filepath'] = self.tmpdir.name
+        with patch.dict(batch.MODULES, modules, clear=True):
+            serial = dict(batch.iter_config(config, max_workers=2))
+            parallel = dict(batch.iter_config(config, parallel=True, max_workers=2))
+
+        self.assertEqual(sorted(parallel), ['acoustics', 'velocity'])
+        self.assertEqual(serial['velocity']['pid'], os.getpid())
+        self.assertNotEqual(parallel['velocity']['pid'], os.getpid())
+        self.assertEqual(parallel['acoustics']['options'], {'max_workers': 2})
+
+    def test_run_module_progress_and_cancel(self):
+        import queue
+        import threading
+        from unittest.mock import patch
+        from seat.modules.stressor_utils import RunCancelled
+
+        def staged_run(config, progress_callback=None, **options):
+            progress_callback('file loading', 0.0)
+            progress_callback('done', 1.0)
+            return {}
+
+        config = batch.read_config(self.write_ini())
+        progress_queue = queue.Queue()
+        cancel_event = threading.Event()
+        with patch.dict(batch.MODULES, {'velocity': (staged_run, 'velocity device present filepath')}):
+            self.assertEqual(batch.run_module('velocity', config, progress_queue, cancel_event), {})
+            self.assertEqual([progress_queue.get_nowait() for _ in range(2)], [('file loading', 0.0), ('done', 1.0)])
+
+            cancel_event.set()
+            with self.assertRaises(RunCancelled):
+                batch.run_module('velocity', config, progress_queue, cancel_event)
+
+    def test_spacing_method_option(self):
+        from unittest.mock import patch
+
+        config = batch.read_config(self.write_ini())
+        config['velocity device present filepath'] = self.tmpdir.name
+        config['paracousti device present filepath'] = self.tmpdir.name
+        with patch.object(batch, 'run_velocity_stressor', fake_stressor), patch.object(batch, 'run_acoustics_stressor', fake_stressor):
+            results = batch.run_config(config, spacing_method='all')
+
+        self.assertEqual(results['velocity']['dev_present_file'], self.tmpdir.name)
+        self.assertEqual(results['velocity']['spacing_method'], 'all')
+        # paracousti grids are structured
+        self.assertEqual(results['acoustics']['dev_present_file'], self.tmpdir.name)
+        self.assertNotIn('spacing_method', results['acoustics'])
+
+    def test_no_qgis_import(self):
+        import subprocess
+
+        code = "import sys, seat.modules.batch; sys.exit('qgis' in sys.modules or 'PyQt5' in sys.modules)"
+        self.assertEqual(subprocess.run([sys.executable, '-c', code], cwd=parent_dir).returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import tempfile
+import shutil
 from qgis.core import QgsApplication
 
 
@@ -369,6 +370,27 @@ class TestPowerModule(unittest.TestCase):
                 self.assertTrue(os.path.exists(os.path.join(tmpdirname, file_name)),
                                 f"Expected output file {file_name} not found.")
 
+    def test_calculate_power_few_runs(self):
+        """
+        Test calculate_power with one and two runs (a single row of subplots).
+        """
+        for nruns in [1, 2]:
+            with tempfile.TemporaryDirectory() as tmpdirname:
+                power_files = os.path.join(tmpdirname, 'power_files')
+                os.makedirs(power_files)
+                shutil.copy(self.pol_file, power_files)
+                for run in range(1, nruns + 1):
+                    shutil.copy(os.path.join(self.power_file, f'POWER_ABS_{run:03d}.OUT'), power_files)
+                probabilities = pd.read_csv(self.hydrodynamic_probabilities).iloc[:nruns].copy()
+                probabilities['run number'] = np.arange(1, nruns + 1)
+                probabilities_file = os.path.join(tmpdirname, 'probabilities.csv')
+                probabilities.to_csv(probabilities_file, index=False)
+
+                save_path = os.path.join(tmpdirname, 'output')
+                pm.calculate_power(power_files, probabilities_file, save_path)
+                self.assertTrue(os.path.exists(os.path.join(save_path, 'Power_per_device_annual.csv')))
+                self.assertTrue(os.path.exists(os.path.join(save_path, 'Scaled_Power_per_device_per_scenario.png')))
+
 def run_all():
     suite = unittest.TestSuite()
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestPowerModule))
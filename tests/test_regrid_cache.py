@@ -0,0 +1,96 @@
+import sys
+import os
+import time
+import tempfile
+import unittest
+import numpy as np
+
+# Get the directory in which the current script is located
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+# Import seat
+parent_dir = os.path.dirname(script_dir)
+sys.path.insert(0, parent_dir)
+
+# fmt: off
+from seat.modules.regrid_cache import RegridCache, get_regrid_cache
+
+# fmt: on
+
+
+class TestRegridCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmpdir.name, "cache")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_save_and_load(self):
+        cache = RegridCache(self.cache_dir)
+        key = cache.make_key("nearest", np.arange(5.0), n=1)
+        self.assertIsNone(cache.load(key))
+
+        cache.save(key, {"indices": np.arange(5), "valid": np.ones(5, dtype=bool)})
+        arrays = cache.load(key)
+
+        np.testing.assert_array_equal(arrays["indices"], np.arange(5))
+        np.testing.assert_array_equal(arrays["valid"], np.ones(5, dtype=bool))
+
+    def test_make_key(self):
+        x = np.arange(10.0)
+        key = RegridCache.make_key("linear", x, x)
+        self.assertEqual(key, RegridCache.make_key("linear", x.copy(), x.copy()))
+        self.assertNotEqual(key, RegridCache.make_key("nearest", x, x))
+        self.assertNotEqual(key, RegridCache.make_key("linear", x, x + 1e-9))
+        self.assertNotEqual(key, RegridCache.make_key("linear", x, x, dxdy=1.0))
+        self.assertNotEqual(
+            RegridCache.make_key("linear", x.reshape(2, 5)),
+            RegridCache.make_key("linear", x.reshape(5, 2)),
+        )
+
+    def test_disabled(self):
+        cache = RegridCache(None)
+        self.assertFalse(cache.enabled)
+        cache.save("key", {"a": np.arange(3)})
+        self.assertIsNone(cache.load("key"))
+
+    def test_evicts_least_recently_used(self):
+        cache = RegridCache(self.cache_dir, max_size_mb=1)
+        array = {"a": np.zeros(50_000)}  # ~400 kB per entry
+        cache.save("first", array)
+        cache.save("second", array)
+        # make "first" the most recently used entry
+        past = time.time() - 100
+        os.utime(os.path.join(self.cache_dir, "second.npz"), (past, past))
+        self.assertIsNotNone(cache.load("first"))
+
+        cache.save("third", array)
+
+        self.assertIsNotNone(cache.load("first"))
+        self.assertIsNone(cache.load("second"))
+        self.assertIsNotNone(cache.load("third"))
+
+    def test_get_regrid_cache_from_environment(self):
+        os.environ["SEAT_REGRID_CACHE_DIR"] = self.cache_dir
+        os.environ["SEAT_REGRID_CACHE_MAX_MB"] = "2"
+        try:
+            cache = get_regrid_cache()
+        finally:
+            del os.environ["SEAT_REGRID_CACHE_DIR"]
+            del os.environ["SEAT_REGRID_CACHE_MAX_MB"]
+        self.assertEqual(cache.cache_dir, self.cache_dir)
+        self.assertEqual(cache.max_size_bytes, 2 * 1024**2)
+        self.assertFalse(get_regrid_cache().enabled)
+
+
+def run_all():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestRegridCache))
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
+
+
+if __name__ == "__main__":
+    run_all()
@@ -0,0 +1,101 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Get the directory in which the current script is located
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+# Import seat
+parent_dir = os.path.dirname(script_dir)
+sys.path.insert(0, parent_dir)
+
+# fmt: off
+from seat.modules.run_timer import RunTimer, format_timings, PROFILE_ENV, TRACEMALLOC_ENV
+
+# fmt: on
+
+
+class TestRunTimer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stages_and_progress(self):
+        progress = []
+        timer = RunTimer("velocity", lambda *args: progress.append(args), trace_memory=True, profile=False)
+        timer("file loading", 0.0)
+        data = [0.0] * 100000
+        timer("statistics velocity_magnitude_difference", 0.8)
+        del data
+        filename = timer.write(self.tmpdir.name)
+
+        self.assertEqual(progress, [("file loading", 0.0), ("statistics velocity_magnitude_difference", 0.8)])
+        with open(filename, encoding="utf-8") as timings_file:
+            report = json.load(timings_file)
+        self.assertEqual(os.path.basename(filename), "timings.json")
+        self.assertEqual(report["module"], "velocity")
+        self.assertEqual([stage["stage"] for stage in report["stages"]],
+                         ["file loading", "statistics velocity_magnitude_difference"])
+        self.assertGreaterEqual(report["total_seconds"], sum(stage["seconds"] for stage in report["stages"]))
+        # the list allocated during file loading is traced
+        self.assertGreater(report["stages"][0]["peak_traced_mb"], 0.5)
+        self.assertIn("file loading", format_timings(report))
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, "velocity.prof")))
+
+    def test_cancelled_stage_not_recorded(self):
+        def progress_callback(stage, fraction):
+            raise RuntimeError(stage)
+
+        timer = RunTimer("power", progress_callback, trace_memory=False, profile=False)
+        with self.assertRaises(RuntimeError):
+            timer("file loading", 0.0)
+        self.assertEqual(timer.report()["stages"], [])
+
+    def test_environment_variables(self):
+        with patch.dict(os.environ, {PROFILE_ENV: "1", TRACEMALLOC_ENV: "0"}):
+            timer = RunTimer("acoustics")
+        timer("file loading", 0.0)
+        timer.write(self.tmpdir.name)
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, "acoustics.prof")))
+        self.assertIsNone(timer.report()["stages"][0]["peak_traced_mb"])
+
+    def test_stop_releases_tracing_and_profiling(self):
+        import sys
+        import tracemalloc
+
+        timer = RunTimer("shear_stress", trace_memory=True, profile=True)
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertTrue(timer.profiling)
+        # a second run does not share the active profiler
+        other = RunTimer("velocity", trace_memory=False, profile=True)
+        self.assertFalse(other.profiling)
+        other.stop()
+
+        try:
+            timer("file loading", 0.0)
+            raise RuntimeError("run failed")
+        except RuntimeError:
+            pass
+        finally:
+            timer.stop()
+        timer.stop()
+
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertFalse(timer.profiling)
+        self.assertIsNone(sys.getprofile())
+        self.assertEqual([stage["stage"] for stage in timer.report()["stages"]], ["file loading"])
+
+        # profiling is available again once the run stopped
+        timer = RunTimer("acoustics", trace_memory=False, profile=True)
+        self.assertTrue(timer.profiling)
+        timer.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
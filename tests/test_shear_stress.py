@@ -195,6 +195,33 @@ class TestShearStress(unittest.TestCase):
         self.assertEqual(gridtype, expected_gridtype)
 
 
+    def test_calculate_shear_stress_stressors_streaming(self):
+        """
+        Test that streaming the runs gives the same result as loading all runs into memory.
+        """
+        for value_selection in [None, 'Mean', 'Final Timestep']:
+            streamed = ssm.calculate_shear_stress_stressors(
+                self.dev_not_present,
+                self.dev_present,
+                self.probabilities,
+                self.receptor_structured,
+                value_selection=value_selection,
+                streaming=True,
+            )
+            in_memory = ssm.calculate_shear_stress_stressors(
+                self.dev_not_present,
+                self.dev_present,
+                self.probabilities,
+                self.receptor_structured,
+                value_selection=value_selection,
+                streaming=False,
+            )
+            for key in in_memory[0]:
+                np.testing.assert_allclose(streamed[0][key], in_memory[0][key], err_msg=key)
+            np.testing.assert_array_equal(streamed[1], in_memory[1])
+            np.testing.assert_array_equal(streamed[2], in_memory[2])
+
+
     def test_calculate_shear_stress_stressors_unstructured(self):
         """
         Test the calculate_shear_stress_stressors function on unstructured data using means.
@@ -54,6 +54,40 @@ class TestEstimateGridSpacing(TestStressorUtils):
         spacing = su.estimate_grid_spacing(x, y)
         self.assertAlmostEqual(spacing, expected_spacing, delta=0.02)
 
+    def test_all_and_stratified_methods(self):
+        # Evenly spaced points with a duplicated node
+        x, y = np.meshgrid(np.arange(0, 10, 1), np.arange(0, 10, 1))
+        x = np.append(x.flatten(), 0)
+        y = np.append(y.flatten(), 0)
+
+        self.assertEqual(su.estimate_grid_spacing(x, y, method="all"), 1)
+        self.assertEqual(su.estimate_grid_spacing(x, y, nsamples=16, method="stratified"), 1)
+
+    def test_random_method_matches_brute_force(self):
+        np.random.seed(1)
+        x = np.random.rand(200)
+        y = np.random.rand(200)
+
+        # nearest neighbour distance of every point, all points sampled
+        distance = np.sqrt((x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2)
+        np.fill_diagonal(distance, np.inf)
+        expected_spacing = np.median(distance.min(axis=1))
+
+        spacing = su.estimate_grid_spacing(x, y, nsamples=len(x))
+        self.assertAlmostEqual(spacing, expected_spacing, places=12)
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            su.estimate_grid_spacing(np.arange(3), np.arange(3), method="invalid")
+
+    def test_no_finite_coordinates(self):
+        nan = np.full(4, np.nan)
+        for method in ["stratified", "all"]:
+            with self.assertRaises(ValueError):
+                su.estimate_grid_spacing(nan, nan, method=method)
+            with self.assertRaises(ValueError):
+                su.estimate_grid_spacing(np.array([]), np.array([]), method=method)
+
 
 class TestCreateStructuredArrayFromUnstructured(TestStressorUtils):
 
@@ -75,6 +109,41 @@ class TestCreateStructuredArrayFromUnstructured(TestStressorUtils):
         np.testing.assert_array_almost_equal(refyg[:, 0], np.arange(0, 2, dxdy))
 
 
+class TestUnstructuredGridRegridder(TestStressorUtils):
+
+    def test_regrid_matches_linear_tri_interpolator(self):
+        from matplotlib.tri import LinearTriInterpolator, TriAnalyzer, Triangulation
+
+        np.random.seed(0)
+        x = np.random.rand(200) * 10
+        y = np.random.rand(200) * 5
+        z = np.sin(x) + y
+        z[10] = np.nan
+        dxdy = 0.5
+
+        regridder = su.UnstructuredGridRegridder(x, y, dxdy, flatness=0.2)
+
+        tri = Triangulation(x, y)
+        tri.set_mask(TriAnalyzer(tri).get_flat_tri_mask(0.2))
+        expected = LinearTriInterpolator(tri, z)(regridder.x_grid, regridder.y_grid).data
+
+        z_interp = regridder.regrid(z)
+        self.assertEqual(z_interp.shape, regridder.x_grid.shape)
+        np.testing.assert_array_equal(np.isnan(z_interp), np.isnan(expected))
+        np.testing.assert_array_almost_equal(z_interp, expected, decimal=10)
+
+    def test_regrid_fields(self):
+        x = np.array([0, 1, 1, 0])
+        y = np.array([0, 0, 1, 1])
+        regridder = su.UnstructuredGridRegridder(x, y, 0.5)
+
+        result = regridder.regrid_fields({"a": np.array([1, 2, 3, 4]), "b": np.ones(4)})
+
+        self.assertEqual(list(result.keys()), ["a", "b"])
+        np.testing.assert_array_almost_equal(result["b"], np.ones(regridder.x_grid.shape))
+        np.testing.assert_array_almost_equal(result["a"], regridder.regrid(np.array([1, 2, 3, 4])))
+
+
 class TestRedefineStructuredGrid(TestStressorUtils):
 
     def test_redefined_grid(self):
@@ -116,6 +185,70 @@ class TestResampleStructuredGrid(TestStressorUtils):
         # Assert the shape of the resampled grid
         self.assertEqual(z_resampled.shape, X_grid_out.shape)
 
+    def test_matches_griddata(self):
+        from scipy.interpolate import griddata
+
+        x_grid, y_grid = np.meshgrid(np.linspace(0, 10, 7), np.linspace(0, 5, 6))
+        # curvilinear grid, not handled by the rectilinear fast path
+        x_grid = x_grid + 0.1 * y_grid
+        z = np.sin(x_grid) * np.cos(y_grid)
+        z[2, 3] = np.nan
+        X_grid_out, Y_grid_out = np.meshgrid(np.linspace(-1, 11, 13), np.linspace(0, 6, 9))
+        self.assertIsNone(su.rectilinear_axes(x_grid, y_grid))
+
+        for method in ['nearest', 'linear']:
+            expected = griddata((x_grid.flatten(), y_grid.flatten()), z.flatten(), (X_grid_out, Y_grid_out), method=method, fill_value=0)
+            z_resampled = su.resample_structured_grid(x_grid, y_grid, z, X_grid_out, Y_grid_out, interpmethod=method)
+            np.testing.assert_array_equal(z_resampled, expected)
+
+    def test_rectilinear_grid(self):
+        from scipy.interpolate import griddata
+
+        # descending y and uneven x spacing, as in a north-up raster
+        x_grid, y_grid = np.meshgrid([0, 1, 2.5, 4, 6, 8.5, 10], np.linspace(5, 0, 6))
+        X_grid_out, Y_grid_out = np.meshgrid(np.linspace(-1.1, 11.1, 12), np.linspace(-0.9, 6.1, 9))
+        np.testing.assert_array_equal(su.rectilinear_axes(x_grid, y_grid)[1], np.linspace(5, 0, 6))
+
+        # no ties between output points and the midpoints of the grid
+        z = np.sin(x_grid) * np.cos(y_grid)
+        expected = griddata((x_grid.flatten(), y_grid.flatten()), z.flatten(), (X_grid_out, Y_grid_out), method='nearest')
+        z_resampled = su.resample_structured_grid(x_grid, y_grid, z, X_grid_out, Y_grid_out, interpmethod='nearest')
+        np.testing.assert_array_equal(z_resampled, expected)
+
+        # bilinear interpolation is exact for a bilinear field, 0 outside the grid
+        z = 1 + 2 * x_grid - y_grid + 0.5 * x_grid * y_grid
+        inside = (X_grid_out >= 0) & (X_grid_out <= 10) & (Y_grid_out >= 0) & (Y_grid_out <= 5)
+        expected = np.where(inside, 1 + 2 * X_grid_out - Y_grid_out + 0.5 * X_grid_out * Y_grid_out, 0)
+        z_resampled = su.resample_structured_grid(x_grid, y_grid, z, X_grid_out, Y_grid_out, interpmethod='linear')
+        np.testing.assert_allclose(z_resampled, expected, rtol=1e-12, atol=1e-12)
+
+        # nan values only spread to the cells around them
+        z[2, 3] = np.nan
+        z_resampled = su.resample_structured_grid(x_grid, y_grid, z, X_grid_out, Y_grid_out, interpmethod='linear')
+        near_nan = (X_grid_out > 2.5) & (X_grid_out < 6) & (Y_grid_out > 2) & (Y_grid_out < 4)
+        np.testing.assert_array_equal(np.isnan(z_resampled), near_nan & inside)
+
+    def test_cached_weights(self):
+        import tempfile
+        from seat.modules.regrid_cache import RegridCache
+
+        x_grid, y_grid = np.meshgrid(np.linspace(0, 10, 7), np.linspace(0, 5, 6))
+        z = np.sin(x_grid) * np.cos(y_grid)
+        X_grid_out, Y_grid_out = np.meshgrid(np.linspace(0, 10, 13), np.linspace(0, 5, 9))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = RegridCache(cache_dir)
+            # rectilinear resamples are not cached, use the triangulation weights
+            first = su.StructuredGridResampler(x_grid, y_grid, X_grid_out, Y_grid_out, 'linear', cache=cache, exact=True)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            second = su.StructuredGridResampler(x_grid, y_grid, X_grid_out, Y_grid_out, 'linear', cache=cache, exact=True)
+            np.testing.assert_array_equal(first.resample(z), second.resample(z))
+
+            regridder = su.UnstructuredGridRegridder(x_grid.flatten(), y_grid.flatten(), 0.5, cache=cache)
+            cached = su.UnstructuredGridRegridder(x_grid.flatten(), y_grid.flatten(), 0.5, cache=cache)
+            np.testing.assert_array_equal(regridder.regrid(z.flatten()), cached.regrid(z.flatten()))
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
 
 class TestCalcReceptorArray(TestStressorUtils):
 
@@ -133,6 +266,25 @@ class TestCalcReceptorArray(TestStressorUtils):
         # Assert the output based on actual expected values from the .tif file
         np.testing.assert_array_almost_equal(receptor_array, expected_receptor_array, decimal=6)
 
+    def test_windowed_read_matches_full_raster(self):
+        from scipy.interpolate import griddata
+
+        rx, ry, array = su.read_raster(self.grain_size_file)
+        rows, cols = array.shape
+        # cell centres over a small part of the raster plus one point beyond it
+        x = np.append(rx[0, np.linspace(cols // 4, cols // 2, 5).astype(int)], rx[0, -1] + 3 * (rx[0, 1] - rx[0, 0]))
+        y = np.append(ry[np.linspace(rows // 4, rows // 2, 5).astype(int), 0], ry[rows // 3, 0])
+
+        data = gdal.Open(self.grain_size_file)
+        x_grid, y_grid, window = su.read_raster_window(data, x, y)
+        data = None
+        self.assertLess(window.size, array.size)
+        self.assertEqual(x_grid.shape, window.shape)
+
+        array = np.where(array < 0, 0, array)
+        expected = griddata((rx.flatten(), ry.flatten()), array.flatten(), (x, y), method='nearest')
+        np.testing.assert_array_equal(su.calc_receptor_array(self.grain_size_file, x, y), expected)
+
     def test_with_csv_file(self):
         # Call the original function with the actual CSV file
         receptor_array = su.calc_receptor_array(self.receptor_filename_csv, self.x, self.y)
@@ -157,6 +309,63 @@ class TestCalcReceptorArray(TestStressorUtils):
         self.assertTrue(f"Invalid Receptor File {receptor_filename}. Must be of type .tif or .csv" in str(context.exception))
 
 
+class TestMapRuns(TestStressorUtils):
+
+    def test_map_runs_keeps_run_order(self):
+        run_args = [(i, 2) for i in range(10)]
+        expected = [i**2 for i in range(10)]
+
+        serial = list(su.map_runs(pow, run_args))
+        threaded = list(su.map_runs(pow, run_args, max_workers=4, use_processes=False))
+        processes = list(su.map_runs(pow, run_args, max_workers=2, use_processes=True))
+
+        self.assertEqual(serial, expected)
+        self.assertEqual(threaded, expected)
+        self.assertEqual(processes, expected)
+
+    def test_map_runs_progress(self):
+        run_args = [(i, 2) for i in range(4)]
+        for max_workers in [1, 2]:
+            stages = []
+            results = list(su.map_runs(pow, run_args, max_workers=max_workers, use_processes=False,
+                                       progress_callback=su.scale_progress(lambda *a: stages.append(a), 0.5, 1.0)))
+            self.assertEqual(results, [0, 1, 4, 9])
+            self.assertEqual(stages, [('run file 1 of 4', 0.5), ('run file 2 of 4', 0.625),
+                                      ('run file 3 of 4', 0.75), ('run file 4 of 4', 0.875)])
+
+    def test_map_runs_cancelled(self):
+        def progress_callback(stage, fraction):
+            if stage == 'run file 3 of 4':
+                raise su.RunCancelled(stage)
+
+        run_args = [(i, 2) for i in range(4)]
+        for max_workers in [1, 2]:
+            results = []
+            with self.assertRaises(su.RunCancelled):
+                for result in su.map_runs(pow, run_args, max_workers=max_workers, use_processes=False,
+                                          progress_callback=progress_callback):
+                    results.append(result)
+            self.assertEqual(results, [0, 1])
+
+    def test_map_runs_bounded_submission(self):
+        import threading
+
+        started = []
+        lock = threading.Lock()
+
+        def read_run(i):
+            with lock:
+                started.append(i)
+            return i
+
+        run_args = [(i,) for i in range(20)]
+        for ic, result in enumerate(su.map_runs(read_run, run_args, max_workers=3)):
+            self.assertEqual(result, ic)
+            # runs are only submitted max_workers ahead of the one yielded
+            with lock:
+                self.assertLessEqual(len(started), ic + 1 + 3)
+        self.assertEqual(sorted(started), list(range(20)))
+
 class TestTrimZeros(TestStressorUtils):
 
     def test_trim_zeros(self):
@@ -277,6 +486,110 @@ class TestNumpyArrayToRaster(TestStressorUtils):
         # Ensure that the function returned the correct output path
         self.assertEqual(result_path, self.output_path)
 
+    def test_raster_from_array_matches_read_raster(self):
+        numpy_array = np.array([[1.1, 2.2, np.nan], [3.3, 4.4, 5.5]])
+        bounds = [10.5, -2.25]
+        cell_resolution = [0.5, 0.25]
+        output_raster = su.create_raster(self.output_path, 3, 2, nbands=1)
+        su.numpy_array_to_raster(output_raster, numpy_array, bounds, cell_resolution, 4326, self.output_path)
+        output_raster = None
+
+        rx, ry, z = su.read_raster(self.output_path)
+        mx, my, mz = su.raster_from_array(numpy_array, bounds, cell_resolution)
+
+        np.testing.assert_array_equal(mx, rx)
+        np.testing.assert_array_equal(my, ry)
+        np.testing.assert_array_equal(mz, z)
+
+    def test_compressed_profile(self):
+        numpy_array = np.arange(300 * 400, dtype=np.float32).reshape(300, 400) / 7
+        output_raster = su.create_raster(self.output_path, 400, 300, nbands=1, profile='deflate')
+        su.numpy_array_to_raster(output_raster, numpy_array, [0, 0], [1, 1], 32610, self.output_path, approx_stats=True)
+        output_raster = None
+
+        dataset = gdal.Open(self.output_path)
+        band = dataset.GetRasterBand(1)
+        self.assertEqual(dataset.GetMetadataItem('COMPRESSION', 'IMAGE_STRUCTURE'), 'DEFLATE')
+        self.assertEqual(band.GetBlockSize(), [256, 256])
+        np.testing.assert_array_equal(band.ReadAsArray(), numpy_array)
+        self.assertIsNotNone(band.GetMetadataItem('STATISTICS_MEAN'))
+        dataset = None
+
+    def test_convert_to_cog(self):
+        numpy_array = np.tile(np.arange(4, dtype=np.float32), (600, 150))
+        output_raster = su.create_raster(self.output_path, 600, 600, nbands=1)
+        su.numpy_array_to_raster(output_raster, numpy_array, [0, 0], [1, 1], 32610, self.output_path)
+        output_raster = None
+
+        su.convert_to_cog(self.output_path, resampling=su.layer_overview_resampling('motility_classified'))
+        dataset = gdal.Open(self.output_path)
+        band = dataset.GetRasterBand(1)
+        self.assertGreater(band.GetOverviewCount(), 0)
+        np.testing.assert_array_equal(band.ReadAsArray(), numpy_array)
+        # nearest overviews keep the classes
+        self.assertTrue(np.all(np.isin(band.GetOverview(0).ReadAsArray(), [0, 1, 2, 3])))
+        dataset = None
+        self.assertFalse(os.path.exists('test_output.cog.tif'))
+
+    def test_layer_overview_resampling(self):
+        self.assertEqual(su.layer_overview_resampling('sediment_mobility_classified'), 'nearest')
+        self.assertEqual(su.layer_overview_resampling('velocity_risk_layer'), 'nearest')
+        self.assertEqual(su.layer_overview_resampling('shear_stress_difference'), 'average')
+        self.assertEqual(su.layer_overview_resampling('shear_stress_difference', {'shear_stress_difference': 'mode'}), 'mode')
+
+    def test_geotiff_creation_options(self):
+        self.assertEqual(su.geotiff_creation_options(), [])
+        self.assertIn('PREDICTOR=3', su.geotiff_creation_options('zstd'))
+        self.assertIn('PREDICTOR=2', su.geotiff_creation_options('zstd', gdal.GDT_Int16))
+        self.assertEqual(su.geotiff_creation_options(['COMPRESS=LZW']), ['COMPRESS=LZW'])
+        with self.assertRaises(ValueError):
+            su.geotiff_creation_options('unknown')
+
+
+class TestWriteResultBundle(TestStressorUtils):
+
+    def setUp(self):
+        self.arrays = {
+            'motility_difference': np.array([[1.5, -2.0, np.nan], [0.25, 4.0, 5.0]]),
+            'motility_classified': np.array([[0, 1, 2], [3, 1, 0]]),
+        }
+        self.bounds = [10.5, -2.25]
+        self.cell_resolution = [0.5, 0.25]
+
+    def test_multiband(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as output_path:
+            layers = su.write_result_bundle(os.path.join(output_path, 'velocity'), self.arrays, self.bounds, self.cell_resolution, 4326)
+            self.assertEqual(list(layers), list(self.arrays))
+            self.assertEqual(os.listdir(output_path), ['velocity.tif'])
+
+            dataset = gdal.Open(os.path.join(output_path, 'velocity.tif'))
+            self.assertEqual(dataset.RasterCount, 2)
+            self.assertEqual(dataset.GetRasterBand(2).GetDescription(), 'motility_classified')
+            dataset = None
+            for name, layer in layers.items():
+                rx, ry, z = su.read_raster(layer)
+                mx, my, mz = su.raster_from_array(self.arrays[name], self.bounds, self.cell_resolution)
+                np.testing.assert_array_equal(mx, rx)
+                np.testing.assert_array_equal(my, ry)
+                np.testing.assert_array_equal(mz, z)
+
+    def test_netcdf(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as output_path:
+            layers = su.write_result_bundle(os.path.join(output_path, 'velocity'), self.arrays, self.bounds, self.cell_resolution, 4326, output_format='netcdf')
+            self.assertEqual(os.listdir(output_path), ['velocity.nc'])
+            for name, layer in layers.items():
+                dataset = gdal.Open(layer)
+                np.testing.assert_array_equal(dataset.GetRasterBand(1).ReadAsArray(), self.arrays[name].astype(np.float32))
+                dataset = None
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            su.write_result_bundle('velocity', self.arrays, self.bounds, self.cell_resolution, 4326, output_format='zarr')
+
 
 class TestFindUtmSrid(TestStressorUtils):
 
@@ -416,6 +729,27 @@ class TestCalculateCellArea(TestStressorUtils):
         np.testing.assert_array_equal(rym, expected_rym)
 
 
+    def test_latlon_false_irregular_grid(self):
+        # Planar grid with varying spacing, compared with the area of each cell
+        x, y = np.meshgrid([0., 1., 3., 6.], [0., 2., 3.])
+        rxm, rym, square_area = su.calculate_cell_area(x, y, latlon=False)
+
+        np.testing.assert_array_equal(square_area, [[2., 4., 6.], [1., 2., 3.]])
+        np.testing.assert_array_equal(rxm, [[0.5, 2., 4.5], [0.5, 2., 4.5]])
+        np.testing.assert_array_equal(rym, [[1., 1., 1.], [2.5, 2.5, 2.5]])
+
+    def test_latlon_false_regular_grid(self):
+        # Regular planar grid returns a constant area without a full size array
+        x, y = np.meshgrid(np.arange(100) * 0.5 + 10, np.arange(50) * -0.25 + 5)
+        self.assertTrue(su.is_regular_grid(x, y))
+        rxm, rym, square_area = su.calculate_cell_area(x, y, latlon=False)
+
+        self.assertEqual(square_area.shape, (49, 99))
+        self.assertEqual(square_area.strides, (0, 0))
+        np.testing.assert_allclose(square_area, -0.125)
+        self.assertEqual(rxm.shape, (49, 99))
+        self.assertFalse(su.is_regular_grid(x + y, y))
+
 class TestBinData(TestStressorUtils):
 
     def test_bin_data(self):
@@ -529,6 +863,24 @@ class TestBinReceptor(TestStressorUtils):
             np.testing.assert_array_almost_equal(result[area_percent_key], expected_result[area_percent_key])
 
 
+    def test_bin_receptor_matches_masked_sum(self):
+        # Random values and receptors, compared with a masked sum per receptor and bin
+        np.random.seed(0)
+        zm = np.random.rand(1000)
+        receptor = np.random.randint(0, 4, 1000)
+        square_area = np.random.rand(1000)
+        result = su.bin_receptor(zm, receptor, square_area, nbins=10)
+
+        bins = np.append(result['bin start'], result['bin end'][-1])
+        self.assertEqual(list(result.keys())[3:5], ['Area, receptor value 0', 'Area percent, receptor value 0'])
+        for rval in np.unique(receptor):
+            expected = [
+                square_area[(receptor == rval) & (zm >= start) & ((zm < end) | ((ic == 9) & (zm <= end)))].sum()
+                for ic, (start, end) in enumerate(zip(bins[:-1], bins[1:]))
+            ]
+            np.testing.assert_array_almost_equal(result[f'Area, receptor value {rval}'], expected)
+
+
 class TestBinLayer(TestStressorUtils):
 
     def test_bin_layer_without_receptor(self):
@@ -573,6 +925,74 @@ class TestBinLayer(TestStressorUtils):
         self.assertAlmostEqual(result['Area percent, receptor value 0.0'].iloc[0], 86.34171591875244, places=2)
 
 
+class TestGridGeometry(TestStressorUtils):
+
+    def test_shared_geometry_matches_per_call_geometry(self):
+        raster = su.read_raster(self.risk_layer_file)
+        geometry = su.GridGeometry(raster[0], raster[1], latlon=True)
+
+        expected = su.bin_raster(raster, raster, latlon=True)
+        result = su.bin_raster(raster, raster, latlon=True, geometry=geometry)
+        pd.testing.assert_frame_equal(result, expected)
+
+        expected = su.classify_raster_area(raster, at_values=[0, 5, 7], latlon=True)
+        result = su.classify_raster_area(raster, at_values=[0, 5, 7], latlon=True, geometry=geometry)
+        pd.testing.assert_frame_equal(result, expected)
+
+        # the cell centre interpolation is computed once per method
+        self.assertEqual(sorted(geometry._resamplers), ['linear', 'nearest'])
+
+    def test_cell_centres_match_griddata(self):
+        from scipy.interpolate import griddata
+
+        # non-planar field with a NaN edge on a regular grid
+        rx, ry = np.meshgrid(np.arange(20) * 2.0 + 100, np.arange(15) * -1.5 + 50)
+        z = np.random.default_rng(0).uniform(0, 10, rx.shape)
+        z[:, 0] = np.nan
+        z[4, 7] = np.nan
+        geometry = su.GridGeometry(rx, ry, latlon=False)
+        self.assertTrue(geometry.regular)
+
+        for interpmethod in ['nearest', 'linear']:
+            expected = griddata((rx.flatten(), ry.flatten()), z.flatten(), (geometry.rxm, geometry.rym),
+                                method=interpmethod, fill_value=0)
+            result = geometry.to_cell_centres((rx, ry, z), interpmethod=interpmethod)
+            np.testing.assert_array_equal(result, expected.flatten(), err_msg=interpmethod)
+
+    def test_bilinear_cell_centres(self):
+        rx, ry = np.meshgrid(np.arange(20) * 2.0 + 100, np.arange(15) * -1.5 + 50)
+        z = np.random.default_rng(0).uniform(0, 10, rx.shape)
+        z[4, 7] = np.nan
+        geometry = su.GridGeometry(rx, ry, latlon=False, bilinear=True)
+
+        # mean of the 2x2 surrounding points, without a triangulation
+        result = geometry.to_cell_centres((rx, ry, z), interpmethod='linear')
+        expected = (z[:-1, :-1] + z[:-1, 1:] + z[1:, :-1] + z[1:, 1:]) / 4
+        np.testing.assert_allclose(result, expected.flatten(), rtol=1e-12)
+        self.assertEqual(np.count_nonzero(np.isnan(result)), 4)
+        self.assertEqual(geometry._resamplers, {})
+
+        # on a planar field it equals the triangulated interpolation
+        z = 3 + 0.5 * rx - 2 * ry
+        result = geometry.to_cell_centres((rx, ry, z), interpmethod='linear')
+        expected = su.GridGeometry(rx, ry, latlon=False).to_cell_centres((rx, ry, z), interpmethod='linear')
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+class TestClassifyArea(TestStressorUtils):
+
+    def test_classify_area_with_receptor(self):
+        zm = np.array([0, 5, 5, 7, 3, 0, np.nan, 7])
+        receptor = np.array([1, 1, 2, 2, 2, np.nan, 1, 1])
+        square_area = np.array([1., 2., 3., 4., 5., 6., 7., 8.])
+
+        receptor_values, area, count = su.classify_area(zm, square_area, [0, 5, 7], receptor)
+
+        np.testing.assert_array_equal(receptor_values[:2], [1, 2])
+        np.testing.assert_array_equal(area[:2], [[1., 2., 8.], [0., 3., 4.]])
+        np.testing.assert_array_equal(count[:2], [[1, 1, 1], [0, 1, 1]])
+        # cells with a nan receptor are not counted
+        np.testing.assert_array_equal(area[2:].sum(), 0)
+
 class TestClassifyLayerArea(TestStressorUtils):
 
     def test_classify_layer_area_without_receptor(self):
@@ -225,6 +225,55 @@ class TestCalculateVelocityStressors(BaseTestVelocityModule):
         self.assertIsInstance(motility_classified, np.ndarray)
         self.assertGreater(motility_classified.size, 0)
 
+    def test_calculate_velocity_stressors_streaming(self):
+        """
+        Test that reading the runs in time chunks gives the same result as loading all runs into memory.
+        """
+        for value_selection in [None, 'Mean', 'Final Timestep']:
+            chunked = vm.calculate_velocity_stressors(
+                self.dev_not_present,
+                self.dev_present,
+                self.probabilities_structured,
+                self.receptor_structured,
+                value_selection=value_selection,
+                streaming=True,
+                time_chunk_size=2,
+            )
+            in_memory = vm.calculate_velocity_stressors(
+                self.dev_not_present,
+                self.dev_present,
+                self.probabilities_structured,
+                self.receptor_structured,
+                value_selection=value_selection,
+                streaming=False,
+            )
+            for key in in_memory[0]:
+                np.testing.assert_allclose(chunked[0][key], in_memory[0][key], err_msg=key)
+            np.testing.assert_array_equal(chunked[1], in_memory[1])
+            np.testing.assert_array_equal(chunked[2], in_memory[2])
+
+    def test_combine_velocity_chunked_all_runs_excluded(self):
+        """
+        Test that the chunked combination returns zero arrays on the grid when every run is excluded.
+        """
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            probabilities = pd.read_csv(self.probabilities_structured)
+            probabilities['Exclude'] = 'x'
+            probabilities_file = join(tmpdir, 'probabilities.csv')
+            probabilities.to_csv(probabilities_file, index=False)
+
+            gridtype, xcor, ycor, mag_nodev, mag_dev = vm.combine_velocity_chunked(
+                self.dev_not_present, self.dev_present, probabilities_file
+            )
+
+        self.assertEqual(gridtype, 'structured')
+        self.assertEqual(mag_nodev.shape, xcor.shape)
+        self.assertEqual(mag_dev.shape, xcor.shape)
+        self.assertFalse(np.any(mag_nodev))
+        self.assertFalse(np.any(mag_dev))
+
     def test_calculate_velocity_stressors_unstructured(self):
         """
         Test the calculate_velocity_stressors function using real unstructured data for devices-present.